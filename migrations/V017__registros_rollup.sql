@@ -0,0 +1,135 @@
+-- Rollup materializado por (categoria, mês), mantido por gatilhos em registros.
+-- O UPSERT da view vw_registros_upsert (V003) também é coberto: o INSERT ... ON CONFLICT
+-- DO UPDATE do gatilho INSTEAD OF dispara os gatilhos AFTER INSERT / AFTER UPDATE abaixo.
+
+CREATE TABLE IF NOT EXISTS registros_rollup (
+    categoria TEXT NOT NULL,
+    bucket TEXT NOT NULL, -- primeiro dia do mês: 'YYYY-MM-01'
+    count INTEGER NOT NULL,
+    sum INTEGER NOT NULL,
+    min INTEGER NOT NULL,
+    max INTEGER NOT NULL,
+    data_min TEXT NOT NULL,
+    data_max TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    PRIMARY KEY (categoria, bucket)
+) WITHOUT ROWID;
+
+-- Backfill a partir da tabela base
+DELETE FROM registros_rollup;
+
+INSERT INTO registros_rollup
+    (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+SELECT categoria,
+       strftime('%Y-%m-01', data),
+       COUNT(*), SUM(valor), MIN(valor), MAX(valor), MIN(data), MAX(data),
+       CURRENT_TIMESTAMP
+  FROM registros
+ GROUP BY categoria, strftime('%Y-%m-01', data);
+
+-- INSERT: acumula no bucket (cria se não existir)
+DROP TRIGGER IF EXISTS trg_registros_rollup_insert;
+CREATE TRIGGER trg_registros_rollup_insert
+AFTER INSERT ON registros
+FOR EACH ROW
+BEGIN
+    INSERT INTO registros_rollup
+        (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+    VALUES
+        (NEW.categoria, strftime('%Y-%m-01', NEW.data), 1, NEW.valor, NEW.valor, NEW.valor,
+         NEW.data, NEW.data, CURRENT_TIMESTAMP)
+    ON CONFLICT(categoria, bucket) DO UPDATE SET
+        count        = count + 1,
+        sum          = sum + excluded.sum,
+        min          = MIN(min, excluded.min),
+        max          = MAX(max, excluded.max),
+        data_min     = MIN(data_min, excluded.data_min),
+        data_max     = MAX(data_max, excluded.data_max),
+        last_updated = excluded.last_updated;
+END;
+
+-- DELETE: subtrai do bucket; min/max são recalculados no próprio bucket
+-- (SEARCH em ix_registros_categoria_data, limitado a um mês de uma categoria)
+DROP TRIGGER IF EXISTS trg_registros_rollup_delete;
+CREATE TRIGGER trg_registros_rollup_delete
+AFTER DELETE ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_rollup
+       SET count = count - 1,
+           sum = sum - OLD.valor,
+           min = COALESCE((SELECT MIN(valor) FROM registros
+                            WHERE categoria = OLD.categoria
+                              AND data >= strftime('%Y-%m-01', OLD.data)
+                              AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), 0),
+           max = COALESCE((SELECT MAX(valor) FROM registros
+                            WHERE categoria = OLD.categoria
+                              AND data >= strftime('%Y-%m-01', OLD.data)
+                              AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), 0),
+           data_min = COALESCE((SELECT MIN(data) FROM registros
+                                 WHERE categoria = OLD.categoria
+                                   AND data >= strftime('%Y-%m-01', OLD.data)
+                                   AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), ''),
+           data_max = COALESCE((SELECT MAX(data) FROM registros
+                                 WHERE categoria = OLD.categoria
+                                   AND data >= strftime('%Y-%m-01', OLD.data)
+                                   AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), ''),
+           last_updated = CURRENT_TIMESTAMP
+     WHERE categoria = OLD.categoria
+       AND bucket = strftime('%Y-%m-01', OLD.data);
+
+    DELETE FROM registros_rollup
+     WHERE categoria = OLD.categoria
+       AND bucket = strftime('%Y-%m-01', OLD.data)
+       AND count <= 0;
+END;
+
+-- UPDATE (inclui o DO UPDATE do upsert via view): remove a imagem antiga e soma a nova.
+-- Restrito às colunas agregadas para não disparar no UPDATE de atualizado_em (V002).
+DROP TRIGGER IF EXISTS trg_registros_rollup_update;
+CREATE TRIGGER trg_registros_rollup_update
+AFTER UPDATE OF data, categoria, valor ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_rollup
+       SET count = count - 1,
+           sum = sum - OLD.valor,
+           min = COALESCE((SELECT MIN(valor) FROM registros
+                            WHERE categoria = OLD.categoria
+                              AND data >= strftime('%Y-%m-01', OLD.data)
+                              AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), 0),
+           max = COALESCE((SELECT MAX(valor) FROM registros
+                            WHERE categoria = OLD.categoria
+                              AND data >= strftime('%Y-%m-01', OLD.data)
+                              AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), 0),
+           data_min = COALESCE((SELECT MIN(data) FROM registros
+                                 WHERE categoria = OLD.categoria
+                                   AND data >= strftime('%Y-%m-01', OLD.data)
+                                   AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), ''),
+           data_max = COALESCE((SELECT MAX(data) FROM registros
+                                 WHERE categoria = OLD.categoria
+                                   AND data >= strftime('%Y-%m-01', OLD.data)
+                                   AND data < date(strftime('%Y-%m-01', OLD.data), '+1 month')), ''),
+           last_updated = CURRENT_TIMESTAMP
+     WHERE categoria = OLD.categoria
+       AND bucket = strftime('%Y-%m-01', OLD.data);
+
+    DELETE FROM registros_rollup
+     WHERE categoria = OLD.categoria
+       AND bucket = strftime('%Y-%m-01', OLD.data)
+       AND count <= 0;
+
+    INSERT INTO registros_rollup
+        (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+    VALUES
+        (NEW.categoria, strftime('%Y-%m-01', NEW.data), 1, NEW.valor, NEW.valor, NEW.valor,
+         NEW.data, NEW.data, CURRENT_TIMESTAMP)
+    ON CONFLICT(categoria, bucket) DO UPDATE SET
+        count        = count + 1,
+        sum          = sum + excluded.sum,
+        min          = MIN(min, excluded.min),
+        max          = MAX(max, excluded.max),
+        data_min     = MIN(data_min, excluded.data_min),
+        data_max     = MAX(data_max, excluded.data_max),
+        last_updated = excluded.last_updated;
+END;
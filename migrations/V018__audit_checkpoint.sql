@@ -0,0 +1,9 @@
+-- Checkpoint da verificação incremental da cadeia de auditoria.
+-- A verificação de rotina só recalcula os eventos com id > checkpoint_id,
+-- partindo de checkpoint_hash como prev_hash.
+ALTER TABLE audit_integrity ADD COLUMN checkpoint_id INTEGER;
+ALTER TABLE audit_integrity ADD COLUMN checkpoint_hash TEXT;
+ALTER TABLE audit_integrity ADD COLUMN checkpoint_at TEXT;
+
+-- Última verificação completa (desde a gênese); usada para agendar a próxima
+ALTER TABLE audit_integrity ADD COLUMN last_full_check_at TEXT;
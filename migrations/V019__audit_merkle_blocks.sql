@@ -0,0 +1,15 @@
+-- Raízes de Merkle por bloco de eventos encadeados da auditoria.
+-- Cada bloco cobre event_count eventos consecutivos (event_hash IS NOT NULL) entre
+-- first_id e last_id. Blocos são selados uma vez e nunca reescritos.
+CREATE TABLE IF NOT EXISTS audit_merkle_blocks (
+    block_no INTEGER PRIMARY KEY,
+    first_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL,
+    event_count INTEGER NOT NULL,
+    root TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+-- Localizar o bloco de um evento por faixa de id
+CREATE UNIQUE INDEX IF NOT EXISTS ux_audit_merkle_blocks_last_id
+    ON audit_merkle_blocks(last_id);
@@ -0,0 +1,4 @@
+-- Versão da codificação canônica usada no event_hash de cada evento.
+-- Eventos existentes continuam na v1 (JSON com sort_keys); novos eventos usam a
+-- versão configurada em AUDIT_HASH_VERSION (padrão 2: binária, campos com tamanho).
+ALTER TABLE auditoria ADD COLUMN hash_version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,9 @@
+-- Token de geração das revogações de sessão, compartilhado entre workers
+-- (SESSION_STATE_BACKEND=db). Toda revogação incrementa `generation`; cada worker
+-- compara com o último valor visto e descarta seu cache de sessões se mudou.
+CREATE TABLE IF NOT EXISTS session_state (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO session_state (id, generation) VALUES (1, 0);
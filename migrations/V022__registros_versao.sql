@@ -0,0 +1,48 @@
+-- Versão de 'registros' para HTTP condicional (ETag / Last-Modified / 304).
+-- Linha única mantida por gatilhos: toda alteração visível em registros incrementa
+-- `versao`. `instancia` é aleatória por banco, para que um banco recriado (versao de
+-- volta a 0) não repita ETags já guardadas pelos clientes.
+
+CREATE TABLE IF NOT EXISTS registros_versao (
+    id            INTEGER PRIMARY KEY CHECK (id = 1),
+    instancia     TEXT    NOT NULL,
+    versao        INTEGER NOT NULL DEFAULT 0,
+    modificado_em TEXT    NOT NULL -- UTC, 'YYYY-MM-DD HH:MM:SS' (CURRENT_TIMESTAMP)
+);
+
+INSERT OR IGNORE INTO registros_versao (id, instancia, versao, modificado_em)
+VALUES (1, lower(hex(randomblob(8))), 0, CURRENT_TIMESTAMP);
+
+DROP TRIGGER IF EXISTS trg_registros_versao_insert;
+CREATE TRIGGER trg_registros_versao_insert
+AFTER INSERT ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+END;
+
+-- Só colunas expostas pela API: o UPDATE de atualizado_em (gatilho da V002) não conta
+DROP TRIGGER IF EXISTS trg_registros_versao_update;
+CREATE TRIGGER trg_registros_versao_update
+AFTER UPDATE OF data, categoria, valor ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS trg_registros_versao_delete;
+CREATE TRIGGER trg_registros_versao_delete
+AFTER DELETE ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+END;
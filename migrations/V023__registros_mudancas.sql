@@ -0,0 +1,83 @@
+-- Feed de mudanças de 'registros' (GET /registros/changes?since=<token>).
+-- Uma linha por registro com a versão (V022) da sua última mudança; exclusões ficam
+-- como lápide (excluido = 1). "O que mudou desde a versão N" é uma faixa do índice
+-- por versao: O(mudanças), não O(tabela).
+--
+-- Os gatilhos da V022 são recriados aqui: incrementar a versão e registrar a mudança
+-- precisam acontecer no mesmo gatilho, nessa ordem (o SQLite não garante a ordem
+-- entre gatilhos distintos do mesmo evento).
+
+CREATE TABLE IF NOT EXISTS registros_mudancas (
+    registro_id INTEGER PRIMARY KEY,
+    versao      INTEGER NOT NULL,
+    excluido    INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_registros_mudancas_versao
+    ON registros_mudancas (versao);
+
+-- Backfill: cada registro existente ganha uma versão própria (versão atual + 1, + 2, ...),
+-- como se tivesse sido inserido agora. Versões distintas são o que permite paginar o feed
+-- por `versao > token`; versões >= 1 porque o feed usa 0 como "nada visto ainda".
+INSERT OR IGNORE INTO registros_mudancas (registro_id, versao, excluido)
+SELECT id,
+       (SELECT versao FROM registros_versao WHERE id = 1) + ROW_NUMBER() OVER (ORDER BY id),
+       0
+  FROM registros;
+
+UPDATE registros_versao
+   SET versao = versao + (SELECT COUNT(*) FROM registros),
+       modificado_em = CURRENT_TIMESTAMP
+ WHERE id = 1;
+
+DROP TRIGGER IF EXISTS trg_registros_versao_insert;
+CREATE TRIGGER trg_registros_versao_insert
+AFTER INSERT ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+
+    INSERT INTO registros_mudancas (registro_id, versao, excluido)
+    VALUES (NEW.id, (SELECT versao FROM registros_versao WHERE id = 1), 0)
+    ON CONFLICT(registro_id) DO UPDATE SET
+        versao   = excluded.versao,
+        excluido = 0;
+END;
+
+-- Só colunas expostas pela API: o UPDATE de atualizado_em (gatilho da V002) não conta
+DROP TRIGGER IF EXISTS trg_registros_versao_update;
+CREATE TRIGGER trg_registros_versao_update
+AFTER UPDATE OF data, categoria, valor ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+
+    INSERT INTO registros_mudancas (registro_id, versao, excluido)
+    VALUES (NEW.id, (SELECT versao FROM registros_versao WHERE id = 1), 0)
+    ON CONFLICT(registro_id) DO UPDATE SET
+        versao   = excluded.versao,
+        excluido = 0;
+END;
+
+DROP TRIGGER IF EXISTS trg_registros_versao_delete;
+CREATE TRIGGER trg_registros_versao_delete
+AFTER DELETE ON registros
+FOR EACH ROW
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = CURRENT_TIMESTAMP
+     WHERE id = 1;
+
+    INSERT INTO registros_mudancas (registro_id, versao, excluido)
+    VALUES (OLD.id, (SELECT versao FROM registros_versao WHERE id = 1), 1)
+    ON CONFLICT(registro_id) DO UPDATE SET
+        versao   = excluded.versao,
+        excluido = 1;
+END;
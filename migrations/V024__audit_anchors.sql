@@ -0,0 +1,13 @@
+-- Âncoras publicadas da auditoria (POST /admin/audit/anchor).
+-- Cada âncora registra o último event_hash da cadeia e a raiz de Merkle sobre os
+-- primeiros `blocks` blocos selados (V019). As provas de inclusão são calculadas
+-- contra a raiz da última âncora, que é exatamente o valor publicado.
+CREATE TABLE IF NOT EXISTS audit_anchors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    username TEXT NOT NULL,
+    last_hash TEXT NOT NULL,
+    merkle_root TEXT NOT NULL,
+    blocks INTEGER NOT NULL,
+    last_event_id INTEGER
+);
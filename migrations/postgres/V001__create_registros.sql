@@ -0,0 +1,22 @@
+-- V001 (Postgres) — tabela 'registros' + seed idempotente.
+-- Equivalente a migrations/V001__create_registros.py; datas/timestamps seguem como TEXT
+-- (ISO 8601) para o app se comportar igual nos dois bancos.
+
+CREATE TABLE IF NOT EXISTS registros (
+    id        BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    data      TEXT    NOT NULL,
+    categoria TEXT    NOT NULL,
+    valor     INTEGER NOT NULL
+);
+
+-- Seed idempotente: só insere se a tabela estiver vazia
+INSERT INTO registros (data, categoria, valor)
+SELECT v.data, v.categoria, v.valor
+  FROM (VALUES
+        ('2025-01-01', 'A', 10),
+        ('2025-01-02', 'A', 15),
+        ('2025-01-03', 'B', 8),
+        ('2025-01-04', 'B', 20),
+        ('2025-01-05', 'A', 7)
+       ) AS v (data, categoria, valor)
+ WHERE NOT EXISTS (SELECT 1 FROM registros);
@@ -0,0 +1,60 @@
+-- V002 (Postgres) — camada de auditoria de 'registros' (idempotente).
+-- Equivalente a migrations/V002__auditoria_registros.py:
+-- - colunas criado_em, atualizado_em, origem + backfill;
+-- - defaults de criado_em/origem no INSERT e atualizado_em no UPDATE.
+-- No SQLite são gatilhos AFTER que fazem UPDATE na própria linha; aqui são BEFORE
+-- (alteram NEW), o que também cobre o caminho DO UPDATE do INSERT ... ON CONFLICT.
+
+ALTER TABLE registros ADD COLUMN IF NOT EXISTS criado_em     TEXT;
+ALTER TABLE registros ADD COLUMN IF NOT EXISTS atualizado_em TEXT;
+ALTER TABLE registros ADD COLUMN IF NOT EXISTS origem        TEXT;
+
+-- Mesmo formato do CURRENT_TIMESTAMP do SQLite (UTC, 'YYYY-MM-DD HH:MM:SS')
+CREATE OR REPLACE FUNCTION registros_agora() RETURNS TEXT
+LANGUAGE sql STABLE AS $$
+    SELECT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+$$;
+
+-- Backfill
+UPDATE registros
+   SET criado_em     = COALESCE(criado_em, registros_agora()),
+       atualizado_em = COALESCE(atualizado_em, registros_agora()),
+       origem        = COALESCE(origem, 'script_migracao')
+ WHERE criado_em IS NULL
+    OR atualizado_em IS NULL
+    OR origem IS NULL;
+
+-- INSERT: criado_em e origem padrão quando vierem NULL
+CREATE OR REPLACE FUNCTION trg_registros_defaults_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.criado_em := COALESCE(NEW.criado_em, registros_agora());
+    NEW.origem    := COALESCE(NEW.origem, 'script_migracao');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_registros_set_criado_em_default ON registros;
+CREATE TRIGGER trg_registros_set_criado_em_default
+BEFORE INSERT ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_defaults_insert();
+
+-- UPDATE: atualizado_em = agora, a menos que o próprio UPDATE já o tenha definido
+CREATE OR REPLACE FUNCTION trg_registros_set_atualizado_em() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.atualizado_em IS NOT DISTINCT FROM OLD.atualizado_em THEN
+        NEW.atualizado_em := registros_agora();
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_registros_set_atualizado_em ON registros;
+CREATE TRIGGER trg_registros_set_atualizado_em
+BEFORE UPDATE ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_set_atualizado_em();
+
+-- Índices
+CREATE INDEX IF NOT EXISTS idx_registros_criado_em     ON registros (criado_em);
+CREATE INDEX IF NOT EXISTS idx_registros_atualizado_em ON registros (atualizado_em);
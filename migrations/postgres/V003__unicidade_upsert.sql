@@ -0,0 +1,26 @@
+-- V003 (Postgres) — unicidade por (data, categoria).
+-- Equivalente a migrations/V003__unicidade_upsert_e_wal.py, com duas diferenças:
+-- - Sem view vw_registros_upsert: o app faz INSERT ... ON CONFLICT (data, categoria)
+--   DO UPDATE direto na tabela (ver _UPSERT_SQL em backend/crud.py). Assim o upsert
+--   aceita RETURNING e a carga em lote pode vir de uma tabela de staging (COPY).
+-- - Sem PRAGMAs de WAL: o Postgres sempre usa WAL; synchronous_commit é do servidor.
+
+-- 1) Remoção idempotente de duplicados, preservando o mais recente
+DELETE FROM registros r
+ USING (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY data, categoria
+                   ORDER BY COALESCE(atualizado_em, criado_em) DESC, id DESC
+               ) AS rn
+          FROM registros
+       ) d
+ WHERE r.id = d.id
+   AND d.rn > 1;
+
+-- 2) Índices (UNIQUE e auxiliar)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_registros_data_categoria
+    ON registros (data, categoria);
+
+CREATE INDEX IF NOT EXISTS ix_registros_categoria_data
+    ON registros (categoria, data);
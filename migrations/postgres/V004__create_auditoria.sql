@@ -0,0 +1,15 @@
+-- V004 (Postgres) — tabela de auditoria. Equivalente a migrations/V004__create_auditoria.sql.
+
+CREATE TABLE IF NOT EXISTS auditoria (
+    id             BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    timestamp      TEXT    NOT NULL,
+    username       TEXT    NOT NULL,
+    role           TEXT    NOT NULL,
+    action         TEXT    NOT NULL,
+    resource       TEXT    NOT NULL,
+    resource_id    BIGINT,
+    payload_before TEXT,
+    payload_after  TEXT,
+    endpoint       TEXT    NOT NULL,
+    method         TEXT    NOT NULL
+);
@@ -0,0 +1,11 @@
+-- V005 (Postgres) — sessões. Equivalente a migrations/V005__sessions.sql.
+-- Flags seguem INTEGER 0/1, como no SQLite (o app compara com 0/1).
+
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id         TEXT    PRIMARY KEY,
+    username   TEXT    NOT NULL,
+    role       TEXT    NOT NULL,
+    created_at TEXT    NOT NULL,
+    expires_at TEXT    NOT NULL,
+    revoked    INTEGER NOT NULL DEFAULT 0
+);
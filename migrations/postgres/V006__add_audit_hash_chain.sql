@@ -0,0 +1,5 @@
+-- V006 (Postgres) — encadeamento de hashes. Equivalente a migrations/V006__add_audit_hash_chain.sql.
+-- (O índice por id do SQLite já é a PK aqui.)
+
+ALTER TABLE auditoria ADD COLUMN IF NOT EXISTS prev_hash  TEXT;
+ALTER TABLE auditoria ADD COLUMN IF NOT EXISTS event_hash TEXT;
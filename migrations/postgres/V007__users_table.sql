@@ -0,0 +1,10 @@
+-- V007 (Postgres) — usuários. Equivalente a migrations/V007__users_table.sql.
+
+CREATE TABLE IF NOT EXISTS users (
+    id            BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    username      TEXT    UNIQUE NOT NULL,
+    password_hash TEXT    NOT NULL,
+    role          TEXT    NOT NULL,
+    is_active     INTEGER DEFAULT 1,
+    created_at    TEXT    NOT NULL
+);
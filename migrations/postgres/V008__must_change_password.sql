@@ -0,0 +1,3 @@
+-- V008 (Postgres) — equivalente a migrations/V008__must_change_password.sql.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS must_change_password INTEGER DEFAULT 0;
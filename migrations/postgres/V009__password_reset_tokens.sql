@@ -0,0 +1,16 @@
+-- V009 (Postgres) — tokens de reset de senha. Equivalente a migrations/V009__password_reset_tokens.sql.
+
+CREATE TABLE IF NOT EXISTS password_reset_tokens (
+    id         BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    username   TEXT NOT NULL REFERENCES users (username),
+    token_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    used_at    TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_username
+    ON password_reset_tokens (username);
+
+CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_token_hash
+    ON password_reset_tokens (token_hash);
@@ -0,0 +1,4 @@
+-- V010 (Postgres) — equivalente a migrations/V010__password_changed_at.sql.
+-- TEXT (ISO 8601), como as demais datas: o app grava e lê strings isoformat.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS password_changed_at TEXT;
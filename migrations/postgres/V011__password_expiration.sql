@@ -0,0 +1,8 @@
+-- V011 (Postgres) — equivalente a migrations/V011__password_expiration.sql.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS password_expires_at TEXT;
+
+UPDATE users
+   SET password_expires_at =
+       to_char((now() AT TIME ZONE 'UTC') + interval '90 days', 'YYYY-MM-DD"T"HH24:MI:SS"Z"')
+ WHERE password_expires_at IS NULL;
@@ -0,0 +1,5 @@
+-- V012 (Postgres) — equivalente a migrations/V012__users_email.sql.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS email TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_users_email ON users (email);
@@ -0,0 +1,5 @@
+-- V013 (Postgres) — equivalente a migrations/V013__users_profile_fields.sql.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS name        TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS fullname    TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_path TEXT;
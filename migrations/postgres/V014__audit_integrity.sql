@@ -0,0 +1,15 @@
+-- V014 (Postgres) — estado de integridade da auditoria. Equivalente a migrations/V014__audit_integrity.sql.
+
+CREATE TABLE IF NOT EXISTS audit_integrity (
+    id                INTEGER PRIMARY KEY CHECK (id = 1),
+    status            TEXT NOT NULL DEFAULT 'OK', -- 'OK' | 'VIOLATED'
+    last_check_at     TEXT,
+    violated_at       TEXT,
+    violated_event_id BIGINT,
+    reason            TEXT
+);
+
+-- Inicializa com estado saudável (mesmo formato do CURRENT_TIMESTAMP do SQLite)
+INSERT INTO audit_integrity (id, status, last_check_at)
+VALUES (1, 'OK', to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'))
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,12 @@
+-- V015 (Postgres) — pedidos de perfil. Equivalente a migrations/V015__role_requests.sql.
+
+CREATE TABLE IF NOT EXISTS role_requests (
+    id             BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    username       TEXT NOT NULL REFERENCES users (username),
+    requested_role TEXT NOT NULL,
+    justification  TEXT,
+    status         TEXT DEFAULT 'PENDING', -- PENDING, APPROVED, REJECTED
+    created_at     TEXT NOT NULL,
+    processed_at   TEXT,
+    processed_by   TEXT
+);
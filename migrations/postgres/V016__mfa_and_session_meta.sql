@@ -0,0 +1,7 @@
+-- V016 (Postgres) — equivalente a migrations/V016__mfa_and_session_meta.sql.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS mfa_secret  TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS mfa_enabled INTEGER DEFAULT 0;
+
+ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS ip_address TEXT;
+ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS user_agent TEXT;
@@ -0,0 +1,111 @@
+-- V017 (Postgres) — rollup materializado por (categoria, mês), mantido por gatilho.
+-- Equivalente a migrations/V017__registros_rollup.sql. Um único gatilho AFTER por
+-- linha trata os três eventos (o UPDATE só nas colunas agregadas, para não disparar
+-- no atualizado_em da V002). Também cobre o DO UPDATE do INSERT ... ON CONFLICT.
+-- bucket = primeiro dia do mês ('YYYY-MM-01'), calculado do texto ISO de `data`.
+
+CREATE TABLE IF NOT EXISTS registros_rollup (
+    categoria    TEXT    NOT NULL,
+    bucket       TEXT    NOT NULL,
+    count        INTEGER NOT NULL,
+    sum          BIGINT  NOT NULL,
+    min          INTEGER NOT NULL,
+    max          INTEGER NOT NULL,
+    data_min     TEXT    NOT NULL,
+    data_max     TEXT    NOT NULL,
+    last_updated TEXT    NOT NULL,
+    PRIMARY KEY (categoria, bucket)
+);
+
+-- Backfill a partir da tabela base
+DELETE FROM registros_rollup;
+
+INSERT INTO registros_rollup
+    (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+SELECT categoria,
+       substr(data, 1, 7) || '-01',
+       COUNT(*), SUM(valor), MIN(valor), MAX(valor), MIN(data), MAX(data),
+       registros_agora()
+  FROM registros
+ GROUP BY categoria, substr(data, 1, 7) || '-01';
+
+CREATE OR REPLACE FUNCTION trg_registros_rollup() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_bucket TEXT;
+    v_fim    TEXT;
+BEGIN
+    -- Remove a imagem antiga (DELETE / UPDATE); min/max recalculados no próprio bucket
+    -- (faixa de um mês de uma categoria em ix_registros_categoria_data)
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        v_bucket := substr(OLD.data, 1, 7) || '-01';
+        v_fim := to_char(v_bucket::date + interval '1 month', 'YYYY-MM-DD');
+
+        -- Trava o bucket antes de recalcular: em READ COMMITTED cada comando do gatilho
+        -- tem snapshot novo, então o recálculo abaixo já enxerga o que outra transação
+        -- no mesmo bucket commitou enquanto esperávamos (sem isso, dois DELETEs
+        -- concorrentes deixam data_min/min apontando para a linha excluída pela outra).
+        PERFORM 1
+           FROM registros_rollup
+          WHERE categoria = OLD.categoria
+            AND bucket = v_bucket
+            FOR UPDATE;
+
+        UPDATE registros_rollup AS r
+           SET count = r.count - 1,
+               sum = r.sum - OLD.valor,
+               min = COALESCE(b.min_valor, 0),
+               max = COALESCE(b.max_valor, 0),
+               data_min = COALESCE(b.min_data, ''),
+               data_max = COALESCE(b.max_data, ''),
+               last_updated = registros_agora()
+          FROM (SELECT MIN(valor) AS min_valor, MAX(valor) AS max_valor,
+                       MIN(data) AS min_data, MAX(data) AS max_data
+                  FROM registros
+                 WHERE categoria = OLD.categoria
+                   AND data >= v_bucket
+                   AND data < v_fim) AS b
+         WHERE r.categoria = OLD.categoria
+           AND r.bucket = v_bucket;
+
+        DELETE FROM registros_rollup
+         WHERE categoria = OLD.categoria
+           AND bucket = v_bucket
+           AND count <= 0;
+    END IF;
+
+    -- Soma a imagem nova (INSERT / UPDATE)
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO registros_rollup AS r
+            (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+        VALUES
+            (NEW.categoria, substr(NEW.data, 1, 7) || '-01', 1, NEW.valor, NEW.valor, NEW.valor,
+             NEW.data, NEW.data, registros_agora())
+        ON CONFLICT (categoria, bucket) DO UPDATE SET
+            count        = r.count + 1,
+            sum          = r.sum + EXCLUDED.sum,
+            min          = LEAST(r.min, EXCLUDED.min),
+            max          = GREATEST(r.max, EXCLUDED.max),
+            data_min     = LEAST(r.data_min, EXCLUDED.data_min),
+            data_max     = GREATEST(r.data_max, EXCLUDED.data_max),
+            last_updated = EXCLUDED.last_updated;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_registros_rollup_insert ON registros;
+CREATE TRIGGER trg_registros_rollup_insert
+AFTER INSERT ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_rollup();
+
+DROP TRIGGER IF EXISTS trg_registros_rollup_delete ON registros;
+CREATE TRIGGER trg_registros_rollup_delete
+AFTER DELETE ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_rollup();
+
+DROP TRIGGER IF EXISTS trg_registros_rollup_update ON registros;
+CREATE TRIGGER trg_registros_rollup_update
+AFTER UPDATE OF data, categoria, valor ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_rollup();
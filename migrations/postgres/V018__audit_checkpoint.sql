@@ -0,0 +1,6 @@
+-- V018 (Postgres) — checkpoint da verificação incremental. Equivalente a migrations/V018__audit_checkpoint.sql.
+
+ALTER TABLE audit_integrity ADD COLUMN IF NOT EXISTS checkpoint_id      BIGINT;
+ALTER TABLE audit_integrity ADD COLUMN IF NOT EXISTS checkpoint_hash    TEXT;
+ALTER TABLE audit_integrity ADD COLUMN IF NOT EXISTS checkpoint_at      TEXT;
+ALTER TABLE audit_integrity ADD COLUMN IF NOT EXISTS last_full_check_at TEXT;
@@ -0,0 +1,13 @@
+-- V019 (Postgres) — raízes de Merkle por bloco. Equivalente a migrations/V019__audit_merkle_blocks.sql.
+
+CREATE TABLE IF NOT EXISTS audit_merkle_blocks (
+    block_no    INTEGER PRIMARY KEY,
+    first_id    BIGINT  NOT NULL,
+    last_id     BIGINT  NOT NULL,
+    event_count INTEGER NOT NULL,
+    root        TEXT    NOT NULL,
+    created_at  TEXT    NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_audit_merkle_blocks_last_id
+    ON audit_merkle_blocks (last_id);
@@ -0,0 +1,3 @@
+-- V020 (Postgres) — versão da codificação do event_hash. Equivalente a migrations/V020__audit_hash_version.sql.
+
+ALTER TABLE auditoria ADD COLUMN IF NOT EXISTS hash_version INTEGER NOT NULL DEFAULT 1;
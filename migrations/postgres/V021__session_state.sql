@@ -0,0 +1,9 @@
+-- V021 (Postgres) — token de geração das revogações. Equivalente a migrations/V021__session_state.sql.
+
+CREATE TABLE IF NOT EXISTS session_state (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    generation BIGINT  NOT NULL DEFAULT 0
+);
+
+INSERT INTO session_state (id, generation) VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
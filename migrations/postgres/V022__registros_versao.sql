@@ -0,0 +1,41 @@
+-- V022 (Postgres) — versão de 'registros' para HTTP condicional (ETag / 304).
+-- Equivalente a migrations/V022__registros_versao.sql. O UPDATE da linha única
+-- serializa os escritores até o commit: versões são confirmadas em ordem.
+
+CREATE TABLE IF NOT EXISTS registros_versao (
+    id            INTEGER PRIMARY KEY CHECK (id = 1),
+    instancia     TEXT    NOT NULL,
+    versao        BIGINT  NOT NULL DEFAULT 0,
+    modificado_em TEXT    NOT NULL -- UTC, 'YYYY-MM-DD HH:MM:SS' (registros_agora())
+);
+
+INSERT INTO registros_versao (id, instancia, versao, modificado_em)
+VALUES (1, substr(md5(random()::text || clock_timestamp()::text), 1, 16), 0, registros_agora())
+ON CONFLICT (id) DO NOTHING;
+
+-- Só colunas expostas pela API no UPDATE: o atualizado_em (V002) não conta
+CREATE OR REPLACE FUNCTION trg_registros_versao() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = registros_agora()
+     WHERE id = 1;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_registros_versao_insert ON registros;
+CREATE TRIGGER trg_registros_versao_insert
+AFTER INSERT ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_versao();
+
+DROP TRIGGER IF EXISTS trg_registros_versao_update ON registros;
+CREATE TRIGGER trg_registros_versao_update
+AFTER UPDATE OF data, categoria, valor ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_versao();
+
+DROP TRIGGER IF EXISTS trg_registros_versao_delete ON registros;
+CREATE TRIGGER trg_registros_versao_delete
+AFTER DELETE ON registros
+FOR EACH ROW EXECUTE FUNCTION trg_registros_versao();
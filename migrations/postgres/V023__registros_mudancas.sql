@@ -0,0 +1,55 @@
+-- V023 (Postgres) — feed de mudanças de 'registros' (GET /registros/changes).
+-- Equivalente a migrations/V023__registros_mudancas.sql: a função dos gatilhos da
+-- V022 passa a, na mesma chamada, incrementar a versão e registrar a mudança
+-- (exclusão = lápide, excluido = 1).
+
+CREATE TABLE IF NOT EXISTS registros_mudancas (
+    registro_id BIGINT  PRIMARY KEY,
+    versao      BIGINT  NOT NULL,
+    excluido    INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_registros_mudancas_versao
+    ON registros_mudancas (versao);
+
+-- Backfill: versão própria por registro (atual + 1, + 2, ...), para o feed paginar
+-- por `versao > token`
+INSERT INTO registros_mudancas (registro_id, versao, excluido)
+SELECT id,
+       (SELECT versao FROM registros_versao WHERE id = 1) + ROW_NUMBER() OVER (ORDER BY id),
+       0
+  FROM registros
+ON CONFLICT (registro_id) DO NOTHING;
+
+UPDATE registros_versao
+   SET versao = versao + (SELECT COUNT(*) FROM registros),
+       modificado_em = registros_agora()
+ WHERE id = 1;
+
+CREATE OR REPLACE FUNCTION trg_registros_versao() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_versao BIGINT;
+BEGIN
+    UPDATE registros_versao
+       SET versao = versao + 1,
+           modificado_em = registros_agora()
+     WHERE id = 1
+    RETURNING versao INTO v_versao;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO registros_mudancas (registro_id, versao, excluido)
+        VALUES (OLD.id, v_versao, 1)
+        ON CONFLICT (registro_id) DO UPDATE SET
+            versao = EXCLUDED.versao,
+            excluido = 1;
+    ELSE
+        INSERT INTO registros_mudancas (registro_id, versao, excluido)
+        VALUES (NEW.id, v_versao, 0)
+        ON CONFLICT (registro_id) DO UPDATE SET
+            versao = EXCLUDED.versao,
+            excluido = 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
@@ -0,0 +1,11 @@
+-- V024 (Postgres) — âncoras publicadas da auditoria. Equivalente a migrations/V024__audit_anchors.sql.
+
+CREATE TABLE IF NOT EXISTS audit_anchors (
+    id            BIGINT  GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    created_at    TEXT    NOT NULL,
+    username      TEXT    NOT NULL,
+    last_hash     TEXT    NOT NULL,
+    merkle_root   TEXT    NOT NULL,
+    blocks        INTEGER NOT NULL,
+    last_event_id BIGINT
+);
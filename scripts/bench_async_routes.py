@@ -0,0 +1,178 @@
+"""
+Benchmark das rotas async sob threadpool saturado: enquanto N requisições síncronas
+lentas ocupam as 40 threads do AnyIO (ex.: esperas longas no SQLite, bcrypt), mede a
+latência de GET /registros e GET /me (async, pool assíncrono) contra a mesma consulta
+servida por uma rota síncrona (como antes), registrada só neste script.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_async_routes.py --slow 120 --slow-seconds 1 --probes 200
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+_BASE_DIA = date(2000, 1, 1).toordinal()
+
+
+def _setup(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _popular(db_path: str, n: int) -> None:
+    from backend.auth.passwords import hash_password
+
+    c = sqlite3.connect(db_path)
+    c.execute(
+        "INSERT INTO users (username, password_hash, role, created_at, must_change_password) "
+        "VALUES ('bench', ?, 'admin', '2025-01-01', 0)",
+        (hash_password("Bench!123"),),
+    )
+    c.executemany(
+        "INSERT INTO registros (data, categoria, valor) VALUES (?, ?, ?)",
+        # (data, categoria) é único: 20 categorias por dia
+        (
+            (date.fromordinal(_BASE_DIA + i // 20).isoformat(), f"Cat{i % 20}", i)
+            for i in range(n)
+        ),
+    )
+    c.commit()
+    c.close()
+
+
+def _rotas_de_comparacao(app, slow_seconds: float) -> None:
+    """Rota lenta que prende uma thread e a mesma listagem servida de forma síncrona."""
+    from backend.crud import listar_registros_pagina
+
+    @app.get("/_bench/slow")
+    def slow():
+        time.sleep(slow_seconds)
+        return {"ok": True}
+
+    @app.get("/_bench/registros_sync")
+    def registros_sync(limit: int = 100):
+        return listar_registros_pagina(limit=limit)[0]
+
+
+def _p(valores, q: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))] * 1000
+
+
+async def _cenario(app, token: str, path: str, slow: int, probes: int, concurrency: int):
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as c:
+        await c.get(path, headers=headers)  # aquecimento (pool, caches)
+
+        lentas = [asyncio.create_task(c.get("/_bench/slow")) for _ in range(slow)]
+        await asyncio.sleep(0.2)  # threadpool já ocupado
+
+        latencias = []
+        fila = asyncio.Queue()
+        for i in range(probes):
+            fila.put_nowait(i)
+
+        async def sonda():
+            while not fila.empty():
+                fila.get_nowait()
+                t0 = time.perf_counter()
+                r = await c.get(path, headers=headers)
+                assert r.status_code == 200, r.text
+                latencias.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(sonda() for _ in range(concurrency)))
+        duracao = time.perf_counter() - t0
+        await asyncio.gather(*lentas)
+
+    return probes / duracao, _p(latencias, 0.5), _p(latencias, 0.95)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark das rotas async")
+    parser.add_argument("--slow", type=int, default=120, help="Requisições síncronas lentas")
+    parser.add_argument("--slow-seconds", type=float, default=1.0)
+    parser.add_argument("--probes", type=int, default=200, help="Requisições medidas")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_async_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup(db_path)
+    _popular(db_path, args.rows)
+
+    import logging
+
+    logging.disable(logging.WARNING)
+
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    _rotas_de_comparacao(app, args.slow_seconds)
+    with TestClient(app) as tc:
+        r = tc.post("/login", params={"username": "bench", "password": "Bench!123"})
+        token = r.json()["access_token"]
+
+    cenarios = {
+        "GET /registros (sync)": "/_bench/registros_sync?limit=100",
+        "GET /registros (async)": "/registros?limit=100",
+        "GET /me (async)": "/me",
+    }
+    print(
+        f"{args.slow} requisições síncronas de {args.slow_seconds}s ocupando o threadpool; "
+        f"{args.probes} sondas, concorrência {args.concurrency}"
+    )
+    print(f"{'rota':<24} {'req/s':>8} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for nome, path in cenarios.items():
+        rps, p50, p95 = asyncio.run(
+            _cenario(app, token, path, args.slow, args.probes, args.concurrency)
+        )
+        print(f"{nome:<24} {rps:>8.0f} {p50:>10.1f} {p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Stress da cadeia de auditoria: N processos x T threads anexando eventos em paralelo
+num banco temporário, e contagem de bifurcações (eventos que compartilham o mesmo
+prev_hash) ao final.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_audit_chain.py --workers 8 --threads 4 --events 200
+    python scripts/bench_audit_chain.py --naive   # leitura+insert sem lock (legado)
+    python scripts/bench_audit_chain.py --group   # AUDIT_WRITE_MODE=group (commit por lote)
+    python scripts/bench_audit_chain.py --rota [--group]  # caminho de POST /registros:
+                                                          # upsert + evento por transação
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+
+def _setup_env(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _append_naive(conn, evento):
+    """Sequência antiga: lê o último hash e insere, sem lock entre as duas etapas."""
+    from backend.audit.hash import compute_event_hash
+    from backend.audit.service import obter_ultimo_hash
+    from backend.db import execute
+
+    prev_hash = obter_ultimo_hash(conn)
+    event_hash = compute_event_hash(**evento, prev_hash=prev_hash)
+    execute(
+        conn,
+        """
+        INSERT INTO auditoria (
+            timestamp, username, role, action, resource, resource_id,
+            payload_before, payload_after, endpoint, method, prev_hash, event_hash
+        ) VALUES (
+            :timestamp, :username, :role, :action, :resource, :resource_id,
+            :payload_before, :payload_after, :endpoint, :method, :prev_hash, :event_hash
+        )
+        """,
+        {**evento, "prev_hash": prev_hash, "event_hash": event_hash},
+    )
+    conn.commit()
+
+
+def _worker(
+    db_path: str,
+    worker_id: int,
+    threads: int,
+    events: int,
+    naive: bool,
+    group: bool,
+    rota: bool = False,
+):
+    import threading
+    from datetime import datetime, timezone
+
+    if group:
+        os.environ["AUDIT_WRITE_MODE"] = "group"
+    _setup_env(db_path)
+    from backend.audit.service import executar_auditado, registrar_evento
+    from backend.crud import upsert_registro_com_auditoria
+    from backend.db import connect
+    from shared.models import RegistroIn
+
+    erros = []
+
+    def run(thread_id: int):
+        for i in range(events):
+            try:
+                if naive:
+                    conn = connect()
+                    try:
+                        _append_naive(
+                            conn,
+                            {
+                                "timestamp": datetime.now(timezone.utc).isoformat(),
+                                "username": f"w{worker_id}",
+                                "role": "bench",
+                                "action": "BENCH",
+                                "resource": "bench",
+                                "resource_id": i,
+                                "payload_before": None,
+                                "payload_after": f'{{"t": {thread_id}}}',
+                                "endpoint": "/bench",
+                                "method": "POST",
+                            },
+                        )
+                    finally:
+                        conn.close()
+                elif rota:
+                    registro = RegistroIn(
+                        data=f"2030-01-{i % 28 + 1:02d}",
+                        categoria=f"w{worker_id}t{thread_id}e{i // 28}",
+                        valor=i,
+                    )
+
+                    def trabalho(conn, registro=registro, i=i):
+                        antes, depois = upsert_registro_com_auditoria(registro, conn=conn)
+                        registrar_evento(
+                            username=f"w{worker_id}",
+                            role="bench",
+                            action="UPSERT",
+                            resource="registros",
+                            resource_id=depois["id"],
+                            payload_before=antes,
+                            payload_after=depois,
+                            endpoint="/registros",
+                            method="POST",
+                            conn=conn,
+                        )
+
+                    executar_auditado(trabalho)
+                else:
+                    registrar_evento(
+                        username=f"w{worker_id}",
+                        role="bench",
+                        action="BENCH",
+                        resource="bench",
+                        resource_id=i,
+                        payload_before=None,
+                        payload_after={"t": thread_id},
+                        endpoint="/bench",
+                        method="POST",
+                    )
+            except Exception as exc:  # contabiliza e segue (ex.: database is locked)
+                erros.append(repr(exc))
+
+    ts = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+
+    from backend.audit.service import stop_group_writer
+
+    stop_group_writer()
+    return len(erros), erros[:3]
+
+
+def _analisar(db_path: str):
+    import sqlite3
+
+    from backend.audit.verify import verificar_integridade_auditoria
+    from backend.db import connect
+
+    c = sqlite3.connect(db_path)
+    total = c.execute("SELECT COUNT(*) FROM auditoria WHERE event_hash IS NOT NULL").fetchone()[0]
+    forks = c.execute(
+        """
+        SELECT COALESCE(SUM(n - 1), 0) FROM (
+            SELECT COUNT(*) AS n FROM auditoria
+             WHERE event_hash IS NOT NULL
+             GROUP BY COALESCE(prev_hash, '')
+        ) WHERE n > 1
+        """
+    ).fetchone()[0]
+    c.close()
+
+    conn = connect()
+    try:
+        resultado = verificar_integridade_auditoria(conn)
+    finally:
+        conn.close()
+    return total, forks, resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stress de concorrência da cadeia de auditoria")
+    parser.add_argument("--workers", type=int, default=8, help="Processos paralelos")
+    parser.add_argument("--threads", type=int, default=4, help="Threads por processo")
+    parser.add_argument("--events", type=int, default=200, help="Eventos por thread")
+    parser.add_argument("--naive", action="store_true", help="Usa a sequência antiga, sem lock")
+    parser.add_argument("--group", action="store_true", help="Writer em grupo (AUDIT_WRITE_MODE=group)")
+    parser.add_argument(
+        "--rota", action="store_true", help="Upsert em registros + evento por transação (rotas)"
+    )
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_audit_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup_env(db_path)
+
+    ctx = mp.get_context("spawn")
+    t0 = time.perf_counter()
+    with ctx.Pool(args.workers) as pool:
+        resultados = pool.starmap(
+            _worker,
+            [
+                (db_path, w, args.threads, args.events, args.naive, args.group, args.rota)
+                for w in range(args.workers)
+            ],
+        )
+    elapsed = time.perf_counter() - t0
+
+    falhas = sum(r[0] for r in resultados)
+    total, forks, verificacao = _analisar(db_path)
+    esperado = args.workers * args.threads * args.events
+
+    modo = "naive (sem lock)" if args.naive else "group commit" if args.group else "append serializado"
+    if args.rota:
+        modo += " (rota: upsert + evento)"
+    print(f"modo:       {modo}")
+    print(f"escritores: {args.workers} processos x {args.threads} threads")
+    print(f"eventos:    {total}/{esperado} gravados, {falhas} falhas")
+    print(f"tempo:      {elapsed:.2f}s ({total / elapsed:.0f} eventos/s)")
+    print(f"forks:      {forks}")
+    print(f"verify:     {verificacao}")
+    for r in resultados:
+        for e in r[1]:
+            print(f"  erro: {e}")
+            break
+
+    sys.exit(0 if forks == 0 and verificacao.get("valid") else 1)
+
+
+if __name__ == "__main__":
+    main()
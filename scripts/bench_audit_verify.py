@@ -0,0 +1,156 @@
+"""
+Benchmark da verificação completa da cadeia de auditoria: sequencial x segmentos
+em paralelo (ProcessPoolExecutor), sobre uma cadeia sintética num banco temporário.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_audit_verify.py --events 1000000 --workers 1 2 4 8
+    python scripts/bench_audit_verify.py --events 200000 --tamper 150000
+
+Com --tamper, o evento indicado é adulterado e o script confere que todos os modos
+apontam o mesmo broken_at_id/reason.
+"""
+
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+
+def _setup_env(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _gerar_cadeia(db_path: str, n: int, hash_version: int) -> None:
+    from backend.audit.hash import compute_event_hash
+
+    c = sqlite3.connect(db_path)
+    prev_hash = None
+    lote = []
+    for i in range(n):
+        evento = {
+            "timestamp": f"2025-01-01T00:00:{i % 60:02d}+00:00",
+            "username": f"user{i % 50}",
+            "role": "editor",
+            "action": "UPDATE",
+            "resource": "registros",
+            "resource_id": i,
+            "payload_before": f'{{"valor": {i}}}',
+            "payload_after": f'{{"valor": {i + 1}}}',
+            "endpoint": f"/registros/{i}",
+            "method": "PUT",
+        }
+        event_hash = compute_event_hash(**evento, prev_hash=prev_hash, hash_version=hash_version)
+        lote.append((*evento.values(), prev_hash, event_hash, hash_version))
+        prev_hash = event_hash
+        if len(lote) == 50_000:
+            _inserir(c, lote)
+            lote = []
+    if lote:
+        _inserir(c, lote)
+    c.close()
+
+
+def _inserir(c, lote) -> None:
+    c.executemany(
+        """
+        INSERT INTO auditoria (
+            timestamp, username, role, action, resource, resource_id,
+            payload_before, payload_after, endpoint, method, prev_hash, event_hash,
+            hash_version
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        lote,
+    )
+    c.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da verificação paralela")
+    parser.add_argument("--events", type=int, default=1_000_000, help="Tamanho da cadeia")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts a medir"
+    )
+    parser.add_argument("--tamper", type=int, default=None, help="Adultera o evento com este id")
+    parser.add_argument(
+        "--hash-version", type=int, default=2, help="Codificação do event_hash (1 ou 2)"
+    )
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_verify_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup_env(db_path)
+
+    t0 = time.perf_counter()
+    _gerar_cadeia(db_path, args.events, args.hash_version)
+    print(f"cadeia: {args.events} eventos gerados em {time.perf_counter() - t0:.1f}s ({db_path})")
+
+    if args.tamper is not None:
+        c = sqlite3.connect(db_path)
+        c.execute("UPDATE auditoria SET payload_after = 'x' WHERE id = ?", (args.tamper,))
+        c.commit()
+        c.close()
+
+    from backend.audit.verify import verificar_integridade_auditoria
+    from backend.db import connect
+
+    print(f"{'workers':>8} {'tempo (s)':>10} {'ev/s':>10} {'speedup':>8}  resultado")
+    base = None
+    referencia = None
+    for workers in args.workers:
+        conn = connect()
+        try:
+            t0 = time.perf_counter()
+            r = verificar_integridade_auditoria(conn, full=True, workers=workers)
+            elapsed = time.perf_counter() - t0
+        finally:
+            conn.close()
+
+        base = base or elapsed
+        resumo = (r.get("valid"), r.get("broken_at_id"), r.get("reason"))
+        referencia = referencia or resumo
+        marca = "" if resumo == referencia else "  <-- DIVERGENTE"
+        print(
+            f"{workers:>8} {elapsed:>10.2f} {args.events / elapsed:>10.0f} "
+            f"{base / elapsed:>7.2f}x  {resumo}{marca}"
+        )
+
+    print(f"CPUs disponíveis: {os.cpu_count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark da sincronização incremental: após `--changes` alterações (metade
+upserts, metade exclusões), recarregar todas as páginas de GET /registros (como o
+loader do Streamlit fazia) contra buscar só o delta em GET /registros/changes.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_delta_sync.py --rows 50000 --page-size 5000 --changes 20 --rounds 20
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+_BASE_DIA = date(2000, 1, 1).toordinal()
+
+
+def _setup(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _popular(db_path: str, n: int) -> None:
+    c = sqlite3.connect(db_path)
+    c.executemany(
+        "INSERT INTO registros (data, categoria, valor) VALUES (?, ?, ?)",
+        # (data, categoria) é único: 20 categorias por dia
+        (
+            (date.fromordinal(_BASE_DIA + i // 20).isoformat(), f"Cat{i % 20}", i)
+            for i in range(n)
+        ),
+    )
+    c.commit()
+    c.close()
+
+
+def _recarregar(client, page_size: int) -> int:
+    params = {"limit": page_size}
+    total_bytes = 0
+    while True:
+        r = client.get("/registros", params=params)
+        total_bytes += len(r.content)
+        next_cursor = r.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return total_bytes
+        params["cursor"] = next_cursor
+
+
+def _delta(client, page_size: int, token: str | None):
+    total_bytes = 0
+    while True:
+        r = client.get("/registros/changes", params={"since": token, "limit": page_size})
+        total_bytes += len(r.content)
+        corpo = r.json()
+        token = corpo["token"]
+        if not corpo["has_more"]:
+            return total_bytes, token
+
+
+def _alterar(db_path: str, k: int, rng: random.Random) -> None:
+    c = sqlite3.connect(db_path)
+    ids = [r[0] for r in c.execute("SELECT id FROM registros")]
+    for id_ in rng.sample(ids, k // 2):
+        c.execute("UPDATE registros SET valor = valor + 1 WHERE id = ?", (id_,))
+    for id_ in rng.sample(ids, k - k // 2):
+        c.execute("DELETE FROM registros WHERE id = ?", (id_,))
+    c.commit()
+    c.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da sincronização incremental")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--changes", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_delta_sync_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup(db_path)
+    _popular(db_path, args.rows)
+
+    import logging
+
+    logging.disable(logging.WARNING)
+
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    rng = random.Random(42)
+    tempos = {"recarga completa": 0.0, "delta (/changes)": 0.0}
+    bytes_ = dict.fromkeys(tempos, 0)
+
+    with TestClient(app) as client:
+        _, token = _delta(client, args.page_size, None)  # carga inicial
+        for _ in range(args.rounds):
+            _alterar(db_path, args.changes, rng)
+
+            t0 = time.perf_counter()
+            bytes_["recarga completa"] += _recarregar(client, args.page_size)
+            tempos["recarga completa"] += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            b, token = _delta(client, args.page_size, token)
+            tempos["delta (/changes)"] += time.perf_counter() - t0
+            bytes_["delta (/changes)"] += b
+
+    print(
+        f"{args.rows} registros, páginas de {args.page_size}; "
+        f"{args.changes} mudanças por rodada, {args.rounds} rodadas"
+    )
+    print(f"{'cenário':<20} {'ms/sinc.':>9} {'bytes/sinc.':>12}")
+    for nome in tempos:
+        ms = tempos[nome] * 1000 / args.rounds
+        print(f"{nome:<20} {ms:>9.1f} {bytes_[nome] // args.rounds:>12}")
+
+
+if __name__ == "__main__":
+    main()
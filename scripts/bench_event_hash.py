@@ -0,0 +1,92 @@
+"""
+Benchmark da codificação canônica do event_hash: v1 (JSON sort_keys) x v2
+(campos em ordem fixa com prefixo de tamanho).
+
+- Escrita: o que registrar_evento faz por evento (normalizar payloads + hash).
+- Verificação: recalcular o hash de uma linha lida do banco.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_event_hash.py --events 200000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from backend.audit.hash import compute_event_hash, compute_row_hash  # noqa: E402
+
+
+def _eventos(n: int):
+    for i in range(n):
+        yield {
+            "timestamp": f"2025-01-01T00:00:{i % 60:02d}.123456+00:00",
+            "username": f"user{i % 50}",
+            "role": "editor",
+            "action": "UPDATE",
+            "resource": "registros",
+            "resource_id": i,
+            "payload_before": {"id": i, "data": "2025-01-01", "categoria": "Vendas", "valor": i},
+            "payload_after": {"id": i, "data": "2025-01-01", "categoria": "Vendas", "valor": i + 1},
+            "endpoint": f"/registros/{i}",
+            "method": "PUT",
+        }
+
+
+def _normalizar(evento):
+    # Mesma normalização de registrar_evento (payloads viram JSON uma única vez)
+    return {
+        **evento,
+        "payload_before": json.dumps(
+            evento["payload_before"], sort_keys=True, ensure_ascii=False, default=str
+        ),
+        "payload_after": json.dumps(
+            evento["payload_after"], sort_keys=True, ensure_ascii=False, default=str
+        ),
+    }
+
+
+def _bench_escrita(eventos, hash_version: int) -> float:
+    t0 = time.perf_counter()
+    prev_hash = None
+    for evento in eventos:
+        prev_hash = compute_event_hash(
+            **_normalizar(evento), prev_hash=prev_hash, hash_version=hash_version
+        )
+    return time.perf_counter() - t0
+
+
+def _bench_verificacao(linhas, hash_version: int) -> float:
+    t0 = time.perf_counter()
+    prev_hash = None
+    for linha in linhas:
+        compute_row_hash(linha, prev_hash, hash_version)
+        prev_hash = linha["event_hash"]
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark v1 x v2 do event_hash")
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    eventos = list(_eventos(args.events))
+    linhas = [{**_normalizar(e), "event_hash": "0" * 64} for e in eventos]
+
+    print(f"{args.events} eventos")
+    print(f"{'caminho':<12} {'v1 (s)':>8} {'v2 (s)':>8} {'speedup':>8}")
+    for nome, fn, dados in (
+        ("escrita", _bench_escrita, eventos),
+        ("verificação", _bench_verificacao, linhas),
+    ):
+        t1 = fn(dados, 1)
+        t2 = fn(dados, 2)
+        print(f"{nome:<12} {t1:>8.2f} {t2:>8.2f} {t1 / t2:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark do GET condicional: recarregar todas as páginas de GET /registros (como o
+loader do Streamlit) sem cache (200 + corpo) e revalidando com If-None-Match (304).
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_http_cache.py --rows 50000 --page-size 5000 --rounds 20
+"""
+
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+_BASE_DIA = date(2000, 1, 1).toordinal()
+
+
+def _setup(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _popular(db_path: str, n: int) -> None:
+    c = sqlite3.connect(db_path)
+    c.executemany(
+        "INSERT INTO registros (data, categoria, valor) VALUES (?, ?, ?)",
+        # (data, categoria) é único: 20 categorias por dia
+        (
+            (date.fromordinal(_BASE_DIA + i // 20).isoformat(), f"Cat{i % 20}", i)
+            for i in range(n)
+        ),
+    )
+    c.commit()
+    c.close()
+
+
+def _recarregar(client, page_size: int, etags: dict | None):
+    """Percorre todas as páginas; com `etags`, envia If-None-Match por página."""
+    params = {"limit": page_size}
+    total_bytes = 0
+    status = set()
+    pagina = 0
+    novas = {}
+    while True:
+        headers = {}
+        if etags is not None and pagina in etags:
+            headers["If-None-Match"] = etags[pagina][0]
+        r = client.get("/registros", params=params, headers=headers)
+        status.add(r.status_code)
+        total_bytes += len(r.content)
+        if r.status_code == 304:
+            next_cursor = etags[pagina][1]
+        else:
+            next_cursor = r.headers.get("X-Next-Cursor")
+            novas[pagina] = (r.headers["ETag"], next_cursor)
+        if not next_cursor:
+            return total_bytes, status, novas
+        params["cursor"] = next_cursor
+        pagina += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do GET condicional")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_http_cache_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup(db_path)
+    _popular(db_path, args.rows)
+
+    import logging
+
+    logging.disable(logging.WARNING)
+
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as client:
+        _, _, etags = _recarregar(client, args.page_size, None)  # aquecimento
+
+        print(f"{args.rows} registros, páginas de {args.page_size}; {args.rounds} recargas")
+        print(f"{'cenário':<26} {'ms/recarga':>11} {'bytes/recarga':>14} {'status':>8}")
+        for nome, condicional in (("sem cache (200)", False), ("If-None-Match (304)", True)):
+            t0 = time.perf_counter()
+            for _ in range(args.rounds):
+                total_bytes, status, _ = _recarregar(
+                    client, args.page_size, etags if condicional else None
+                )
+            ms = (time.perf_counter() - t0) * 1000 / args.rounds
+            codigos = ",".join(str(s) for s in sorted(status))
+            print(f"{nome:<26} {ms:>11.1f} {total_bytes:>14} {codigos:>8}")
+
+
+if __name__ == "__main__":
+    main()
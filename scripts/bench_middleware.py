@@ -0,0 +1,208 @@
+"""
+Benchmark de requisições/s em GET /registros, POST /registros e GET /me com os middlewares
+atuais (ASGI puro) e com as versões antigas baseadas em BaseHTTPMiddleware
+(reproduzidas abaixo), sobre a mesma aplicação e um banco temporário.
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_middleware.py --requests 2000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+
+def _setup(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _legacy_middlewares():
+    """Versões anteriores (BaseHTTPMiddleware), para comparação."""
+    from fastapi import Request, status
+    from fastapi.responses import JSONResponse
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from backend.audit.guard import is_system_locked
+
+    class LegacyIntegrityGuardMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            if request.url.path in ["/login", "/refresh", "/logout"]:
+                return await call_next(request)
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                if is_system_locked():
+                    return JSONResponse(
+                        status_code=status.HTTP_423_LOCKED,
+                        content={"detail": "SISTEMA BLOQUEADO"},
+                    )
+            return await call_next(request)
+
+    class LegacyHeaderInjectionMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            response = await call_next(request)
+            user = getattr(request.state, "user", None)
+            if user:
+                response.headers["X-User-Context"] = json.dumps(
+                    {"username": user.username, "role": user.role, "session_id": user.session_id}
+                )
+            return response
+
+    return LegacyIntegrityGuardMiddleware, LegacyHeaderInjectionMiddleware
+
+
+def _trocar_middlewares(app, guard_cls, header_cls) -> None:
+    from starlette.middleware import Middleware
+
+    from backend.audit.integrity_middleware import IntegrityGuardMiddleware
+    from backend.audit.middleware import HeaderInjectionMiddleware
+
+    trocas = {IntegrityGuardMiddleware: guard_cls, HeaderInjectionMiddleware: header_cls}
+    app.user_middleware = [
+        Middleware(trocas.get(m.cls, m.cls), *m.args, **m.kwargs) for m in app.user_middleware
+    ]
+    app.middleware_stack = None  # reconstruída na próxima requisição
+
+
+def _limpar_registros(db_path: str) -> None:
+    """Remove os registros do POST para que cada cenário comece com a mesma tabela."""
+    c = sqlite3.connect(db_path)
+    c.execute("DELETE FROM registros WHERE categoria = 'Bench'")
+    c.commit()
+    c.close()
+
+
+async def _medir(client, method: str, path: str, total: int, concurrency: int, **kwargs) -> float:
+    fila = asyncio.Queue()
+    for i in range(total):
+        fila.put_nowait(i)
+
+    async def worker():
+        while True:
+            try:
+                i = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if method == "POST":
+                body = {"data": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", "categoria": "Bench", "valor": i}
+                r = await client.post(path, json=body, **kwargs)
+            else:
+                r = await client.get(path, **kwargs)
+            assert r.status_code < 300, r.text
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - t0)
+
+
+async def _rodar(app, token: str, total: int, concurrency: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        await _medir(client, "GET", "/registros", 50, concurrency, params={"limit": 100})
+        get_rps = await _medir(
+            client, "GET", "/registros", total, concurrency, params={"limit": 100}
+        )
+        post_rps = await _medir(client, "POST", "/registros", total, concurrency, headers=headers)
+        # Endpoint leve e autenticado: isola o custo dos middlewares (inclui o X-User-Context)
+        me_rps = await _medir(client, "GET", "/me", total, concurrency, headers=headers)
+    return get_rps, post_rps, me_rps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos middlewares (ASGI puro x BaseHTTP)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3, help="Rodadas alternadas (vale a melhor)")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_mw_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup(db_path)
+
+    from backend.auth.passwords import hash_password
+
+    c = sqlite3.connect(db_path)
+    c.execute(
+        "INSERT INTO users (username, password_hash, role, created_at, must_change_password) "
+        "VALUES ('bench', ?, 'admin', '2025-01-01', 0)",
+        (hash_password("Bench!123"),),
+    )
+    c.commit()
+    c.close()
+
+    import logging
+
+    logging.disable(logging.INFO)
+
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as tc:
+        r = tc.post("/login", params={"username": "bench", "password": "Bench!123"})
+        token = r.json()["access_token"]
+
+    from backend.audit.integrity_middleware import IntegrityGuardMiddleware
+    from backend.audit.middleware import HeaderInjectionMiddleware
+
+    # Rodadas alternadas para diluir aquecimento/ruído; vale a melhor de cada cenário
+    variantes = {
+        "BaseHTTPMiddleware": _legacy_middlewares(),
+        "ASGI puro": (IntegrityGuardMiddleware, HeaderInjectionMiddleware),
+    }
+    resultados = {nome: (0.0, 0.0, 0.0) for nome in variantes}
+    for r in range(args.rounds):
+        ordem = list(variantes.items())
+        for nome, classes in ordem if r % 2 == 0 else reversed(ordem):
+            _trocar_middlewares(app, *classes)
+            rodada = asyncio.run(_rodar(app, token, args.requests, args.concurrency))
+            resultados[nome] = tuple(map(max, resultados[nome], rodada))
+            _limpar_registros(db_path)
+
+    print(f"{args.requests} requisições por cenário, concorrência {args.concurrency}")
+    print(f"{'middlewares':<20} {'GET req/s':>10} {'POST req/s':>11} {'GET /me req/s':>14}")
+    for nome, (get_rps, post_rps, me_rps) in resultados.items():
+        print(f"{nome:<20} {get_rps:>10.0f} {post_rps:>11.0f} {me_rps:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
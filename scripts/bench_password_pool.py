@@ -0,0 +1,158 @@
+"""
+Benchmark de uma "onda de logins": N logins simultâneos enquanto um cliente mede a
+latência de uma rota barata (GET /registros/categorias). Compara o bcrypt no próprio
+processo (PASSWORD_POOL_WORKERS=0, comportamento anterior) com o pool de processos
+com admissão limitada (logins acima de PASSWORD_POOL_MAX_PENDING recebem 503).
+
+Uso (a partir da raiz do projeto):
+    python scripts/bench_password_pool.py --logins 120 --pool-workers 2 --max-pending 16
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Variáveis obrigatórias do Settings que não importam para o benchmark
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "bench",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+
+def _setup(db_path: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_DSN"] = db_path
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"  # hash do usuário de teste no próprio processo
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def _percentil(valores, q: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))] * 1000
+
+
+async def _onda(app, logins: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Linha de base da rota barata, sem carga
+        base = []
+        for _ in range(50):
+            t0 = time.perf_counter()
+            await client.get("/registros/categorias")
+            base.append(time.perf_counter() - t0)
+
+        fim = asyncio.Event()
+        baratas = []
+
+        async def rota_barata():
+            while not fim.is_set():
+                t0 = time.perf_counter()
+                await client.get("/registros/categorias")
+                baratas.append(time.perf_counter() - t0)
+
+        async def login():
+            r = await client.post("/login", params={"username": "bench", "password": "Bench!123"})
+            return r.status_code
+
+        sonda = asyncio.create_task(rota_barata())
+        t0 = time.perf_counter()
+        status = await asyncio.gather(*(login() for _ in range(logins)))
+        duracao = time.perf_counter() - t0
+        fim.set()
+        await sonda
+
+    return base, baratas, Counter(status), duracao
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do pool de bcrypt")
+    parser.add_argument("--logins", type=int, default=120, help="Logins simultâneos na onda")
+    parser.add_argument("--pool-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=16)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_pwd_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "migrate.py"),
+            "--db",
+            db_path,
+            "--migrations",
+            str(ROOT / "migrations"),
+            "--init-if-missing",
+        ],
+        check=True,
+        cwd=tmpdir,
+        stdout=subprocess.DEVNULL,
+    )
+    _setup(db_path)
+
+    from backend.auth.passwords import hash_password
+
+    c = sqlite3.connect(db_path)
+    c.execute(
+        "INSERT INTO users (username, password_hash, role, created_at, must_change_password) "
+        "VALUES ('bench', ?, 'admin', '2025-01-01', 0)",
+        (hash_password("Bench!123"),),
+    )
+    c.commit()
+    c.close()
+
+    import logging
+
+    logging.disable(logging.INFO)
+
+    from backend.auth.passwords import start_password_pool, stop_password_pool
+    from backend.core.config import settings
+    from backend.main import app
+
+    app.state.limiter.enabled = False  # o 5/minute por IP barraria a onda inteira
+
+    cenarios = {
+        "bcrypt no processo": (0, args.max_pending),
+        f"pool {args.pool_workers}w/{args.max_pending}": (args.pool_workers, args.max_pending),
+    }
+    print(f"onda de {args.logins} logins simultâneos; CPUs: {os.cpu_count()}")
+    print(
+        f"{'cenário':<22} {'onda (s)':>8} {'200':>5} {'503':>5} "
+        f"{'barata p50 (ms)':>16} {'p95':>8} {'max':>8} {'sem carga p50':>14}"
+    )
+    for nome, (workers, max_pending) in cenarios.items():
+        settings.PASSWORD_POOL_WORKERS = workers
+        settings.PASSWORD_POOL_MAX_PENDING = max_pending
+        stop_password_pool()
+        start_password_pool()
+        time.sleep(2)  # processos do pool no ar antes da onda
+
+        base, baratas, status, duracao = asyncio.run(_onda(app, args.logins))
+        print(
+            f"{nome:<22} {duracao:>8.1f} {status.get(200, 0):>5} {status.get(503, 0):>5} "
+            f"{_percentil(baratas, 0.5):>16.1f} {_percentil(baratas, 0.95):>8.1f} "
+            f"{_percentil(baratas, 1.0):>8.1f} {_percentil(base, 0.5):>14.1f}"
+        )
+
+    stop_password_pool()
+
+
+if __name__ == "__main__":
+    main()
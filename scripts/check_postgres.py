@@ -0,0 +1,259 @@
+"""
+Verificação do backend Postgres: aplica migrations/postgres/V*.sql em ordem num banco
+vazio e roda o fluxo da API (TestClient) contra ele, incluindo escritas concorrentes.
+Sai com código 1 se alguma etapa falhar.
+
+O banco precisa ser UTF8 (com SQL_ASCII o psycopg devolve TEXT como bytes).
+
+Uso (a partir da raiz do projeto):
+    python scripts/check_postgres.py --dsn "host=localhost user=postgres dbname=app"
+    python scripts/check_postgres.py --dsn ... --reset   # recria o schema public antes
+    docker compose -f docker-compose.postgres-check.yml run --rm check   # PostgreSQL 16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS = ROOT / "migrations" / "postgres"
+
+# Variáveis obrigatórias do Settings que não importam para a verificação
+_ENV_DEFAULTS = {
+    "JWT_SECRET": "check",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "check",
+    "SMTP_PASSWORD": "check",
+    "EMAIL_FROM": "check@localhost",
+    "FRONTEND_URL": "http://localhost:8501",
+}
+
+_SENHA = "Adm1n!x9"
+
+
+def _setup_env(dsn: str) -> None:
+    for k, v in _ENV_DEFAULTS.items():
+        os.environ.setdefault(k, v)
+    os.environ["DB_BACKEND"] = "postgres"
+    os.environ["DB_DSN"] = dsn
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"
+    # Blocos pequenos: o fluxo sela e ancora blocos de verdade e pede provas deles
+    os.environ["AUDIT_MERKLE_BLOCK_SIZE"] = "8"
+    sys.path.insert(0, str(ROOT / "src"))
+
+
+def aplicar_migracoes(dsn: str, reset: bool) -> None:
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        encoding = conn.execute("SHOW server_encoding").fetchone()[0]
+        if encoding != "UTF8":
+            sys.exit(f"Banco com encoding {encoding}: crie com ENCODING 'UTF8' TEMPLATE template0")
+
+        if reset:
+            conn.execute("DROP SCHEMA public CASCADE")
+            conn.execute("CREATE SCHEMA public")
+        else:
+            tabelas = conn.execute(
+                "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'public'"
+            ).fetchone()[0]
+            if tabelas:
+                sys.exit("Banco não está vazio: use um banco novo ou --reset")
+
+        for arquivo in sorted(MIGRATIONS.glob("V*.sql")):
+            # Cada arquivo numa transação: erro no meio não deixa migração pela metade
+            with conn.transaction():
+                conn.execute(arquivo.read_text(encoding="utf-8"))
+            print(f"  aplicada {arquivo.name}")
+
+
+def _semear_usuarios() -> None:
+    from backend.auth.passwords import hash_password
+    from backend.db import connect, execute
+
+    conn = connect()
+    try:
+        for username, role in (("admin", "admin"), ("editor", "editor")):
+            execute(
+                conn,
+                """
+                INSERT INTO users (
+                    username, password_hash, role, created_at, must_change_password,
+                    email, password_changed_at, password_expires_at
+                )
+                VALUES (:u, :p, :r, '2025-01-01T00:00:00+00:00', 0, :e,
+                        '2026-01-01T00:00:00+00:00', '2999-01-01T00:00:00+00:00')
+                """,
+                {
+                    "u": username,
+                    "p": hash_password(_SENHA),
+                    "r": role,
+                    "e": f"{username}@check.local",
+                },
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def rodar_fluxo(escritas: int) -> list:
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    _semear_usuarios()
+    falhas = []
+
+    def chk(nome, resp, ok=(200,)):
+        marca = "ok " if resp.status_code in ok else "FALHOU"
+        if resp.status_code not in ok:
+            falhas.append(nome)
+        print(f"  {marca} {nome:<26} {resp.status_code} {resp.text[:90]}")
+        return resp
+
+    with TestClient(app) as cl:
+        lg = chk(
+            "login", cl.post("/login", params={"username": "admin", "password": _SENHA})
+        ).json()
+        lg = chk(
+            "refresh",
+            cl.post("/refresh", headers={"Authorization": f"Bearer {lg['refresh_token']}"}),
+        ).json()
+        h = {"Authorization": f"Bearer {lg['access_token']}"}
+        ed = cl.post("/login", params={"username": "editor", "password": _SENHA}).json()
+        he = {"Authorization": f"Bearer {ed['access_token']}"}
+
+        chk("me", cl.get("/me", headers=h))
+        token = chk("changes", cl.get("/registros/changes")).json()["token"]
+        chk(
+            "post",
+            cl.post(
+                "/registros", json={"data": "2025-02-01", "categoria": "C", "valor": 3}, headers=h
+            ),
+            (201,),
+        )
+        chk(
+            "post upsert",
+            cl.post(
+                "/registros", json={"data": "2025-02-01", "categoria": "C", "valor": 5}, headers=h
+            ),
+            (201,),
+        )
+        chk(
+            "bulk",
+            cl.post(
+                "/registros/bulk",
+                json=[
+                    {"data": "2025-03-01", "categoria": "Z", "valor": 1},
+                    {"data": "2025-03-02", "categoria": "Z", "valor": 2},
+                ],
+                headers=h,
+            ),
+        )
+        rid = [r for r in chk("registros", cl.get("/registros")).json() if r["categoria"] == "C"][
+            0
+        ]["id"]
+        chk(
+            "put",
+            cl.put(
+                f"/registros/{rid}",
+                json={"data": "2025-02-03", "categoria": "C", "valor": 4},
+                headers=h,
+            ),
+        )
+        chk("delete", cl.delete(f"/registros/{rid}", headers=h))
+        delta = chk("changes delta", cl.get("/registros/changes", params={"since": token})).json()
+        if rid not in delta["deletes"]:
+            falhas.append("changes delta sem a exclusão")
+        chk("paginação", cl.get("/registros", params={"limit": 1}))
+        chk("agg", cl.get("/registros/agg", params={"bucket": "month"}))
+        chk("auditoria", cl.get("/auditoria", headers=h))
+
+        chk(
+            "role request",
+            cl.post(
+                "/me/role-request",
+                json={"requested_role": "admin", "justification": "check"},
+                headers=he,
+            ),
+        )
+        pedidos = chk("role requests", cl.get("/admin/role-requests", headers=h)).json()
+        chk("approve", cl.post(f"/admin/role-requests/{pedidos[0]['id']}/approve", headers=h))
+        chk("reset cleanup", cl.post("/admin/password-reset/cleanup", headers=h))
+
+        # Escritas concorrentes: cadeia de auditoria, rollup e feed precisam fechar
+        def escrever(i):
+            data = f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            registro = {"data": data, "categoria": f"K{i % 3}", "valor": i}
+            return cl.post("/registros", json=registro, headers=h).status_code
+
+        def excluir(rid):
+            return cl.delete(f"/registros/{rid}", headers=h).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            status = set(pool.map(escrever, range(escritas)))
+            ids = [r["id"] for r in cl.get("/registros").json() if r["categoria"].startswith("K")]
+            status |= set(pool.map(excluir, ids[::4]))
+        marca = "ok " if status <= {200, 201} else "FALHOU"
+        print(f"  {marca} {'escritas concorrentes':<26} {sorted(status)}")
+        if not status <= {200, 201}:
+            falhas.append("escritas concorrentes")
+
+        verify = chk(
+            "audit verify full", cl.get("/admin/audit/verify", params={"mode": "full"}, headers=h)
+        ).json()
+        if not verify.get("valid"):
+            falhas.append("cadeia de auditoria inválida")
+        rollup = chk("rollup verify", cl.get("/admin/registros/rollup/verify", headers=h)).json()
+        if rollup.get("divergences"):
+            falhas.append("rollup divergente")
+
+        ancora = chk("anchor", cl.post("/admin/audit/anchor", headers=h)).json()["details"]
+        if ancora["merkle_blocks"]:
+            from backend.audit.merkle import verificar_prova
+
+            prova = chk("audit proof", cl.get("/admin/audit/proof/1", headers=h)).json()
+            if prova.get("root") != ancora["merkle_root"] or not verificar_prova(prova):
+                falhas.append("prova de inclusão não confere com a âncora")
+
+        chk("logout_all", cl.post("/logout_all", headers=h))
+
+    return falhas
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    ap.add_argument(
+        "--dsn", default=os.environ.get("PG_CHECK_DSN"), help="DSN de um banco UTF8 vazio"
+    )
+    ap.add_argument("--reset", action="store_true", help="DROP/CREATE do schema public antes")
+    ap.add_argument("--escritas", type=int, default=96, help="POSTs concorrentes no fluxo")
+    args = ap.parse_args()
+    if not args.dsn:
+        ap.error("informe --dsn (ou PG_CHECK_DSN)")
+
+    _setup_env(args.dsn)
+    print("Migrações:")
+    aplicar_migracoes(args.dsn, args.reset)
+
+    # Ancoragem grava data/anchors.log e tenta um commit git no diretório atual:
+    # roda num diretório temporário para não tocar no repositório
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print("Fluxo da API:")
+        falhas = rodar_fluxo(args.escritas)
+
+    if falhas:
+        print(f"FALHAS: {falhas}")
+        sys.exit(1)
+    print("OK: migrações e fluxo da API validados")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,10 @@ from pathlib import Path
 import requests
 from fastapi import HTTPException
 
+from backend.audit.merkle import raiz_global
 from backend.audit.service import obter_ultimo_hash
 from backend.core.config import settings
-from backend.db import connect
+from backend.db import connect, execute
 from shared.models import UserContext
 
 # Cache simples para evitar login repetitivo no Pastebin
@@ -36,22 +37,28 @@ def _get_pastebin_user_key() -> str | None:
     return _cached_user_key
 
 
-def _save_to_local_file(timestamp: str, last_hash: str, username: str) -> str:
+def _save_to_local_file(timestamp: str, last_hash: str, merkle: dict, username: str) -> str:
     """Estratégia 1: Arquivo Local Append-Only"""
     path = Path("data/anchors.log")
-    entry = f"{timestamp} | HASH:{last_hash} | USER:{username}\n"
+    entry = (
+        f"{timestamp} | HASH:{last_hash} | MERKLE:{merkle['root']} "
+        f"| BLOCKS:{merkle['blocks']} | USER:{username}\n"
+    )
     with open(path, "a", encoding="utf-8") as f:
         f.write(entry)
     return str(path.absolute())
 
 
-def _save_to_git(timestamp: str, last_hash: str, username: str) -> str | None:
+def _save_to_git(timestamp: str, last_hash: str, merkle: dict, username: str) -> str | None:
     """Estratégia 2: Commit no Git (se disponível)"""
     if not Path(".git").is_dir():
         return None
 
     try:
-        msg = f"🛡️ ANCHOR: {last_hash} | {timestamp} | {username}"
+        msg = (
+            f"🛡️ ANCHOR: {last_hash} | MERKLE: {merkle['root']} "
+            f"({merkle['blocks']} blocos) | {timestamp} | {username}"
+        )
         # --allow-empty permite criar commit sem mudar arquivos, apenas para registro no log
         subprocess.run(
             ["git", "commit", "--allow-empty", "-m", msg],
@@ -71,34 +78,60 @@ def perform_anchoring(user: UserContext) -> dict:
     """
     Executa ancoragem em múltiplas camadas: Local, Git e Pastebin.
     """
+    now = datetime.now(timezone.utc).isoformat()
     conn = connect()
     try:
         last_hash = obter_ultimo_hash(conn)
+        if not last_hash:
+            raise HTTPException(status_code=400, detail="Cadeia de auditoria vazia")
+
+        # Raiz de Merkle sobre as raízes dos blocos selados (sela os completos pendentes)
+        merkle = raiz_global(conn)
+        # Registro da âncora: as provas de inclusão são calculadas contra esta raiz
+        execute(
+            conn,
+            """
+            INSERT INTO audit_anchors
+                (created_at, username, last_hash, merkle_root, blocks, last_event_id)
+            VALUES (:created_at, :username, :last_hash, :merkle_root, :blocks, :last_event_id)
+            """,
+            {
+                "created_at": now,
+                "username": user.username,
+                "last_hash": last_hash,
+                "merkle_root": merkle["root"],
+                "blocks": merkle["blocks"],
+                "last_event_id": merkle["last_event_id"],
+            },
+        )
+        conn.commit()
     finally:
         conn.close()
 
-    if not last_hash:
-        raise HTTPException(status_code=400, detail="Cadeia de auditoria vazia")
-
-    now = datetime.now(timezone.utc).isoformat()
-    results = {"hash": last_hash, "timestamp": now}
+    results = {
+        "hash": last_hash,
+        "timestamp": now,
+        "merkle_root": merkle["root"],
+        "merkle_blocks": merkle["blocks"],
+        "merkle_block_roots": merkle["block_roots"],
+    }
 
     # 1️⃣ Camada Local
     try:
-        local_path = _save_to_local_file(now, last_hash, user.username)
+        local_path = _save_to_local_file(now, last_hash, merkle, user.username)
         results["local_file"] = local_path
     except Exception as e:
         results["local_file_error"] = str(e)
 
     # 2️⃣ Camada Git
-    git_hash = _save_to_git(now, last_hash, user.username)
+    git_hash = _save_to_git(now, last_hash, merkle, user.username)
     if git_hash:
         results["git_commit"] = git_hash
 
     # 3️⃣ Camada Externa (Pastebin) - Opcional se configurado
     if settings.PASTEBIN_DEV_KEY:
         try:
-            paste_url = _post_to_pastebin(now, last_hash, user.username)
+            paste_url = _post_to_pastebin(now, last_hash, merkle, user.username)
             results["pastebin_url"] = paste_url
         except Exception as e:
             results["pastebin_error"] = str(e)
@@ -106,14 +139,22 @@ def perform_anchoring(user: UserContext) -> dict:
     return results
 
 
-def _post_to_pastebin(timestamp: str, last_hash: str, username: str) -> str:
+def _post_to_pastebin(timestamp: str, last_hash: str, merkle: dict, username: str) -> str:
     """Lógica isolada do Pastebin"""
 
+    block_roots = "\n".join(
+        f"    [{i}] {root}" for i, root in enumerate(merkle["block_roots"])
+    )
+
     # Conteúdo da âncora
     paste_content = f"""
     === GOVERNANCE DASHBOARD ANCHOR ===
     Timestamp: {timestamp}
     Anchor Hash: {last_hash}
+    Merkle Root: {merkle['root']}
+    Block Size: {merkle['block_size']}
+    Block Roots:
+{block_roots}
     Signed By: {username}
     ===================================
     """
@@ -0,0 +1,190 @@
+"""
+Appender serializado da cadeia de auditoria.
+
+Ler o último hash e inserir o próximo evento precisa ser atômico: dois escritores
+que leem o mesmo `prev_hash` antes de inserir bifurcam a cadeia (e a verificação
+trava o sistema). Aqui o append acontece sempre sob lock de escrita:
+
+- Entre workers/processos: SQLite `BEGIN IMMEDIATE` (via `begin_write`);
+  Postgres `pg_advisory_xact_lock`. O lock vale até o commit da transação.
+- A cabeça em memória é protegida por um `threading.Lock` local.
+
+A cabeça da cadeia (id, event_hash) fica em memória. Sob o lock ela é apenas
+validada contra o banco com uma consulta O(1) (MAX(id) + lookup por PK); só é
+recarregada se outro worker escreveu no meio, ou se uma transação foi desfeita.
+
+O append que completa um bloco de AUDIT_MERKLE_BLOCK_SIZE eventos também o sela
+(merkle.selar_blocos), na mesma transação e sob o mesmo lock. A contagem de eventos
+do bloco em aberto acompanha a cabeça em memória: enquanto ela vale, a checagem é O(1);
+quando a cabeça é recarregada, a contagem também é.
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+from backend.audit.hash import compute_event_hash
+from backend.audit.merkle import contar_pendentes, selar_blocos
+from backend.core.config import settings
+from backend.db import backend_name, begin_write, execute, query
+
+# Chave do advisory lock (Postgres) que serializa o append da cadeia
+_PG_LOCK_KEY = 0x61756469  # "audi"
+
+_lock = threading.Lock()
+
+# (maior id visto em auditoria, id do último evento encadeado, event_hash dele)
+_head: Tuple[int, int | None, str | None] | None = None
+
+# (cabeça a que a contagem se refere, eventos no bloco de Merkle em aberto)
+_pendentes: Tuple[Tuple[int, int | None, str | None], int] | None = None
+
+_INSERT_SQL = """
+    INSERT INTO auditoria (
+        timestamp,
+        username,
+        role,
+        action,
+        resource,
+        resource_id,
+        payload_before,
+        payload_after,
+        endpoint,
+        method,
+        prev_hash,
+        event_hash,
+        hash_version
+    )
+    VALUES (
+        :timestamp,
+        :username,
+        :role,
+        :action,
+        :resource,
+        :resource_id,
+        :payload_before,
+        :payload_after,
+        :endpoint,
+        :method,
+        :prev_hash,
+        :event_hash,
+        :hash_version
+    )
+    RETURNING id
+"""
+
+
+def _lock_chain(conn) -> None:
+    if backend_name() == "sqlite":
+        begin_write(conn)
+    else:
+        execute(conn, "SELECT pg_advisory_xact_lock(:k)", {"k": _PG_LOCK_KEY})
+
+
+def _load_head(conn) -> Tuple[int, int | None, str | None]:
+    rows = query(
+        conn,
+        """
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM auditoria) AS max_id,
+            id,
+            event_hash
+          FROM auditoria
+         WHERE event_hash IS NOT NULL
+         ORDER BY id DESC
+         LIMIT 1
+        """,
+        {},
+    )
+    if rows:
+        return rows[0]["max_id"], rows[0]["id"], rows[0]["event_hash"]
+
+    rows = query(conn, "SELECT COALESCE(MAX(id), 0) AS max_id FROM auditoria", {})
+    return rows[0]["max_id"], None, None
+
+
+def _current_head(conn) -> Tuple[int, int | None, str | None]:
+    """
+    Cabeça da cadeia, já sob o lock de escrita.
+    O cache só vale se ninguém inseriu desde então (MAX(id) igual) e se o evento
+    cacheado ainda existe com o mesmo hash (protege contra rollback + reuso de id).
+    """
+    if _head is not None:
+        max_id, head_id, head_hash = _head
+        rows = query(
+            conn,
+            """
+            SELECT
+                (SELECT COALESCE(MAX(id), 0) FROM auditoria) AS max_id,
+                (SELECT event_hash FROM auditoria WHERE id = :head_id) AS event_hash
+            """,
+            {"head_id": head_id},
+        )
+        if rows[0]["max_id"] == max_id and rows[0]["event_hash"] == head_hash:
+            return _head
+
+    return _load_head(conn)
+
+
+def _selar_se_completo(conn, head_anterior) -> None:
+    """
+    Sela o bloco de Merkle que o append acabou de completar (já sob o lock).
+    A contagem só é reaproveitada se a cabeça usada no append era a cacheada.
+    """
+    global _pendentes
+
+    if _pendentes is not None and _pendentes[0] is head_anterior:
+        pendentes = _pendentes[1] + 1
+    else:
+        pendentes = contar_pendentes(conn)
+
+    if pendentes >= settings.AUDIT_MERKLE_BLOCK_SIZE:
+        selar_blocos(conn)
+        pendentes = contar_pendentes(conn)
+
+    _pendentes = (_head, pendentes)
+
+
+def append_event(conn, evento: Dict[str, Any]) -> Tuple[int, str]:
+    """
+    Encadeia e insere um evento na transação de `conn` (o commit é do chamador).
+
+    `evento` traz os campos de auditoria já normalizados (payloads em JSON string).
+    Retorna (id, event_hash) do evento inserido.
+    """
+    global _head
+
+    # Lock do banco primeiro: quem chega ao lock local já é o único escritor,
+    # então nunca se espera o banco segurando o lock local.
+    _lock_chain(conn)
+
+    with _lock:
+        head = _current_head(conn)
+        _, _, prev_hash = head
+
+        hash_version = settings.AUDIT_HASH_VERSION
+        event_hash = compute_event_hash(**evento, prev_hash=prev_hash, hash_version=hash_version)
+        rows = query(
+            conn,
+            _INSERT_SQL,
+            {
+                **evento,
+                "prev_hash": prev_hash,
+                "event_hash": event_hash,
+                "hash_version": hash_version,
+            },
+        )
+        event_id = rows[0]["id"]
+
+        # Otimista: se a transação for desfeita, a validação acima detecta
+        _head = (event_id, event_id, event_hash)
+        _selar_se_completo(conn, head)
+
+        return event_id, event_hash
+
+
+def reset_chain_head() -> None:
+    """Descarta a cabeça em memória (ex.: após restaurar/reconstruir a auditoria)."""
+    global _head, _pendentes
+    with _lock:
+        _head = None
+        _pendentes = None
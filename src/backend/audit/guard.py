@@ -1,22 +1,63 @@
+import threading
+import time
+
+from backend.core.config import settings
 from backend.core.logger import logger
 from backend.db import connect, query
 
+# Estado de bloqueio em memória: (bloqueado, instante da leitura em time.monotonic())
+# Atualizado na hora por quem grava o status (verificar_integridade_auditoria) neste
+# processo; o TTL cobre mudanças feitas por outros workers.
+_lock_state: tuple[bool, float] | None = None
+_state_lock = threading.Lock()
+
+
+def _ler_status_banco() -> bool:
+    conn = connect()
+    try:
+        rows = query(conn, "SELECT status FROM audit_integrity WHERE id = 1")
+        return bool(rows and rows[0]["status"] != "OK")
+    finally:
+        conn.close()
+
+
+def estado_em_cache() -> bool | None:
+    """Bloqueio em cache, ou None se expirou (TTL) e precisa ler o banco."""
+    state = _lock_state
+    if state is not None and time.monotonic() - state[1] < settings.INTEGRITY_CACHE_TTL:
+        return state[0]
+    return None
+
 
 def is_system_locked() -> bool:
     """
     Verifica se o sistema está em modo de bloqueio (Read-Only)
     devido a violação de auditoria.
+    Usa o estado em cache por até INTEGRITY_CACHE_TTL segundos.
+    Pode ler o banco (bloqueante): em código async, chamar fora do event loop.
     """
-    conn = connect()
+    global _lock_state
+
+    locked = estado_em_cache()
+    if locked is not None:
+        return locked
+
     try:
-        rows = query(conn, "SELECT status FROM audit_integrity WHERE id = 1")
-        if rows and rows[0]["status"] != "OK":
-            return True
-        return False
+        locked = _ler_status_banco()
     except Exception as e:
         # 🛡️ Fail-closed: Se houver erro ao checar integridade, BLOQUEIA o sistema.
         # Isso impede escritas em um banco instável ou corrompido.
+        # (o erro não é cacheado: a próxima requisição tenta ler de novo)
         logger.critical(f"FALHA CRÍTICA NO GUARD: {e}")
         return True
-    finally:
-        conn.close()
+
+    with _state_lock:
+        _lock_state = (locked, time.monotonic())
+    return locked
+
+
+def atualizar_estado_integridade(status: str) -> None:
+    """Chamado após gravar audit_integrity.status: o cache reflete a mudança na hora."""
+    global _lock_state
+    with _state_lock:
+        _lock_state = (status != "OK", time.monotonic())
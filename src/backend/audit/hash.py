@@ -1,5 +1,40 @@
 import hashlib
 import json
+import struct
+
+# Versões da codificação canônica (coluna auditoria.hash_version, V020):
+#   1 = JSON com sort_keys (eventos antigos)
+#   2 = campos em ordem fixa, cada um prefixado pelo tamanho (4 bytes big-endian)
+HASH_VERSIONS = (1, 2)
+
+# Ordem fixa dos campos na v2 (não mudar: faz parte do formato); prev_hash por último
+_V2_FIELDS = (
+    "timestamp",
+    "username",
+    "role",
+    "action",
+    "resource",
+    "resource_id",
+    "payload_before",
+    "payload_after",
+    "endpoint",
+    "method",
+)
+_V2_TAG = b"audit-v2\x00"
+_V2_NULL = b"\xff\xff\xff\xff"  # None (distinto de string vazia, que tem tamanho 0)
+_pack_len = struct.Struct(">I").pack
+
+
+def _canonical_v2(values) -> bytes:
+    partes = [_V2_TAG]
+    for value in values:
+        if value is None:
+            partes.append(_V2_NULL)
+            continue
+        raw = (value if isinstance(value, str) else str(value)).encode("utf-8")
+        partes.append(_pack_len(len(raw)))
+        partes.append(raw)
+    return b"".join(partes)
 
 
 def compute_event_hash(
@@ -15,7 +50,29 @@ def compute_event_hash(
     endpoint,
     method,
     prev_hash,
+    hash_version=1,
 ):
+    if hash_version == 2:
+        raw = _canonical_v2(
+            (
+                timestamp,
+                username,
+                role,
+                action,
+                resource,
+                resource_id,
+                payload_before,
+                payload_after,
+                endpoint,
+                method,
+                prev_hash,
+            )
+        )
+        return hashlib.sha256(raw).hexdigest()
+
+    if hash_version != 1:
+        raise ValueError(f"hash_version desconhecida: {hash_version}")
+
     canonical = {
         "timestamp": timestamp,
         "username": username,
@@ -32,3 +89,14 @@ def compute_event_hash(
 
     raw = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def compute_row_hash(row, prev_hash, hash_version=1):
+    """
+    Hash de um evento lido do banco (mapping com as colunas de auditoria).
+    Atalho do caminho de verificação: na v2 não monta dict nem kwargs.
+    """
+    if hash_version == 2:
+        raw = _canonical_v2([row[f] for f in _V2_FIELDS] + [prev_hash])
+        return hashlib.sha256(raw).hexdigest()
+    return compute_event_hash(**{f: row[f] for f in _V2_FIELDS}, prev_hash=prev_hash)
@@ -1,23 +1,46 @@
-from fastapi import Request, status
+from fastapi import status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 
-from backend.audit.guard import is_system_locked
+from backend.audit.guard import estado_em_cache, is_system_locked
 
+# 🔓 Permitir autenticação mesmo em bloqueio (para o admin entrar e corrigir)
+_AUTH_PATHS = frozenset({"/login", "/refresh", "/logout"})
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-class IntegrityGuardMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # 🔓 Permitir autenticação mesmo em bloqueio (para o admin entrar e corrigir)
-        if request.url.path in ["/login", "/refresh", "/logout"]:
-            return await call_next(request)
+
+class IntegrityGuardMiddleware:
+    """
+    Middleware ASGI puro: bloqueia escritas (423) enquanto a auditoria estiver violada.
+    Não envolve a resposta — streaming passa direto, sem buffer nem task extra.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["path"] in _AUTH_PATHS
+            or scope["method"] in _READ_METHODS
+        ):
+            await self.app(scope, receive, send)
+            return
 
         # Se for operação de escrita (POST, PUT, DELETE, PATCH)
-        if request.method not in ("GET", "HEAD", "OPTIONS"):
-            if is_system_locked():
-                return JSONResponse(
-                    status_code=status.HTTP_423_LOCKED,
-                    content={
-                        "detail": "SISTEMA BLOQUEADO: Violação de integridade detectada na auditoria."
-                    },
-                )
-        return await call_next(request)
+        locked = estado_em_cache()
+        if locked is None:
+            # Cache expirado: a leitura do banco é síncrona, roda fora do event loop
+            locked = await run_in_threadpool(is_system_locked)
+
+        if locked:
+            response = JSONResponse(
+                status_code=status.HTTP_423_LOCKED,
+                content={
+                    "detail": "SISTEMA BLOQUEADO: Violação de integridade detectada na auditoria."
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
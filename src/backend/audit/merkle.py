@@ -0,0 +1,297 @@
+"""
+Árvore de Merkle sobre os eventos encadeados da auditoria.
+
+- Os eventos (event_hash IS NOT NULL, em ordem de id) são agrupados em blocos de
+  AUDIT_MERKLE_BLOCK_SIZE. Cada bloco é "selado" uma única vez, no append que o
+  completa (`chain.append_event`, sob o lock da cadeia): sua raiz fica persistida em
+  audit_merkle_blocks (V019) e nunca é reescrita.
+- A raiz global é a raiz de Merkle sobre as raízes dos blocos selados; o bloco em
+  aberto fica de fora. A ancoragem publica essa raiz e a registra em audit_anchors (V024).
+- Prova de inclusão de um evento: caminho dentro do bloco + caminho entre blocos até
+  a raiz da última âncora, O(log n) hashes — sem reprocessar a cadeia. Eventos do
+  bloco em aberto (ou de blocos ainda não ancorados) não são prováveis ainda.
+
+Hashes no estilo RFC 6962: folha = sha256(0x00 || event_hash), nó = sha256(0x01 || esq || dir).
+Nó sem par sobe inalterado para o nível seguinte.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from backend.core.config import settings
+from backend.db import begin_write, execute, query
+
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+
+def _leaf_hash(event_hash: str) -> bytes:
+    return hashlib.sha256(_LEAF + bytes.fromhex(event_hash)).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def _raiz(nivel: List[bytes]) -> bytes:
+    if not nivel:
+        return hashlib.sha256(b"").digest()
+    while len(nivel) > 1:
+        proximo = [_node_hash(nivel[i], nivel[i + 1]) for i in range(0, len(nivel) - 1, 2)]
+        if len(nivel) % 2:
+            proximo.append(nivel[-1])
+        nivel = proximo
+    return nivel[0]
+
+
+def _caminho(nivel: List[bytes], indice: int) -> List[Dict[str, str]]:
+    """Irmãos do nó `indice` até a raiz (side = lado em que o irmão entra)."""
+    caminho = []
+    while len(nivel) > 1:
+        irmao = indice ^ 1
+        if irmao < len(nivel):
+            caminho.append(
+                {"side": "left" if irmao < indice else "right", "hash": nivel[irmao].hex()}
+            )
+        proximo = [_node_hash(nivel[i], nivel[i + 1]) for i in range(0, len(nivel) - 1, 2)]
+        if len(nivel) % 2:
+            proximo.append(nivel[-1])
+        nivel = proximo
+        indice //= 2
+    return caminho
+
+
+def _aplicar_caminho(folha: bytes, caminho: List[Dict[str, str]]) -> bytes:
+    atual = folha
+    for passo in caminho:
+        irmao = bytes.fromhex(passo["hash"])
+        atual = _node_hash(irmao, atual) if passo["side"] == "left" else _node_hash(atual, irmao)
+    return atual
+
+
+# -------------------------
+# Blocos
+# -------------------------
+
+
+def _ultimo_bloco(conn) -> Tuple[int, int]:
+    """(block_no do último bloco selado, last_id dele); (-1, 0) se nenhum."""
+    rows = query(
+        conn,
+        "SELECT block_no, last_id FROM audit_merkle_blocks ORDER BY block_no DESC LIMIT 1",
+        {},
+    )
+    return (rows[0]["block_no"], rows[0]["last_id"]) if rows else (-1, 0)
+
+
+def _eventos_apos(conn, desde_id: int, limite: int | None = None):
+    sql = """
+        SELECT id, event_hash
+          FROM auditoria
+         WHERE event_hash IS NOT NULL
+           AND id > :desde_id
+         ORDER BY id
+    """
+    params: Dict[str, Any] = {"desde_id": desde_id}
+    if limite is not None:
+        sql += " LIMIT :limite"
+        params["limite"] = limite
+    return query(conn, sql, params)
+
+
+def selar_blocos(conn) -> int:
+    """
+    Sela os blocos completos ainda não persistidos (na transação do chamador).
+    Retorna quantos blocos foram selados.
+
+    Lock de escrita antes de ler o último bloco: duas selagens simultâneas não
+    disputam o mesmo block_no. No Postgres (sem lock aqui) o ON CONFLICT cobre a
+    corrida; o conteúdo de um bloco é determinístico, então o perdedor não perde nada.
+    """
+    begin_write(conn)
+    tamanho = settings.AUDIT_MERKLE_BLOCK_SIZE
+    block_no, last_id = _ultimo_bloco(conn)
+    selados = 0
+
+    while True:
+        eventos = _eventos_apos(conn, last_id, tamanho)
+        if len(eventos) < tamanho:
+            return selados
+
+        block_no += 1
+        raiz = _raiz([_leaf_hash(e["event_hash"]) for e in eventos])
+        execute(
+            conn,
+            """
+            INSERT INTO audit_merkle_blocks
+                (block_no, first_id, last_id, event_count, root, created_at)
+            VALUES (:block_no, :first_id, :last_id, :event_count, :root, :created_at)
+            ON CONFLICT (block_no) DO NOTHING
+            """,
+            {
+                "block_no": block_no,
+                "first_id": eventos[0]["id"],
+                "last_id": eventos[-1]["id"],
+                "event_count": len(eventos),
+                "root": raiz.hex(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        last_id = eventos[-1]["id"]
+        selados += 1
+
+
+def contar_pendentes(conn) -> int:
+    """
+    Eventos encadeados após o último bloco selado (o bloco em aberto).
+    Com a selagem no append o resultado fica abaixo de AUDIT_MERKLE_BLOCK_SIZE;
+    só passa disso na primeira vez depois de um upgrade, até a selagem alcançar.
+    """
+    _, last_id = _ultimo_bloco(conn)
+    rows = query(
+        conn,
+        """
+        SELECT COUNT(*) AS n
+          FROM auditoria
+         WHERE event_hash IS NOT NULL
+           AND id > :desde_id
+        """,
+        {"desde_id": last_id},
+    )
+    return rows[0]["n"]
+
+
+def _raizes_seladas(conn, limite: int | None = None) -> List[Dict[str, Any]]:
+    """Raízes dos blocos selados em ordem (só os `limite` primeiros, se informado)."""
+    sql = "SELECT block_no, last_id, root FROM audit_merkle_blocks"
+    params: Dict[str, Any] = {}
+    if limite is not None:
+        sql += " WHERE block_no < :limite"
+        params["limite"] = limite
+    return query(conn, sql + " ORDER BY block_no", params)
+
+
+def raiz_global(conn) -> Dict[str, Any]:
+    """
+    Raiz de Merkle sobre as raízes dos blocos selados — o valor que a ancoragem publica.
+
+    O bloco em aberto fica de fora: a raiz dele muda a cada append e nenhuma âncora
+    conseguiria casar com ela. Os eventos após o último bloco selado continuam cobertos
+    pelo `last_hash` da cadeia, publicado na mesma âncora.
+    Sela antes os blocos completos pendentes (escrita: o chamador faz o commit).
+    """
+    selar_blocos(conn)
+    blocos = _raizes_seladas(conn)
+
+    return {
+        "root": _raiz([bytes.fromhex(b["root"]) for b in blocos]).hex(),
+        "blocks": len(blocos),
+        "block_size": settings.AUDIT_MERKLE_BLOCK_SIZE,
+        "block_roots": [b["root"] for b in blocos],
+        "last_event_id": blocos[-1]["last_id"] if blocos else None,
+    }
+
+
+def prova_inclusao(conn, event_id: int) -> Dict[str, Any] | None:
+    """
+    Prova de inclusão do evento `event_id` contra a raiz da última âncora, ou None se
+    ele não estiver na cadeia. Verificável com `verificar_prova` usando apenas o
+    event_hash e a raiz publicada.
+
+    Só eventos de blocos selados e cobertos pela última âncora são prováveis. Para os
+    demais devolve `provable: False` com o motivo:
+    - OPEN_BLOCK: o evento está no bloco em aberto (sela quando o bloco completar);
+    - NOT_ANCHORED: o bloco foi selado depois da última ancoragem.
+
+    Só leitura e limitada: um bloco de eventos + as raízes dos blocos ancorados.
+    """
+    alvo = query(
+        conn,
+        "SELECT id, event_hash FROM auditoria WHERE id = :id AND event_hash IS NOT NULL",
+        {"id": event_id},
+    )
+    if not alvo:
+        return None
+
+    pendente = {"event_id": event_id, "event_hash": alvo[0]["event_hash"], "provable": False}
+
+    # Bloco do evento: busca por faixa de id (índice na PK), não por contagem
+    bloco = query(
+        conn,
+        """
+        SELECT block_no, first_id, last_id
+          FROM audit_merkle_blocks
+         WHERE first_id <= :id AND last_id >= :id
+        """,
+        {"id": event_id},
+    )
+    if not bloco:
+        return {
+            **pendente,
+            "reason": "OPEN_BLOCK",
+            "detail": (
+                "Evento no bloco em aberto: a prova fica disponível quando o bloco "
+                f"completar {settings.AUDIT_MERKLE_BLOCK_SIZE} eventos e for ancorado"
+            ),
+        }
+    block_no = bloco[0]["block_no"]
+
+    ancora = query(
+        conn,
+        """
+        SELECT id, created_at, merkle_root, blocks
+          FROM audit_anchors
+         ORDER BY id DESC
+         LIMIT 1
+        """,
+        {},
+    )
+    if not ancora or ancora[0]["blocks"] <= block_no:
+        return {
+            **pendente,
+            "block_no": block_no,
+            "reason": "NOT_ANCHORED",
+            "detail": "Bloco selado depois da última ancoragem: ancore para obter a prova",
+        }
+    ancora = ancora[0]
+
+    eventos = query(
+        conn,
+        """
+        SELECT id, event_hash
+          FROM auditoria
+         WHERE event_hash IS NOT NULL
+           AND id BETWEEN :first_id AND :last_id
+         ORDER BY id
+        """,
+        {"first_id": bloco[0]["first_id"], "last_id": bloco[0]["last_id"]},
+    )
+    folhas = [_leaf_hash(e["event_hash"]) for e in eventos]
+    indice = next(i for i, e in enumerate(eventos) if e["id"] == event_id)
+    raizes = [bytes.fromhex(b["root"]) for b in _raizes_seladas(conn, ancora["blocks"])]
+
+    # `root` é a raiz publicada, não a recalculada: blocos adulterados depois da
+    # ancoragem fazem a prova falhar em `verificar_prova`
+    return {
+        "event_id": event_id,
+        "event_hash": alvo[0]["event_hash"],
+        "provable": True,
+        "block_no": block_no,
+        "leaf_index": indice,
+        "block_root": _raiz(folhas).hex(),
+        "block_path": _caminho(folhas, indice),
+        "root": ancora["merkle_root"],
+        "root_path": _caminho(raizes, block_no),
+        "blocks": ancora["blocks"],
+        "anchor_id": ancora["id"],
+        "anchored_at": ancora["created_at"],
+    }
+
+
+def verificar_prova(prova: Dict[str, Any]) -> bool:
+    """Recalcula block_root e root a partir do event_hash e dos caminhos."""
+    block_root = _aplicar_caminho(_leaf_hash(prova["event_hash"]), prova["block_path"])
+    if block_root.hex() != prova["block_root"]:
+        return False
+    return _aplicar_caminho(block_root, prova["root_path"]).hex() == prova["root"]
@@ -1,30 +1,44 @@
 import json
 from typing import Optional
 
-from fastapi import Request
-from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 
 from shared.models import UserContext
 
 
-class HeaderInjectionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response: Response = await call_next(request)
+class HeaderInjectionMiddleware:
+    """
+    Middleware ASGI puro: injeta X-User-Context no início da resposta.
+    Só intercepta a mensagem `http.response.start`; o corpo (inclusive streaming)
+    segue direto para o servidor.
+    """
 
-        # 🔐 Se usuário autenticado foi resolvido pela dependency
-        user: Optional[UserContext] = getattr(request.state, "user", None)
+    def __init__(self, app):
+        self.app = app
 
-        if user:
-            response.headers["X-User-Context"] = json.dumps(
-                {
-                    "username": user.username,
-                    "role": user.role,
-                    "session_id": user.session_id,
-                    "must_change_password": user.must_change_password,
-                    "password_expiring_soon": user.password_expiring_soon,
-                    "password_days_remaining": user.password_days_remaining,
-                }
-            )
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        async def send_with_user_context(message):
+            if message["type"] == "http.response.start":
+                # 🔐 Se usuário autenticado foi resolvido pela dependency (request.state.user)
+                user: Optional[UserContext] = scope.get("state", {}).get("user")
+
+                if user:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-User-Context"] = json.dumps(
+                        {
+                            "username": user.username,
+                            "role": user.role,
+                            "session_id": user.session_id,
+                            "must_change_password": user.must_change_password,
+                            "password_expiring_soon": user.password_expiring_soon,
+                            "password_days_remaining": user.password_days_remaining,
+                        }
+                    )
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_user_context)
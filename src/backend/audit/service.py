@@ -1,8 +1,17 @@
+import asyncio
 import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime, timezone
+from typing import Any, Callable, TypeVar
 
-from backend.audit.hash import compute_event_hash
-from backend.db import connect, execute, normalize_error, query
+from backend.audit.chain import append_event
+from backend.core.config import settings
+from backend.db import begin_write, connect, get_pool, normalize_error, query
+
+T = TypeVar("T")
 
 
 def obter_ultimo_hash(conn):
@@ -20,6 +29,44 @@ def obter_ultimo_hash(conn):
     return rows[0]["event_hash"] if rows else None
 
 
+def _normalizar_evento(
+    *,
+    username: str,
+    role: str,
+    action: str,
+    resource: str,
+    resource_id: int | None,
+    payload_before: dict | None,
+    payload_after: dict | None,
+    endpoint: str,
+    method: str,
+) -> dict:
+    # Payloads normalizados (string única e determinística) + timestamp do evento
+    payload_before_json = (
+        json.dumps(payload_before, sort_keys=True, ensure_ascii=False, default=str)
+        if payload_before
+        else None
+    )
+    payload_after_json = (
+        json.dumps(payload_after, sort_keys=True, ensure_ascii=False, default=str)
+        if payload_after
+        else None
+    )
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "username": username,
+        "role": role,
+        "action": action,
+        "resource": resource,
+        "resource_id": resource_id,
+        "payload_before": payload_before_json,
+        "payload_after": payload_after_json,
+        "endpoint": endpoint,
+        "method": method,
+    }
+
+
 def registrar_evento(
     *,
     username: str,
@@ -33,93 +80,45 @@ def registrar_evento(
     method: str,
     conn=None,
 ):
+    """
+    Registra um evento na cadeia de auditoria.
+
+    - Com `conn`: grava na transação do chamador (commit é dele). É o caso das rotas
+      de escrita: o evento é atômico com a mudança nos dados. Elas rodam dentro de
+      `executar_auditado`, que no modo "group" leva a transação inteira ao writer.
+    - Sem `conn` e AUDIT_WRITE_MODE="group": entra na fila do writer em grupo e
+      retorna só após o commit do lote (ack durável, commit amortizado).
+    - Sem `conn` e modo "sync": conexão dedicada e commit próprio, durável mesmo que
+      a rota esteja dentro de outra transação que depois seja desfeita.
+    """
+    evento = _normalizar_evento(
+        username=username,
+        role=role,
+        action=action,
+        resource=resource,
+        resource_id=resource_id,
+        payload_before=payload_before,
+        payload_after=payload_after,
+        endpoint=endpoint,
+        method=method,
+    )
+
+    if conn is None and settings.AUDIT_WRITE_MODE == "group":
+        _group_writer().submit(_trabalho_evento(evento)).result(
+            timeout=settings.AUDIT_GROUP_ACK_TIMEOUT
+        )
+        return
+
     owns_conn = False
 
     if conn is None:
-        conn = connect()
+        # Dedicada: fora do aninhamento do pool, o commit abaixo é durável por si só
+        conn = connect(dedicated=True)
         owns_conn = True
 
     try:
-        # 1️⃣ Normalizar payloads ANTES (string única e determinística) e gerar timestamp
-        payload_before_json = (
-            json.dumps(payload_before, sort_keys=True, ensure_ascii=False, default=str)
-            if payload_before
-            else None
-        )
-        payload_after_json = (
-            json.dumps(payload_after, sort_keys=True, ensure_ascii=False, default=str)
-            if payload_after
-            else None
-        )
-
-        timestamp = datetime.now(timezone.utc).isoformat()
-
-        # 2️⃣ Buscar hash anterior
-        prev_hash = obter_ultimo_hash(conn)
-
-        # 3️⃣ Calcular hash do evento (usando exatamente o que será salvo)
-        event_hash = compute_event_hash(
-            timestamp=timestamp,
-            username=username,
-            role=role,
-            action=action,
-            resource=resource,
-            resource_id=resource_id,
-            payload_before=payload_before_json,
-            payload_after=payload_after_json,
-            endpoint=endpoint,
-            method=method,
-            prev_hash=prev_hash,
-        )
-
-        # 4️⃣ Persistir evento COM hash
-        execute(
-            conn,
-            """
-            INSERT INTO auditoria (
-                timestamp,
-                username,
-                role,
-                action,
-                resource,
-                resource_id,
-                payload_before,
-                payload_after,
-                endpoint,
-                method,
-                prev_hash,
-                event_hash
-            )
-            VALUES (
-                :timestamp,
-                :username,
-                :role,
-                :action,
-                :resource,
-                :resource_id,
-                :payload_before,
-                :payload_after,
-                :endpoint,
-                :method,
-                :prev_hash,
-                :event_hash
-            )
-            """,
-            {
-                "timestamp": timestamp,
-                "username": username,
-                "role": role,
-                "action": action,
-                "resource": resource,
-                "resource_id": resource_id,
-                "payload_before": payload_before_json,
-                "payload_after": payload_after_json,
-                "endpoint": endpoint,
-                "method": method,
-                "prev_hash": prev_hash,
-                "event_hash": event_hash,
-            },
-        )
+        # Encadear e persistir sob lock de escrita (sem bifurcar a cadeia)
+        append_event(conn, evento)
 
         if owns_conn:
             conn.commit()
@@ -131,3 +130,191 @@ def registrar_evento(
     finally:
         if owns_conn:
             conn.close()
+
+
+def executar_auditado(trabalho: Callable[[Any], T]) -> T:
+    """
+    Roda `trabalho(conn)` — a mudança nos dados e o `registrar_evento(conn=conn)`
+    dela — numa transação, faz o commit e devolve o retorno de `trabalho`.
+
+    - modo "sync": conexão própria, um commit por chamada.
+    - modo "group": `trabalho` roda no writer em grupo, num SAVEPOINT da transação
+      do lote, e esta função só retorna (ou levanta a exceção de `trabalho`) depois
+      do commit do lote: a resposta da rota continua sendo um ack durável, mas o
+      commit (fsync) é dividido entre as requisições do lote. Uma falha desfaz só o
+      savepoint dela; as demais do lote seguem.
+
+    `trabalho` não faz commit e não deve fazer trabalho lento fora do banco (ex.:
+    bcrypt): no modo "group" ele segura o lock de escrita do lote inteiro.
+    """
+    if settings.AUDIT_WRITE_MODE == "group":
+        resultado = (
+            _group_writer().submit(trabalho).result(timeout=settings.AUDIT_GROUP_ACK_TIMEOUT)
+        )
+        # O commit foi na thread do writer: read-your-writes marca a sessão daqui
+        hook = get_pool().on_commit
+        if hook is not None:
+            hook()
+        return resultado
+
+    conn = connect()
+    try:
+        resultado = trabalho(conn)
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _trabalho_evento(evento: dict) -> Callable[[Any], int]:
+    return lambda conn: append_event(conn, evento)[0]
+
+
+def enfileirar_evento(**kwargs) -> Future:
+    """
+    Enfileira um evento no writer em grupo (independe de AUDIT_WRITE_MODE).
+    O Future resolve com o id do evento após o commit do lote.
+    """
+    return _group_writer().submit(_trabalho_evento(_normalizar_evento(**kwargs)))
+
+
+async def registrar_evento_async(**kwargs) -> int:
+    """Versão aguardável de `enfileirar_evento` (para rotas async)."""
+    return await asyncio.wrap_future(enfileirar_evento(**kwargs))
+
+
+# -------------------------
+# Writer em grupo (group commit)
+# -------------------------
+
+_STOP = object()
+
+
+class _GroupWriter:
+    """
+    Thread única que drena a fila de trabalhos (`trabalho(conn)`: um evento avulso,
+    ou a transação de uma rota com o evento dela) e faz UM commit por lote — a cada
+    `interval` segundos ou `max_events` itens, o que vier primeiro.
+
+    Cada trabalho roda num SAVEPOINT: se falhar, só ele é desfeito e seu Future
+    recebe a exceção. Os Futures só resolvem depois do commit; se o commit (ou a
+    conexão) falhar, todos os Futures do lote recebem a exceção (nada é confirmado
+    parcialmente) e a thread segue para o próximo lote.
+    """
+
+    def __init__(self, interval: float, max_events: int):
+        self._interval = interval
+        self._max_events = max_events
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="audit-group-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, trabalho: Callable[[Any], Any]) -> Future:
+        fut: Future = Future()
+        self._queue.put((trabalho, fut))
+        return fut
+
+    def stop(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            lote = [item]
+            deadline = time.monotonic() + self._interval
+            parar = False
+            while len(lote) < self._max_events:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    parar = True
+                    break
+                lote.append(item)
+
+            try:
+                self._gravar(lote)
+            except BaseException as exc:
+                # Nenhuma falha pode matar a thread: quem espera receberia só o timeout
+                for _, fut in lote:
+                    if not fut.done():
+                        fut.set_exception(exc)
+            if parar:
+                return
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _gravar(self, lote) -> None:
+        conn = None
+        resultados = []
+        try:
+            conn = connect()
+            # Lock de escrita já no início: o lote inteiro é uma transação de escrita
+            begin_write(conn)
+            for trabalho, _ in lote:
+                conn.execute("SAVEPOINT audit_lote_item")
+                try:
+                    resultados.append((trabalho(conn), None))
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO SAVEPOINT audit_lote_item")
+                    resultados.append((None, exc))
+                conn.execute("RELEASE SAVEPOINT audit_lote_item")
+            conn.commit()
+        except Exception as exc:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            erro = normalize_error(exc)
+            for _, fut in lote:
+                fut.set_exception(erro)
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+
+        for (_, fut), (resultado, erro) in zip(lote, resultados):
+            if erro is not None:
+                fut.set_exception(erro)
+            else:
+                fut.set_result(resultado)
+
+
+_writer: _GroupWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def _group_writer() -> _GroupWriter:
+    global _writer
+    if _writer is None or not _writer.is_alive():
+        with _writer_lock:
+            # Thread morta (ex.: erro fatal no interpretador): recria em vez de deixar
+            # toda chamada esperar AUDIT_GROUP_ACK_TIMEOUT
+            if _writer is None or not _writer.is_alive():
+                _writer = _GroupWriter(
+                    settings.AUDIT_GROUP_COMMIT_INTERVAL_MS / 1000,
+                    settings.AUDIT_GROUP_COMMIT_MAX_EVENTS,
+                )
+    return _writer
+
+
+def stop_group_writer() -> None:
+    """Drena a fila (grava o que estiver pendente) e encerra o writer."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
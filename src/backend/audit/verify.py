@@ -1,97 +1,333 @@
+"""
+Verificação da cadeia de auditoria (incremental ou completa), em streaming.
+
+Uso (CLI):
+    python -m backend.audit.verify                 # incremental (a partir do checkpoint)
+    python -m backend.audit.verify --full          # desde a gênese
+    python -m backend.audit.verify --full --workers 4   # segmentos em paralelo
+"""
+
+import argparse
 import json
-from datetime import datetime, timezone
+import multiprocessing as mp
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Generator, Tuple
 
-from backend.audit.hash import compute_event_hash
-from backend.db import execute, query
+from backend.audit.guard import atualizar_estado_integridade
+from backend.audit.hash import HASH_VERSIONS, compute_row_hash
+from backend.core.config import settings
+from backend.db import connect, execute, iter_query, query
 
+# Eventos lidos por ida ao banco (memória constante, independe do tamanho da cadeia)
+VERIFY_CHUNK_SIZE = 5000
 
-def verificar_integridade_auditoria(conn):
-    """
-    Verifica a integridade da cadeia de auditoria.
-    Retorna dict com status e ponto de falha (se houver).
-    """
+# Abaixo disso o custo de subir processos não compensa: verifica sequencialmente
+PARALLEL_MIN_EVENTS = 20_000
 
+# Segmentos por worker (segmentos menores equilibram melhor a carga)
+_SEGMENTS_PER_WORKER = 4
+
+_SELECT_EVENTOS = """
+    SELECT
+        id,
+        timestamp,
+        username,
+        role,
+        action,
+        resource,
+        resource_id,
+        payload_before,
+        payload_after,
+        endpoint,
+        method,
+        prev_hash,
+        event_hash,
+        hash_version
+    FROM auditoria
+    WHERE event_hash IS NOT NULL
+      AND id > :desde_id
+      AND id <= :ate_id
+    ORDER BY id
+"""
+
+
+def _ler_checkpoint(conn):
     rows = query(
         conn,
         """
-        SELECT
-            id,
-            timestamp,
-            username,
-            role,
-            action,
-            resource,
-            resource_id,
-            payload_before,
-            payload_after,
-            endpoint,
-            method,
-            prev_hash,
-            event_hash
-        FROM auditoria
-        WHERE event_hash IS NOT NULL
-        ORDER BY id
+        SELECT status, checkpoint_id, checkpoint_hash, last_full_check_at
+          FROM audit_integrity
+         WHERE id = 1
         """,
         {},
     )
+    return rows[0] if rows else None
 
-    prev_hash = None
 
-    # Inicializa variáveis de estado (assumindo sucesso por padrão)
-    status = "OK"
-    violated_at = None
-    violated_event_id = None
-    reason = None
-    broken_result = None
+def _full_check_vencido(last_full_check_at) -> bool:
+    interval = settings.AUDIT_FULL_VERIFY_INTERVAL_HOURS
+    if not interval or interval <= 0:
+        return False
+    if not last_full_check_at:
+        return True
+    try:
+        ultimo = datetime.fromisoformat(last_full_check_at)
+    except ValueError:
+        return True
+    if ultimo.tzinfo is None:
+        ultimo = ultimo.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - ultimo >= timedelta(hours=interval)
+
+
+def _progresso(checked: int, total: int, inicio: float) -> Dict[str, Any]:
+    elapsed = time.monotonic() - inicio
+    rate = checked / elapsed if elapsed > 0 else 0.0
+    restante = max(total - checked, 0)
+    return {
+        "checked": checked,
+        "total": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_sec": round(rate, 1),
+        "eta_seconds": round(restante / rate, 1) if rate > 0 else None,
+    }
+
+
+def _checar_evento(row, prev_hash) -> Dict[str, Any] | None:
+    """Confere um evento contra o hash anterior da cadeia; retorna a quebra ou None."""
+    # Cada evento é recalculado na codificação com que foi gravado (hash_version);
+    # versão desconhecida (ex.: coluna adulterada) não tem hash válido
+    recalculated_hash = (
+        compute_row_hash(row, prev_hash, row["hash_version"])
+        if row["hash_version"] in HASH_VERSIONS
+        else None
+    )
+
+    # 1️⃣ Hash do próprio evento foi adulterado
+    if recalculated_hash != row["event_hash"]:
+        return {
+            "valid": False,
+            "reason": "event_hash mismatch",
+            "broken_at_id": row["id"],
+            "expected": recalculated_hash,
+            "found": row["event_hash"],
+        }
+
+    # 2️⃣ Cadeia quebrada (prev_hash não bate)
+    if row["prev_hash"] != prev_hash:
+        return {
+            "valid": False,
+            "reason": "prev_hash mismatch",
+            "broken_at_id": row["id"],
+            "expected_prev_hash": prev_hash,
+            "found_prev_hash": row["prev_hash"],
+        }
+
+    return None
+
 
-    for row in rows:
-        recalculated_hash = compute_event_hash(
-            timestamp=row["timestamp"],
-            username=row["username"],
-            role=row["role"],
-            action=row["action"],
-            resource=row["resource"],
-            resource_id=row["resource_id"],
-            payload_before=row["payload_before"],
-            payload_after=row["payload_after"],
-            endpoint=row["endpoint"],
-            method=row["method"],
-            prev_hash=prev_hash,
+def _verificar_segmento(
+    desde_id: int, ate_id: int, chunk_size: int
+) -> Tuple[int, Dict[str, Any] | None]:
+    """
+    Worker (processo separado): verifica os eventos com desde_id < id <= ate_id.
+
+    O hash anterior do segmento é o event_hash armazenado do último evento antes
+    dele — exatamente o que a verificação sequencial usaria ao chegar ali. Por isso a
+    primeira quebra do primeiro segmento quebrado é a mesma da verificação sequencial.
+    """
+    conn = connect(intent="read")
+    try:
+        rows = query(
+            conn,
+            """
+            SELECT event_hash
+              FROM auditoria
+             WHERE event_hash IS NOT NULL
+               AND id <= :desde_id
+             ORDER BY id DESC
+             LIMIT 1
+            """,
+            {"desde_id": desde_id},
         )
+        prev_hash = rows[0]["event_hash"] if rows else None
 
-        # 1️⃣ Hash do próprio evento foi adulterado
-        if recalculated_hash != row["event_hash"]:
-            broken_result = {
-                "valid": False,
-                "reason": "event_hash mismatch",
-                "broken_at_id": row["id"],
-                "expected": recalculated_hash,
-                "found": row["event_hash"],
-            }
-            status = "VIOLATED"
-            violated_at = datetime.now(timezone.utc).isoformat()
-            violated_event_id = row["id"]
-            reason = "event_hash mismatch"
-            break
-
-        # 2️⃣ Cadeia quebrada (prev_hash não bate)
-        if row["prev_hash"] != prev_hash:
+        checked = 0
+        for row in iter_query(
+            conn, _SELECT_EVENTOS, {"desde_id": desde_id, "ate_id": ate_id}, chunk_size
+        ):
+            broken = _checar_evento(row, prev_hash)
+            if broken:
+                return checked, broken
+            prev_hash = row["event_hash"]
+            checked += 1
+        return checked, None
+    finally:
+        conn.close()
+
+
+def _verificar_paralelo(
+    desde_id: int, ate_id: int, total: int, workers: int, chunk_size: int, inicio: float
+) -> Generator[Dict[str, Any], None, Tuple[int, Dict[str, Any] | None]]:
+    """
+    Divide (desde_id, ate_id] em faixas de id e verifica cada uma num processo.
+    Gera progresso a cada segmento concluído; retorna (checked, quebra ou None).
+    """
+    n_segmentos = workers * _SEGMENTS_PER_WORKER
+    passo = max((ate_id - desde_id) // n_segmentos, 1)
+    limites = list(range(desde_id, ate_id, passo)) + [ate_id]
+    segmentos = list(zip(limites[:-1], limites[1:]))
+
+    resultados: Dict[int, Tuple[int, Dict[str, Any] | None]] = {}
+    checked = 0
+    primeira_quebra = None
+
+    # spawn: o worker abre o próprio pool (não herda conexões do processo pai)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+        futures = {
+            ex.submit(_verificar_segmento, a, b, chunk_size): i
+            for i, (a, b) in enumerate(segmentos)
+        }
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            i = futures[fut]
+            resultados[i] = fut.result()
+            checked += resultados[i][0]
+
+            if resultados[i][1] is not None and (primeira_quebra is None or i < primeira_quebra):
+                primeira_quebra = i
+                # Segmentos depois da quebra não mudam o resultado
+                for f, j in futures.items():
+                    if j > i:
+                        f.cancel()
+
+            yield _progresso(checked, total, inicio)
+
+    if primeira_quebra is None:
+        return checked, None
+
+    # Mesma contagem da verificação sequencial: tudo até a quebra
+    checked = sum(resultados[i][0] for i in range(primeira_quebra + 1))
+    return checked, resultados[primeira_quebra][1]
+
+
+def iterar_verificacao(
+    conn,
+    *,
+    full: bool = False,
+    chunk_size: int = VERIFY_CHUNK_SIZE,
+    workers: int | None = None,
+) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+    """
+    Verifica a integridade da cadeia de auditoria em streaming.
+
+    Gera um dict de progresso a cada `chunk_size` eventos (ou segmento, no modo
+    paralelo) e RETORNA (StopIteration.value) o resultado final — ver
+    `verificar_integridade_auditoria`.
+    """
+    if workers is None:
+        workers = settings.AUDIT_VERIFY_WORKERS
+
+    checkpoint = _ler_checkpoint(conn)
+    checkpoint_id = checkpoint["checkpoint_id"] if checkpoint else None
+
+    # Violação só é "limpa" por uma verificação completa; sem checkpoint também
+    if (
+        checkpoint_id is None
+        or checkpoint["status"] != "OK"
+        or _full_check_vencido(checkpoint["last_full_check_at"])
+    ):
+        full = True
+
+    prev_hash = None
+    desde_id = 0
+    broken_result = None
+
+    if not full:
+        # 0️⃣ O próprio evento do checkpoint precisa continuar lá, com o mesmo hash
+        ancora = query(
+            conn,
+            "SELECT event_hash FROM auditoria WHERE id = :id",
+            {"id": checkpoint_id},
+        )
+        found = ancora[0]["event_hash"] if ancora else None
+        if found != checkpoint["checkpoint_hash"]:
             broken_result = {
                 "valid": False,
-                "reason": "prev_hash mismatch",
-                "broken_at_id": row["id"],
-                "expected_prev_hash": prev_hash,
-                "found_prev_hash": row["prev_hash"],
+                "reason": "checkpoint mismatch",
+                "broken_at_id": checkpoint_id,
+                "expected": checkpoint["checkpoint_hash"],
+                "found": found,
             }
-            status = "VIOLATED"
-            violated_at = datetime.now(timezone.utc).isoformat()
-            violated_event_id = row["id"]
-            reason = "prev_hash mismatch"
-            break
+        else:
+            prev_hash = checkpoint["checkpoint_hash"]
+            desde_id = checkpoint_id
+
+    ultimo_id = checkpoint_id if not full else None
+    ultimo_hash = prev_hash
+    checked = 0
+    total = 0
+    ate_id = None
+    inicio = time.monotonic()
+
+    if broken_result is None:
+        # Fotografia do trecho a verificar: eventos anexados durante a verificação
+        # ficam para a próxima rodada
+        rows = query(
+            conn,
+            """
+            SELECT COUNT(*) AS n, MAX(id) AS max_id
+              FROM auditoria
+             WHERE event_hash IS NOT NULL
+               AND id > :desde_id
+            """,
+            {"desde_id": desde_id},
+        )
+        total, ate_id = rows[0]["n"], rows[0]["max_id"]
+
+    if total and workers > 1 and total >= PARALLEL_MIN_EVENTS:
+        checked, broken_result = yield from _verificar_paralelo(
+            desde_id, ate_id, total, workers, chunk_size, inicio
+        )
+        # Segmentos lidos de réplica atrasada podem não ter o fim do trecho: sem todos
+        # os eventos verificados, o checkpoint não avança (a próxima rodada refaz)
+        if broken_result is None and checked == total:
+            ultimo_id = ate_id
+            ultimo_hash = query(
+                conn, "SELECT event_hash FROM auditoria WHERE id = :id", {"id": ate_id}
+            )[0]["event_hash"]
+
+    elif total:
+        # A varredura (parte pesada) vai a uma réplica, se houver; âncora, status e
+        # checkpoint ficam no primário. Réplica atrasada só verifica menos eventos:
+        # o checkpoint avança até o último evento visto.
+        leitura = connect(dedicated=True, intent="read")
+        try:
+            rows = iter_query(
+                leitura, _SELECT_EVENTOS, {"desde_id": desde_id, "ate_id": ate_id}, chunk_size
+            )
+            for row in rows:
+                broken_result = _checar_evento(row, prev_hash)
+                if broken_result:
+                    break
+
+                prev_hash = row["event_hash"]
+                ultimo_id, ultimo_hash = row["id"], row["event_hash"]
+
+                checked += 1
+                if checked % chunk_size == 0:
+                    yield _progresso(checked, total, inicio)
 
-        prev_hash = row["event_hash"]
+            # Encerra a leitura (libera o snapshot) antes de escrever o status
+            rows.close()
+        finally:
+            leitura.close()
 
-    # 3️⃣ Atualizar status global de integridade
+    # 3️⃣ Atualizar status global de integridade (+ checkpoint, só se íntegra)
+    now = datetime.now(timezone.utc).isoformat()
     execute(
         conn,
         """
@@ -100,20 +336,33 @@ def verificar_integridade_auditoria(conn):
                last_check_at = :now,
                violated_at = :violated_at,
                violated_event_id = :violated_event_id,
-               reason = :reason
+               reason = :reason,
+               checkpoint_id = CASE WHEN :ok THEN :checkpoint_id ELSE checkpoint_id END,
+               checkpoint_hash = CASE WHEN :ok THEN :checkpoint_hash ELSE checkpoint_hash END,
+               checkpoint_at = CASE WHEN :ok THEN :now ELSE checkpoint_at END,
+               last_full_check_at = CASE WHEN :ok AND :full THEN :now ELSE last_full_check_at END
          WHERE id = 1
         """,
         {
-            "status": status,
-            "now": datetime.now(timezone.utc).isoformat(),
-            "violated_at": violated_at,
-            "violated_event_id": violated_event_id,
-            "reason": reason,
+            "status": "VIOLATED" if broken_result else "OK",
+            "now": now,
+            "violated_at": now if broken_result else None,
+            "violated_event_id": broken_result["broken_at_id"] if broken_result else None,
+            "reason": broken_result["reason"] if broken_result else None,
+            "ok": broken_result is None,
+            "full": full,
+            "checkpoint_id": ultimo_id,
+            "checkpoint_hash": ultimo_hash,
         },
     )
     conn.commit()
 
+    # Guard deste processo passa a ver o novo status sem esperar o TTL
+    atualizar_estado_integridade("VIOLATED" if broken_result else "OK")
+
     if broken_result:
+        broken_result["mode"] = "full" if full else "incremental"
+
         # 4️⃣ Registrar evento forense de violação (FORA DA CADEIA - event_hash NULL)
         # Isso serve como evidência imutável do momento da detecção.
         payload_evidence = json.dumps(broken_result, default=str)
@@ -130,7 +379,7 @@ def verificar_integridade_auditoria(conn):
             """,
             {
                 "timestamp": datetime.now(timezone.utc).isoformat(),
-                "res_id": violated_event_id,
+                "res_id": broken_result["broken_at_id"],
                 "payload": payload_evidence,
             },
         )
@@ -138,7 +387,88 @@ def verificar_integridade_auditoria(conn):
 
         return broken_result
 
+    final = _progresso(checked, total, inicio)
     return {
         "valid": True,
-        "checked_events": len(rows),
+        "checked_events": checked,
+        "mode": "full" if full else "incremental",
+        "checkpoint_id": ultimo_id,
+        "elapsed_seconds": final["elapsed_seconds"],
+        "events_per_sec": final["events_per_sec"],
     }
+
+
+def verificar_integridade_auditoria(
+    conn,
+    *,
+    full: bool = False,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+    chunk_size: int = VERIFY_CHUNK_SIZE,
+    workers: int | None = None,
+):
+    """
+    Verifica a integridade da cadeia de auditoria.
+    Retorna dict com status e ponto de falha (se houver).
+
+    Incremental por padrão: só recalcula os eventos após o checkpoint persistido
+    em audit_integrity (último id verificado + event_hash), partindo dele como
+    prev_hash. `full=True` verifica desde a gênese; isso também acontece
+    automaticamente a cada AUDIT_FULL_VERIFY_INTERVAL_HOURS e enquanto o status
+    estiver VIOLATED. Lê em lotes: memória constante. `progress` recebe o
+    progresso a cada lote.
+
+    `workers` > 1 (padrão: AUDIT_VERIFY_WORKERS) divide o trecho em faixas de id
+    verificadas em processos separados, com o mesmo broken_at_id/reason do modo
+    sequencial.
+    """
+    gen = iterar_verificacao(conn, full=full, chunk_size=chunk_size, workers=workers)
+    while True:
+        try:
+            item = next(gen)
+        except StopIteration as stop:
+            return stop.value
+        if progress is not None:
+            progress(item)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verifica a cadeia de auditoria.")
+    parser.add_argument("--full", action="store_true", help="Verifica desde a gênese")
+    parser.add_argument(
+        "--chunk-size", type=int, default=VERIFY_CHUNK_SIZE, help="Eventos por lote"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processos em paralelo (padrão: AUDIT_VERIFY_WORKERS; 1 = sequencial)",
+    )
+    args = parser.parse_args()
+
+    def mostrar(p: Dict[str, Any]) -> None:
+        eta = f"{p['eta_seconds']:.0f}s" if p["eta_seconds"] is not None else "?"
+        print(
+            f"  {p['checked']}/{p['total']} eventos  "
+            f"{p['events_per_sec']:.0f} ev/s  ETA {eta}",
+            file=sys.stderr,
+        )
+
+    conn = connect()
+    try:
+        resultado = verificar_integridade_auditoria(
+            conn,
+            full=args.full,
+            progress=mostrar,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+        )
+    finally:
+        conn.close()
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if not resultado.get("valid"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
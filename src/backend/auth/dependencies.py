@@ -1,24 +1,20 @@
-import time
 from datetime import datetime, timezone
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import ExpiredSignatureError, JWTError, jwt
 
+from backend.auth.session_cache import session_cache
 from backend.core.config import settings
 from backend.core.logger import logger
-from backend.db import connect, query
+from backend.db import aconnection, aquery
+from backend.db.routing import bind_session
 from shared.models import User, UserContext
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-# Cache simples em memória para evitar ir ao banco em toda requisição
-# Formato: {session_id: (timestamp, [rows])}
-_session_cache = {}
-SESSION_CACHE_TTL = 30  # segundos
 
-
-def get_current_user(
+async def get_current_user(
     request: Request,
     token: str = Depends(oauth2_scheme),
 ):
@@ -31,22 +27,16 @@ def get_current_user(
         if not session_id or not username or not role:
             raise HTTPException(status_code=401, detail="Token inválido")
 
-        # ⚡ Otimização: Cache de sessão
-        now = time.time()
-        cached = _session_cache.get(session_id)
-        rows = None
-
-        if cached:
-            ts, data = cached
-            if now - ts < SESSION_CACHE_TTL:
-                rows = data
-                if settings.ENV == "dev":
-                    logger.info(f"Cache de sessão usado para {username}")
+        # ⚡ Otimização: Cache de sessão (LRU + TTL, invalidado nas revogações)
+        rows = await session_cache.aget(session_id)
+        if rows is not None and settings.ENV == "dev":
+            logger.info(f"Cache de sessão usado para {username}")
 
         if rows is None:
-            conn = connect()
-            try:
-                db_rows = query(
+            generation = session_cache.generation()
+            # ⚡ Pool assíncrono: a espera pelo banco não ocupa thread do threadpool
+            async with aconnection() as conn:
+                db_rows = await aquery(
                     conn,
                     """
                     SELECT
@@ -60,13 +50,11 @@ def get_current_user(
                     """,
                     {"id": session_id},
                 )
-                # Converte para dict para garantir que seja serializável/desacoplado do cursor
-                rows = [dict(r) for r in db_rows]
-            finally:
-                conn.close()
+            # Converte para dict para garantir que seja serializável/desacoplado do cursor
+            rows = [dict(r) for r in db_rows]
 
-            # Atualiza cache
-            _session_cache[session_id] = (now, rows)
+            # Atualiza cache (descartado se houve invalidação durante a leitura)
+            session_cache.put(session_id, username, rows, generation)
 
         if not rows:
             raise HTTPException(status_code=401)
@@ -112,28 +100,27 @@ def get_current_user(
         )
 
         request.state.user = user_context
+        # Leituras desta sessão logo após uma escrita sua vão ao primário (réplicas)
+        bind_session(session_id)
         return user_context
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Erro ao decodificar o token")
 
 
-def get_current_user_profile(
+async def get_current_user_profile(
     user_context: UserContext = Depends(get_current_user),
 ) -> User:
-    conn = connect()
-    try:
-        user_data = query(
+    async with aconnection() as conn:
+        user_data = await aquery(
             conn,
             "SELECT username, role, email, name, fullname, avatar_path, mfa_enabled FROM users WHERE username = :username",
             {"username": user_context.username},
         )
-        if not user_data:
-            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    if not user_data:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-        return User(**user_data[0])
-    finally:
-        conn.close()
+    return User(**user_data[0])
 
 
 def get_current_user_allow_password_change(token: str = Depends(oauth2_scheme)):
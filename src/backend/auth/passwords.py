@@ -1,17 +1,237 @@
+"""
+Hash e verificação de senhas (bcrypt).
+
+O bcrypt custa ~100+ ms de CPU por chamada. Para que uma onda de logins não tome a
+CPU e o threadpool das rotas baratas, o trabalho roda num pool de processos dedicado
+(PASSWORD_POOL_WORKERS) com admissão limitada: com PASSWORD_POOL_MAX_PENDING
+chamadas já em andamento/na fila, a próxima é recusada na hora com
+`PasswordPoolSaturated` em vez de esperar (a API responde 503 com Retry-After).
+PASSWORD_POOL_WORKERS=0 executa no próprio processo (scripts).
+"""
+
+import multiprocessing as mp
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
 from passlib.context import CryptContext
 
+from backend.core.config import settings
+
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_LATENCY_WINDOW = 1024  # amostras recentes para os percentis
+
+
+class PasswordPoolSaturated(Exception):
+    """Pool de senhas sem vaga (admissão) ou sem resposta no prazo: tente de novo depois."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("AUTH_BUSY")
+        self.retry_after = retry_after
+
+
+# -------------------------
+# Funções executadas no worker (nível de módulo: precisam ser importáveis no spawn)
+# -------------------------
+
+
+def _hash_worker(password: str):
+    t0 = time.perf_counter()
+    return _pwd_context.hash(password), time.perf_counter() - t0
+
+
+def _verify_worker(password: str, password_hash: str):
+    t0 = time.perf_counter()
+    return _pwd_context.verify(password, password_hash), time.perf_counter() - t0
+
+
+def _noop():
+    return None
+
+
+# -------------------------
+# Pool
+# -------------------------
+
+
+class _PasswordPool:
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self._workers = workers
+        self._max_pending = max(1, max_pending)
+        self._timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._errors = 0
+        self._timeouts = 0
+        # (total, execução no worker) em segundos; espera na fila = total - execução
+        self._latencies: deque = deque(maxlen=_LATENCY_WINDOW)
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self._rejected += 1
+                raise PasswordPoolSaturated()
+            self._pending += 1
+            self._submitted += 1
+            executor = self._ensure_executor()
+
+        t0 = time.perf_counter()
+        fut = None
+        try:
+            fut = executor.submit(fn, *args)
+            # A vaga só é liberada quando o job termina (ou é cancelado), não quando o
+            # chamador desiste: senão a admissão subconta justamente sob sobrecarga
+            fut.add_done_callback(self._liberar)
+            result, exec_seconds = fut.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            # Ainda na fila: não roda mais. Já em execução: segue contando até terminar
+            fut.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise PasswordPoolSaturated()
+        except BrokenProcessPool:
+            # Worker morreu (OOM, kill): descarta o executor; a próxima chamada cria outro
+            with self._lock:
+                self._errors += 1
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            if fut is None:
+                self._liberar()  # submit falhou: nenhum callback vai liberar a vaga
+
+        with self._lock:
+            self._latencies.append((time.perf_counter() - t0, exec_seconds))
+        return result
+
+    def _liberar(self, _fut=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def warm_up(self) -> None:
+        """Sobe os processos agora (sem esperar), para o 1º login não pagar o spawn."""
+        with self._lock:
+            executor = self._ensure_executor()
+        for _ in range(self._workers):
+            executor.submit(_noop)
+
+    # Interno: chamar com self._lock adquirido
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: o worker não herda conexões nem threads do processo da API
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=mp.get_context("spawn")
+            )
+        return self._executor
+
+    def stats(self) -> dict:
+        with self._lock:
+            amostras = list(self._latencies)
+            base = {
+                "workers": self._workers,
+                "max_pending": self._max_pending,
+                "pending": self._pending,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "samples": len(amostras),
+            }
+        if amostras:
+            totais = sorted(a[0] for a in amostras)
+            filas = sorted(a[0] - a[1] for a in amostras)
+            execucoes = sorted(a[1] for a in amostras)
+            base["latency_ms"] = _percentis(totais)
+            base["queue_wait_ms"] = _percentis(filas)
+            base["exec_ms"] = _percentis(execucoes)
+        return base
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _percentis(ordenados) -> dict:
+    def p(q):
+        return round(ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))] * 1000, 1)
+
+    return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": p(1.0)}
+
+
+_pool: _PasswordPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _PasswordPool | None:
+    global _pool
+    if settings.PASSWORD_POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _PasswordPool(
+                    settings.PASSWORD_POOL_WORKERS,
+                    settings.PASSWORD_POOL_MAX_PENDING,
+                    settings.PASSWORD_POOL_TIMEOUT,
+                )
+    return _pool
+
+
+def password_pool_stats() -> dict:
+    pool = _get_pool()
+    return pool.stats() if pool is not None else {"workers": 0}
+
+
+def start_password_pool() -> None:
+    """Startup da aplicação: cria e aquece o pool (no-op com PASSWORD_POOL_WORKERS=0)."""
+    pool = _get_pool()
+    if pool is not None:
+        pool.warm_up()
+
+
+def stop_password_pool() -> None:
+    """Encerra os processos do pool (shutdown da aplicação)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+# -------------------------
+# API pública
+# -------------------------
+
 
 def hash_password(password: str) -> str:
     """
     Gera hash seguro (bcrypt) para senha em texto plano.
     """
-    return _pwd_context.hash(password)
+    pool = _get_pool()
+    if pool is None:
+        return _pwd_context.hash(password)
+    return pool.run(_hash_worker, password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """
     Verifica se a senha informada corresponde ao hash armazenado.
     """
-    return _pwd_context.verify(password, password_hash)
+    pool = _get_pool()
+    if pool is None:
+        return _pwd_context.verify(password, password_hash)
+    return pool.run(_verify_worker, password, password_hash)
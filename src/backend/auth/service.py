@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from fastapi import HTTPException
 
 from backend.auth.jwt import create_token
+from backend.auth.session_cache import session_cache
 from backend.core.config import ACCESS_TOKEN_EXPIRE, REFRESH_TOKEN_EXPIRE, settings
 from backend.core.logger import logger
 from backend.db import connect, execute, query
@@ -100,6 +101,9 @@ def logout_session(session_id: str):
     finally:
         conn.close()
 
+    # Revogação vale na hora (sem esperar o TTL do cache de sessão)
+    session_cache.invalidate_session(session_id)
+
 
 def issue_new_access_token(payload: dict) -> dict:
     session_id = payload.get("sid")
@@ -197,6 +201,9 @@ def issue_new_access_token(payload: dict) -> dict:
     finally:
         conn.close()
 
+    # Sessão antiga foi revogada na rotação
+    session_cache.invalidate_session(session_id)
+
     # 🔐 5️⃣ Emitir NOVOS tokens com novo sid
     new_access_token = create_token(
         {
@@ -251,6 +258,8 @@ def revoke_all_sessions(username: str, conn=None):
 
         if ows_connection:
             conn.commit()
+            session_cache.invalidate_user(username)
+        # Com a conexão do chamador, é ele quem invalida o cache após o commit
     except Exception:
         if ows_connection:
             conn.rollback()
@@ -276,6 +285,9 @@ def revoke_session_by_id(session_id: str):
     finally:
         conn.close()
 
+    # Revogação vale na hora (sem esperar o TTL do cache de sessão)
+    session_cache.invalidate_session(session_id)
+
 
 def cleanup_expired_sessions() -> int:
     conn = connect()
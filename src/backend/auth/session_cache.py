@@ -0,0 +1,167 @@
+"""
+Cache em memória das sessões validadas por `get_current_user`.
+
+- Limitado (max_size) com despejo LRU: a memória fica estável em workers de longa duração.
+- TTL por entrada: mudanças feitas por outros processos aparecem em até `ttl` segundos.
+- Invalidação explícita por sessão e por usuário, chamada pelas escritas de
+  backend.auth.service / backend.users.service: revogação vale na hora neste processo.
+- Geração: quem leu do banco antes de uma invalidação não consegue gravar o dado
+  velho de volta no cache (`put` com geração desatualizada é descartado).
+- Entre workers: cada `get` compara o token do estado compartilhado
+  (backend.auth.session_state) com o último visto; se outro worker revogou algo,
+  o cache local inteiro é descartado.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from backend.auth.session_state import criar_estado_sessoes
+from backend.core.config import settings
+from backend.core.logger import logger
+
+_NUNCA_VISTO = object()
+
+
+class SessionCache:
+    def __init__(self, max_size: int, ttl: float, shared=None):
+        self._max_size = max(1, max_size)
+        self._ttl = ttl
+        self._shared = shared
+        self._shared_seen = _NUNCA_VISTO
+        self._lock = threading.Lock()
+        # session_id -> (instante em time.monotonic(), username, rows)
+        self._entries: "OrderedDict[str, tuple[float, str, List[Dict[str, Any]]]]" = OrderedDict()
+        self._by_user: Dict[str, set] = {}
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+        self._remote_invalidations = 0
+
+    def generation(self) -> int:
+        """Capturar ANTES de ler do banco e repassar para `put`."""
+        return self._generation
+
+    def get(self, session_id: str) -> List[Dict[str, Any]] | None:
+        # Leitura O(1) do estado compartilhado, fora do lock
+        token = self._shared.current() if self._shared is not None else None
+        return self._lookup(session_id, token)
+
+    async def aget(self, session_id: str) -> List[Dict[str, Any]] | None:
+        """Versão async de `get` (o backend "db" lê o token pelo pool assíncrono)."""
+        token = await self._shared.acurrent() if self._shared is not None else None
+        return self._lookup(session_id, token)
+
+    def _lookup(self, session_id: str, token) -> List[Dict[str, Any]] | None:
+        with self._lock:
+            if self._shared is not None and (token is None or token != self._shared_seen):
+                # Revogação em outro worker (ou estado indisponível): descarta o cache local
+                if self._shared_seen is not _NUNCA_VISTO:
+                    self._remote_invalidations += 1
+                self._shared_seen = token
+                self._generation += 1
+                self._entries.clear()
+                self._by_user.clear()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            if time.monotonic() - entry[0] >= self._ttl:
+                self._remove(session_id)
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self._hits += 1
+            return entry[2]
+
+    def put(
+        self, session_id: str, username: str, rows: List[Dict[str, Any]], generation: int
+    ) -> None:
+        with self._lock:
+            if generation != self._generation:
+                # Houve invalidação durante a leitura do banco: o dado pode estar velho
+                self._stale_puts += 1
+                return
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._entries[session_id] = (time.monotonic(), username, rows)
+            self._by_user.setdefault(username, set()).add(session_id)
+            while len(self._entries) > self._max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_session(self, session_id: str) -> None:
+        """Chamar após o commit da revogação."""
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            self._remove(session_id)
+        self._publicar()
+
+    def invalidate_user(self, username: str) -> None:
+        """Chamar após o commit da revogação."""
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            for session_id in self._by_user.pop(username, ()):
+                self._entries.pop(session_id, None)
+        self._publicar()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "size": len(self._entries),
+                "users": len(self._by_user),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "stale_puts": self._stale_puts,
+                "remote_invalidations": self._remote_invalidations,
+                "shared_backend": settings.SESSION_STATE_BACKEND if self._shared else None,
+            }
+
+    def _publicar(self) -> None:
+        """Avisa os outros workers (troca o token compartilhado)."""
+        if self._shared is None:
+            return
+        try:
+            self._shared.bump()
+        except Exception as e:
+            logger.error(f"Falha ao publicar revogação de sessão: {e}")
+
+    # Interno: chamar com self._lock adquirido
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        sessions = self._by_user.get(entry[1])
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._by_user[entry[1]]
+
+
+session_cache = SessionCache(
+    settings.SESSION_CACHE_MAX_SIZE,
+    settings.SESSION_CACHE_TTL,
+    shared=criar_estado_sessoes(),
+)
@@ -0,0 +1,117 @@
+"""
+Estado de sessões compartilhado entre workers (uvicorn --workers N).
+
+Cada worker mantém seu próprio SessionCache; o que precisa ser compartilhado é só
+"houve revogação desde a última vez que olhei?". Isso é um token de geração:
+quem revoga troca o token (`bump`), e cada worker compara o token atual com o último
+visto antes de usar o cache (`current`) — uma leitura O(1) por requisição. Se mudou,
+o worker descarta o cache local e volta ao banco para as sessões seguintes.
+
+Backends (SESSION_STATE_BACKEND):
+- "memory": sem estado compartilhado (um worker): só a invalidação local do SessionCache.
+- "mmap":   arquivo de 8 bytes mapeado em memória (SESSION_STATE_PATH). Workers no
+            mesmo host enxergam a troca na hora, sem consulta ao banco.
+- "db":     linha única em session_state (V021). Uma consulta por PK por requisição;
+            serve também para vários hosts no mesmo banco.
+
+A interface (`current`/`acurrent`/`bump`) é a de um GET/INCR num store chave-valor estilo Redis;
+um backend remoto entraria aqui sem mudar o SessionCache.
+"""
+
+import mmap
+import os
+import secrets
+import struct
+
+from backend.core.config import settings
+from backend.core.logger import logger
+from backend.db import aconnection, aquery, connect, execute, query
+
+_U64 = struct.Struct("<Q")
+
+
+class MmapSessionState:
+    """
+    Token de 64 bits num arquivo compartilhado. `bump` grava um valor aleatório em vez
+    de incrementar: não precisa de lock entre processos (duas trocas simultâneas
+    continuam sendo uma troca para quem lê).
+    """
+
+    def __init__(self, path: str):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < _U64.size:
+                os.ftruncate(fd, _U64.size)
+            self._mm = mmap.mmap(fd, _U64.size)
+        finally:
+            os.close(fd)
+
+    def current(self) -> int | None:
+        return _U64.unpack_from(self._mm, 0)[0]
+
+    async def acurrent(self) -> int | None:
+        return self.current()  # leitura de memória: não bloqueia o loop
+
+    def bump(self) -> None:
+        _U64.pack_into(self._mm, 0, secrets.randbits(64))
+
+
+class DbSessionState:
+    def __init__(self):
+        self._falhou = False
+
+    _SQL = "SELECT generation FROM session_state WHERE id = 1"
+
+    def current(self) -> int | None:
+        conn = connect()
+        try:
+            rows = query(conn, self._SQL)
+        except Exception as e:
+            return self._falha(e)
+        finally:
+            conn.close()
+        return self._sucesso(rows)
+
+    async def acurrent(self) -> int | None:
+        try:
+            async with aconnection() as conn:
+                rows = await aquery(conn, self._SQL)
+        except Exception as e:
+            return self._falha(e)
+        return self._sucesso(rows)
+
+    def _falha(self, e: Exception) -> None:
+        # None = desconhecido: o SessionCache não confia no cache (vai ao banco)
+        if not self._falhou:
+            logger.warning(f"Estado de sessões indisponível: {e}")
+        self._falhou = True
+        return None
+
+    def _sucesso(self, rows) -> int | None:
+        self._falhou = False
+        return rows[0]["generation"] if rows else None
+
+    def bump(self) -> None:
+        # Chamar após o commit da revogação (conexão própria, commit próprio)
+        conn = connect()
+        try:
+            execute(conn, "UPDATE session_state SET generation = generation + 1 WHERE id = 1")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def criar_estado_sessoes():
+    backend = settings.SESSION_STATE_BACKEND
+    if backend == "memory":
+        return None
+    if backend == "mmap":
+        path = settings.SESSION_STATE_PATH
+        if not path:
+            if settings.DB_BACKEND != "sqlite":
+                raise RuntimeError("SESSION_STATE_PATH é obrigatório para o backend 'mmap'")
+            path = f"{settings.DB_DSN}.sessions"
+        return MmapSessionState(path)
+    if backend == "db":
+        return DbSessionState()
+    raise RuntimeError(f"SESSION_STATE_BACKEND desconhecido: {backend}")
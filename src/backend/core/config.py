@@ -19,10 +19,54 @@ class Settings(BaseSettings):
     # Database
     DB_BACKEND: str = "sqlite"
     DB_DSN: str
+    DB_POOL_SIZE: int = 8
+    DB_POOL_TIMEOUT: float = 10.0  # segundos aguardando conexão livre
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = 30.0  # valida conexões ociosas há mais que isso
+    DB_ASYNC_POOL_SIZE: int = 8  # conexões das rotas async (limita a concorrência no banco)
+    # Réplicas de leitura (DSNs separados por vírgula) para intent="read"; vazio = só primário
+    DB_REPLICA_DSNS: str = ""
+    DB_REPLICA_STRATEGY: str = "round_robin"  # "round_robin" | "least_latency"
+    DB_REPLICA_PROBE_INTERVAL: float = 5.0  # segundos entre sondas de saúde/latência
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # leituras da sessão no primário após escrever (0 = off)
+
+    # SQLite: PRAGMAs aplicados em toda conexão nova
+    # Perfis: "default" | "read-heavy" | "write-heavy"; os campos abaixo sobrescrevem o perfil
+    DB_SQLITE_PRAGMA_PROFILE: str = "default"
+    DB_SQLITE_JOURNAL_MODE: str | None = None
+    DB_SQLITE_SYNCHRONOUS: str | None = None
+    DB_SQLITE_BUSY_TIMEOUT_MS: int | None = None
+    DB_SQLITE_CACHE_SIZE: int | None = None  # negativo = KiB, positivo = páginas
+    DB_SQLITE_MMAP_SIZE: int | None = None  # bytes
+    DB_SQLITE_TEMP_STORE: str | None = None
+
+    # Auditoria: "sync" (commit por evento) | "group" (writer em grupo, commit por lote)
+    AUDIT_WRITE_MODE: str = "sync"
+    AUDIT_GROUP_COMMIT_INTERVAL_MS: float = 5.0
+    AUDIT_GROUP_COMMIT_MAX_EVENTS: int = 256
+    AUDIT_GROUP_ACK_TIMEOUT: float = 30.0  # segundos aguardando o commit do lote
+    # Verificação incremental (a partir do checkpoint); completa a cada N horas (0 = só sob demanda)
+    AUDIT_FULL_VERIFY_INTERVAL_HOURS: float = 24.0
+    AUDIT_VERIFY_WORKERS: int = 1  # > 1: verifica segmentos da cadeia em processos paralelos
+    AUDIT_MERKLE_BLOCK_SIZE: int = 1024  # eventos por bloco da árvore de Merkle
+    # Codificação do event_hash para eventos novos: 1 = JSON (legado), 2 = binária com tamanhos
+    AUDIT_HASH_VERSION: int = 2
+    # Cache do estado de bloqueio (IntegrityGuard): releitura do banco após N segundos
+    INTEGRITY_CACHE_TTL: float = 2.0
+    # Cache de sessões validadas (get_current_user): LRU limitado + TTL por entrada
+    SESSION_CACHE_MAX_SIZE: int = 10000
+    SESSION_CACHE_TTL: float = 30.0  # segundos
+    # Revogações entre workers: "memory" (1 worker) | "mmap" (arquivo compartilhado) | "db"
+    SESSION_STATE_BACKEND: str = "memory"
+    SESSION_STATE_PATH: str | None = None  # mmap; padrão: <DB_DSN>.sessions
 
     # User Password Managment
     PASSWORD_VALIDITY_DAYS: int = 30
     PASSWORD_EXPIRATION_WARNING_DAYS: int = 7
+    # bcrypt em pool de processos; 0 = no próprio processo
+    PASSWORD_POOL_WORKERS: int = 2
+    # Chamadas em andamento/na fila acima disso recebem 503 na hora (abaixo do threadpool: 40)
+    PASSWORD_POOL_MAX_PENDING: int = 16
+    PASSWORD_POOL_TIMEOUT: float = 10.0  # segundos aguardando o resultado
 
     SMTP_HOST: str
     SMTP_PORT: int
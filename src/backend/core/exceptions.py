@@ -5,6 +5,7 @@ from fastapi.exceptions import HTTPException as FastAPIHTTPException
 from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 
+from backend.auth.passwords import PasswordPoolSaturated
 from backend.core.config import settings
 
 
@@ -18,6 +19,7 @@ def register_exception_handlers(app: FastAPI, logger: Logger):
         return JSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail},
+            headers=exc.headers,
         )
 
 
@@ -28,3 +30,14 @@ def register_rate_limit_exception(app: FastAPI):
             status_code=429,
             content={"detail": "RATE_LIMIT_EXCEEDED"},
         )
+
+
+def register_password_pool_exception(app: FastAPI):
+    @app.exception_handler(PasswordPoolSaturated)
+    async def password_pool_handler(request: Request, exc: PasswordPoolSaturated):
+        # Sobrecarga do bcrypt: o cliente deve tentar de novo em instantes
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "AUTH_BUSY"},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
@@ -1,6 +1,43 @@
-from typing import Any, Dict, List
-
-from backend.db import connect, execute, normalize_error, query
+import base64
+import json
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from backend.db import (
+    aconnection,
+    aquery,
+    backend_name,
+    begin_write,
+    connect,
+    copy_rows,
+    execute,
+    executemany,
+    iter_query,
+    normalize_error,
+    query,
+)
+
+# Tamanho de lote para leituras em streaming (fetchmany)
+_STREAM_CHUNK_SIZE = 500
+
+# Imagem "antes" lida dentro da transação de escrita: no SQLite o BEGIN IMMEDIATE
+# já bloqueia outros escritores; no Postgres o lock é da linha.
+_FOR_UPDATE = "" if backend_name() == "sqlite" else " FOR UPDATE"
+
+# Upsert por (data, categoria). SQLite: view vw_registros_upsert (gatilho INSTEAD OF, V003).
+# Postgres: ON CONFLICT direto na tabela (migrations/postgres/V003 não cria a view);
+# atualizado_em vem do gatilho BEFORE UPDATE.
+_UPSERT_SQL = (
+    "INSERT INTO vw_registros_upsert (data, categoria, valor, origem) "
+    "VALUES (:data, :categoria, :valor, :origem)"
+    if backend_name() == "sqlite"
+    else "INSERT INTO registros (data, categoria, valor, origem) "
+    "VALUES (:data, :categoria, :valor, :origem) "
+    "ON CONFLICT (data, categoria) DO UPDATE SET "
+    "valor = EXCLUDED.valor, origem = COALESCE(EXCLUDED.origem, registros.origem)"
+)
+
+# Linhas por transação na carga em lote (também limita o nº de parâmetros do SELECT de ids)
+BULK_CHUNK_SIZE = 500
 
 
 def obter_registro_por_id(id_) -> Dict[str, Any] | None:
@@ -63,6 +100,428 @@ def listar_registros() -> List[Dict[str, Any]]:
         conn.close()
 
 
+def encode_cursor(data: str, id_: int) -> str:
+    """
+    Cursor opaco para paginação keyset sobre (data, id).
+    """
+    raw = json.dumps([data, id_], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data, id_ = json.loads(raw)
+        return str(data), int(id_)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def _filtros_registros(
+    *,
+    categoria: str | None,
+    data_inicio: str | None,
+    data_fim: str | None,
+    cursor: str | None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Monta o WHERE dos filtros. Com `categoria` (igualdade) + faixa de `data`,
+    o SQLite usa ix_registros_categoria_data, que já entrega a ordem (data, id).
+    """
+    sql = """
+        SELECT id, data, categoria, valor
+          FROM registros
+         WHERE 1=1
+    """
+    params: Dict[str, Any] = {}
+
+    if categoria:
+        sql += " AND categoria = :categoria"
+        params["categoria"] = categoria
+
+    if data_inicio:
+        sql += " AND data >= :data_inicio"
+        params["data_inicio"] = data_inicio
+
+    if data_fim:
+        sql += " AND data <= :data_fim"
+        params["data_fim"] = data_fim
+
+    # 🔑 Keyset: continua estritamente "depois" do último item da página anterior
+    if cursor:
+        c_data, c_id = decode_cursor(cursor)
+        sql += " AND (data, id) < (:c_data, :c_id)"
+        params["c_data"] = c_data
+        params["c_id"] = c_id
+
+    sql += " ORDER BY data DESC, id DESC"
+    return sql, params
+
+
+def _row_to_registro(r) -> Dict[str, Any]:
+    return {"id": r[0], "data": r[1], "categoria": r[2], "valor": r[3]}
+
+
+def _sql_pagina(
+    *,
+    categoria: str | None,
+    data_inicio: str | None,
+    data_fim: str | None,
+    cursor: str | None,
+    limit: int | None,
+) -> Tuple[str, Dict[str, Any]]:
+    # Busca limit + 1 linhas para saber se existe próxima página sem COUNT(*)
+    sql, params = _filtros_registros(
+        categoria=categoria, data_inicio=data_inicio, data_fim=data_fim, cursor=cursor
+    )
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit + 1
+    return sql, params
+
+
+def _montar_pagina(rows, limit: int | None) -> Tuple[List[Dict[str, Any]], str | None]:
+    registros = [_row_to_registro(r) for r in rows[:limit]]
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        ultimo = registros[-1]
+        next_cursor = encode_cursor(ultimo["data"], ultimo["id"])
+    return registros, next_cursor
+
+
+def listar_registros_pagina(
+    *,
+    categoria: str | None = None,
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = 500,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """
+    Retorna (registros, next_cursor). next_cursor é None na última página.
+    `limit=None`: todos os registros filtrados, numa página só.
+    """
+    sql, params = _sql_pagina(
+        categoria=categoria, data_inicio=data_inicio, data_fim=data_fim, cursor=cursor, limit=limit
+    )
+
+    conn = connect(intent="read")
+    try:
+        rows = query(conn, sql, params)
+    except Exception as exc:
+        raise normalize_error(exc)
+    finally:
+        conn.close()
+
+    return _montar_pagina(rows, limit)
+
+
+async def listar_registros_pagina_async(
+    *,
+    categoria: str | None = None,
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = 500,
+    conn=None,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Versão async de `listar_registros_pagina` (pool assíncrono, sem threadpool)."""
+    sql, params = _sql_pagina(
+        categoria=categoria, data_inicio=data_inicio, data_fim=data_fim, cursor=cursor, limit=limit
+    )
+
+    try:
+        if conn is None:
+            async with aconnection(intent="read") as conn:
+                rows = await aquery(conn, sql, params)
+        else:
+            rows = await aquery(conn, sql, params)
+    except Exception as exc:
+        raise normalize_error(exc)
+
+    return _montar_pagina(rows, limit)
+
+
+# Versão de registros (V022): contador mantido por gatilhos, base do ETag das listagens
+_SQL_VERSAO = "SELECT instancia, versao, modificado_em FROM registros_versao WHERE id = 1"
+
+
+def _row_to_versao(rows) -> Dict[str, Any]:
+    r = rows[0]
+    return {"instancia": r[0], "versao": r[1], "modificado_em": r[2]}
+
+
+def obter_versao_registros(conn) -> Dict[str, Any]:
+    """
+    {"instancia", "versao", "modificado_em"}. Ler ANTES dos dados, na mesma conexão:
+    assim os dados entregues são no mínimo tão novos quanto a versão anunciada.
+    """
+    try:
+        return _row_to_versao(query(conn, _SQL_VERSAO))
+    except Exception as exc:
+        raise normalize_error(exc)
+
+
+async def obter_versao_registros_async(conn) -> Dict[str, Any]:
+    try:
+        return _row_to_versao(await aquery(conn, _SQL_VERSAO))
+    except Exception as exc:
+        raise normalize_error(exc)
+
+
+# -------------------------
+# Feed de mudanças (V023): GET /registros/changes?since=<token>
+# -------------------------
+
+# Lápides só interessam a quem já tem dados (since > 0); a carga inicial as ignora
+_SQL_MUDANCAS = """
+    SELECT m.versao, m.registro_id, m.excluido, r.data, r.categoria, r.valor
+      FROM registros_mudancas m
+      LEFT JOIN registros r ON r.id = m.registro_id
+     WHERE m.versao > :desde AND m.versao <= :ate
+       AND (m.excluido = 0 OR :desde > 0)
+     ORDER BY m.versao
+     LIMIT :limit
+"""
+
+
+def encode_token_mudancas(instancia: str, versao: int) -> str:
+    return f"{instancia}-{versao}"
+
+
+def decode_token_mudancas(token: str) -> Tuple[str, int]:
+    try:
+        instancia, versao = token.rsplit("-", 1)
+        return instancia, int(versao)
+    except Exception:
+        raise ValueError("Token de mudanças inválido")
+
+
+async def listar_mudancas_async(
+    *,
+    since: str | None = None,
+    limit: int = 5000,
+    conn=None,
+) -> Dict[str, Any]:
+    """
+    Mudanças em registros desde o token `since` (de uma resposta anterior).
+
+    {"token", "reset", "has_more", "upserts", "deletes"}:
+    - upserts: estado atual dos registros inseridos/alterados; deletes: ids excluídos.
+    - reset=True: sem `since`, ou token de outra instância do banco (recriado/restaurado):
+      o cliente descarta o estado local e aplica a resposta como carga completa.
+    - has_more=True: repetir com `since=token` até False.
+    """
+    instancia_cliente, desde = decode_token_mudancas(since) if since else (None, 0)
+
+    async def _ler(conn):
+        # ⚡ Versão primeiro: o teto fixa o recorte (mudanças depois dele ficam para a
+        # próxima chamada, mesmo que a consulta abaixo já as enxergue)
+        versao = _row_to_versao(await aquery(conn, _SQL_VERSAO))
+        inicio = desde if instancia_cliente == versao["instancia"] else 0
+        rows = await aquery(
+            conn,
+            _SQL_MUDANCAS,
+            {"desde": inicio, "ate": versao["versao"], "limit": limit + 1},
+        )
+        return versao, rows
+
+    try:
+        if conn is None:
+            async with aconnection(intent="read") as conn:
+                versao, rows = await _ler(conn)
+        else:
+            versao, rows = await _ler(conn)
+    except Exception as exc:
+        raise normalize_error(exc)
+
+    reset = instancia_cliente != versao["instancia"]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Página cheia: retoma da última versão entregue; senão, do teto
+    ate = rows[-1][0] if has_more else versao["versao"]
+
+    upserts: List[Dict[str, Any]] = []
+    deletes: List[int] = []
+    for r in rows:
+        if r[2] or r[3] is None:
+            deletes.append(r[1])
+        else:
+            upserts.append({"id": r[1], "data": r[3], "categoria": r[4], "valor": r[5]})
+
+    return {
+        "token": encode_token_mudancas(versao["instancia"], ate),
+        "reset": reset,
+        "has_more": has_more,
+        "upserts": upserts,
+        "deletes": deletes,
+    }
+
+
+def iterar_registros(
+    *,
+    categoria: str | None = None,
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gerador para streaming: lê em lotes (fetchmany) sem materializar a tabela.
+    Usa conexão dedicada, pois o gerador pode ser retomado em outra thread.
+    """
+    sql, params = _filtros_registros(
+        categoria=categoria, data_inicio=data_inicio, data_fim=data_fim, cursor=cursor
+    )
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+
+    conn = connect(dedicated=True, intent="read")
+    try:
+        for r in iter_query(conn, sql, params, _STREAM_CHUNK_SIZE):
+            yield _row_to_registro(r)
+    finally:
+        conn.close()
+
+
+# Expressão de agrupamento por período (data é TEXT 'YYYY-MM-DD'; semana começa na segunda)
+_BUCKET_SQL = {
+    "sqlite": {
+        "day": "data",
+        "week": "date(data, '-6 days', 'weekday 1')",
+        "month": "strftime('%Y-%m-01', data)",
+    },
+    "postgres": {
+        "day": "data",
+        "week": "to_char(date_trunc('week', data::date), 'YYYY-MM-DD')",
+        "month": "to_char(date_trunc('month', data::date), 'YYYY-MM-DD')",
+    },
+}
+
+
+def listar_categorias(conn=None) -> List[str]:
+    """
+    Lê do rollup (V017): O(categorias x meses), sem varrer registros.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect(intent="read")
+    try:
+        rows = query(conn, "SELECT DISTINCT categoria FROM registros_rollup ORDER BY categoria")
+        return [r[0] for r in rows]
+    except Exception as exc:
+        raise normalize_error(exc)
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def agregar_registros(
+    *,
+    categoria: str | None = None,
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+    bucket: str = "day",
+    conn=None,
+) -> Dict[str, Any]:
+    """
+    Agregações calculadas no banco para o painel:
+    - totais: count/sum/min/max e período por categoria
+    - series: pontos por período (dia/semana/mês) por categoria
+    Sem filtro de data, totais e séries mensais vêm do rollup (registros_rollup).
+    Demais casos: com `categoria`, SEARCH em ix_registros_categoria_data.
+    """
+    dialect = "sqlite" if backend_name() == "sqlite" else "postgres"
+    bucket_sql = _BUCKET_SQL[dialect].get(bucket)
+    if bucket_sql is None:
+        raise ValueError(f"Bucket inválido: {bucket}")
+
+    where = " WHERE 1=1"
+    params: Dict[str, Any] = {}
+
+    if categoria:
+        where += " AND categoria = :categoria"
+        params["categoria"] = categoria
+
+    if data_inicio:
+        where += " AND data >= :data_inicio"
+        params["data_inicio"] = data_inicio
+
+    if data_fim:
+        where += " AND data <= :data_fim"
+        params["data_fim"] = data_fim
+
+    # ⚡ Rollup só cobre meses inteiros: usado quando não há recorte de datas
+    usar_rollup = not data_inicio and not data_fim
+
+    if usar_rollup:
+        sql_totais = f"""
+            SELECT categoria, SUM(count), SUM(sum), MIN(min), MAX(max),
+                   MIN(data_min), MAX(data_max)
+              FROM registros_rollup
+            {where}
+             GROUP BY categoria
+             ORDER BY categoria
+        """
+    else:
+        sql_totais = f"""
+            SELECT categoria, COUNT(*), SUM(valor), MIN(valor), MAX(valor),
+                   MIN(data), MAX(data)
+              FROM registros
+            {where}
+             GROUP BY categoria
+             ORDER BY categoria
+        """
+
+    if usar_rollup and bucket == "month":
+        sql_series = f"""
+            SELECT categoria, bucket, count, sum, min, max
+              FROM registros_rollup
+            {where}
+             ORDER BY categoria, bucket
+        """
+    else:
+        sql_series = f"""
+            SELECT categoria, {bucket_sql} AS bucket,
+                   COUNT(*), SUM(valor), MIN(valor), MAX(valor)
+              FROM registros
+            {where}
+             GROUP BY categoria, bucket
+             ORDER BY categoria, bucket
+        """
+
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect(intent="read")
+    try:
+        totais = [
+            {
+                "categoria": r[0],
+                "count": r[1],
+                "sum": r[2],
+                "min": r[3],
+                "max": r[4],
+                "data_min": r[5],
+                "data_max": r[6],
+            }
+            for r in query(conn, sql_totais, params)
+        ]
+
+        series: Dict[str, List[Dict[str, Any]]] = {}
+        for r in query(conn, sql_series, params):
+            series.setdefault(r[0], []).append(
+                {"bucket": r[1], "count": r[2], "sum": r[3], "min": r[4], "max": r[5]}
+            )
+    except Exception as exc:
+        raise normalize_error(exc)
+    finally:
+        if owns_conn:
+            conn.close()
+
+    return {"bucket": bucket, "totais": totais, "series": series}
+
+
 def inserir_registro(registro, origem: str = "streamlit") -> None:
     conn = connect()
     try:
@@ -137,10 +596,10 @@ def upsert_registro(registro, origem: str = "streamlit") -> None:
     """
     conn = connect()
     try:
-        # Insere na VIEW; o gatilho INSTEAD OF converte em INSERT ... ON CONFLICT ... faz UPDATE
+        # SQLite: insere na VIEW; o gatilho INSTEAD OF converte em INSERT ... ON CONFLICT
         execute(
             conn,
-            "INSERT INTO vw_registros_upsert (data, categoria, valor, origem) VALUES (:data, :categoria, :valor, :origem)",
+            _UPSERT_SQL,
             {
                 "data": registro.data,
                 "categoria": registro.categoria,
@@ -157,42 +616,224 @@ def upsert_registro(registro, origem: str = "streamlit") -> None:
         conn.close()
 
 
-def atualizar_registro_com_auditoria(id_, registro):
+def _upsert_lote(conn, params: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """
+    Grava um lote (sem commit) e retorna {(data, categoria): id}.
+    - SQLite: executemany na view + um único SELECT dos ids (a view não aceita RETURNING).
+    - Postgres: COPY numa tabela temporária + um único INSERT ... SELECT ... ON CONFLICT
+      ... RETURNING. Chaves repetidas no lote: vale a última (como no executemany).
+    """
+    if backend_name() != "sqlite":
+        execute(
+            conn,
+            "CREATE TEMP TABLE IF NOT EXISTS _registros_stage ("
+            "seq INTEGER, data TEXT, categoria TEXT, valor INTEGER, origem TEXT"
+            ") ON COMMIT DELETE ROWS",
+        )
+        copy_rows(
+            conn,
+            "_registros_stage",
+            ("seq", "data", "categoria", "valor", "origem"),
+            (
+                (i, p["data"], p["categoria"], p["valor"], p["origem"])
+                for i, p in enumerate(params)
+            ),
+        )
+        rows = query(
+            conn,
+            "INSERT INTO registros (data, categoria, valor, origem) "
+            "SELECT DISTINCT ON (data, categoria) data, categoria, valor, origem "
+            "FROM _registros_stage ORDER BY data, categoria, seq DESC "
+            "ON CONFLICT (data, categoria) DO UPDATE SET "
+            "valor = EXCLUDED.valor, origem = COALESCE(EXCLUDED.origem, registros.origem) "
+            "RETURNING id, data, categoria",
+        )
+        return {(r[1], r[2]): r[0] for r in rows}
+
+    executemany(conn, _UPSERT_SQL, params)
+
+    # 🔍 ids do lote: um único SELECT por lote
+    chaves = sorted({(p["data"], p["categoria"]) for p in params})
+    filtro = " OR ".join(f"(data = :d{i} AND categoria = :c{i})" for i in range(len(chaves)))
+    filtro_params: Dict[str, Any] = {}
+    for i, (d, c) in enumerate(chaves):
+        filtro_params[f"d{i}"] = d
+        filtro_params[f"c{i}"] = c
+    return {
+        (r[1], r[2]): r[0]
+        for r in query(
+            conn,
+            f"SELECT id, data, categoria FROM registros WHERE {filtro}",
+            filtro_params,
+        )
+    }
+
+
+def upsert_registros_bulk(
+    registros: Sequence[Any],
+    *,
+    origem: str = "bulk",
+    chunk_size: int = BULK_CHUNK_SIZE,
+    auditar: Callable[[Any, List[Dict[str, Any]]], None] | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Upsert em lote (mesma semântica de upsert_registro).
+
+    - Cada lote de `chunk_size` linhas é UMA transação: a gravação do lote
+      (`_upsert_lote`) e `auditar(conn, linhas)` na MESMA conexão,
+      antes do commit. Assim o evento de auditoria do lote entra na cadeia de hash
+      enquanto o lock de escrita está retido, sem bifurcar a cadeia.
+    - Falha em um lote faz rollback apenas daquele lote; os demais seguem.
+    Retorna um resultado por linha, na ordem de entrada: {"status", "id" | "detail"}.
+    """
+    resultados: List[Dict[str, Any]] = []
+
+    conn = connect()
+    try:
+        for inicio in range(0, len(registros), chunk_size):
+            lote = registros[inicio : inicio + chunk_size]
+            params = [
+                {
+                    "data": str(r.data),
+                    "categoria": r.categoria,
+                    "valor": r.valor,
+                    "origem": origem,
+                }
+                for r in lote
+            ]
+
+            try:
+                ids = _upsert_lote(conn, params)
+
+                linhas = [
+                    {
+                        "id": ids.get((p["data"], p["categoria"])),
+                        "data": p["data"],
+                        "categoria": p["categoria"],
+                        "valor": p["valor"],
+                    }
+                    for p in params
+                ]
+
+                if auditar is not None:
+                    auditar(conn, linhas)
+
+                conn.commit()
+            except Exception as exc:
+                conn.rollback()
+                detail = str(normalize_error(exc))
+                resultados.extend({"status": "error", "detail": detail} for _ in lote)
+                continue
+
+            resultados.extend({"status": "ok", "id": linha["id"]} for linha in linhas)
+    finally:
+        conn.close()
+
+    return resultados
+
+
+def upsert_registro_com_auditoria(
+    registro, origem: str = "streamlit", conn=None
+) -> Tuple[Dict[str, Any] | None, Dict[str, Any]]:
+    """
+    Upsert via view (mesma regra de upsert_registro) e retorna (antes, depois),
+    numa única conexão/transação de escrita. `antes` é None quando foi INSERT.
+    Com `conn` informado, quem chama faz o commit (ex.: junto com a auditoria).
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect()
+
+    chave = {"data": str(registro.data), "categoria": registro.categoria}
+    try:
+        begin_write(conn)
+
+        rows = query(
+            conn,
+            "SELECT id, data, categoria, valor FROM registros "
+            "WHERE data = :data AND categoria = :categoria" + _FOR_UPDATE,
+            chave,
+        )
+        antes = _row_to_registro(rows[0]) if rows else None
+
+        # A view não aceita RETURNING: o "depois" é lido na mesma transação
+        execute(
+            conn,
+            _UPSERT_SQL,
+            {**chave, "valor": registro.valor, "origem": origem},
+        )
+        rows = query(
+            conn,
+            "SELECT id, data, categoria, valor FROM registros "
+            "WHERE data = :data AND categoria = :categoria",
+            chave,
+        )
+        depois = _row_to_registro(rows[0])
+
+        if owns_conn:
+            conn.commit()
+        return antes, depois
+
+    except Exception as exc:
+        if owns_conn:
+            conn.rollback()
+        raise normalize_error(exc)
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def atualizar_registro_com_auditoria(id_, registro, conn=None):
     """
     Atualiza um registro por ID e retorna (antes, depois).
     Retorna None se o registro não existir.
+    Antes e depois vêm da MESMA transação de escrita (UPDATE ... RETURNING).
+    Com `conn` informado, quem chama faz o commit.
     """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect()
 
-    conn = connect()
     try:
-        antes = obter_registro_por_id(id_)
-        if not antes:
+        begin_write(conn)
+
+        rows = query(
+            conn,
+            "SELECT id, data, categoria, valor FROM registros WHERE id = :id" + _FOR_UPDATE,
+            {"id": id_},
+        )
+        if not rows:
             return None
+        antes = _row_to_registro(rows[0])
 
-        execute(
+        rows = query(
             conn,
             """
             UPDATE registros
                SET data = :data, categoria = :categoria, valor = :valor
              WHERE id = :id
+            RETURNING id, data, categoria, valor
             """,
             {
-                "data": registro.data,
+                "data": str(registro.data),
                 "categoria": registro.categoria,
                 "valor": registro.valor,
                 "id": id_,
             },
         )
+        depois = _row_to_registro(rows[0])
 
-        conn.commit()
-        depois = obter_registro_por_id(id_)
+        if owns_conn:
+            conn.commit()
         return antes, depois
 
     except Exception as exc:
-        conn.rollback()
+        if owns_conn:
+            conn.rollback()
         raise normalize_error(exc)
     finally:
-        conn.close()
+        if owns_conn:
+            conn.close()
 
 
 def atualizar_registro(id_, registro) -> bool:
@@ -232,25 +873,31 @@ def atualizar_registro(id_, registro) -> bool:
         conn.close()
 
 
-def deletar_registro_com_auditoria(id_) -> None:
-    conn = connect()
-    try:
-        antes = obter_registro_por_id(id_)
-        if not antes:
-            return None
+def deletar_registro_com_auditoria(id_, conn=None) -> Dict[str, Any] | None:
+    """
+    Exclui por ID e retorna a imagem "antes" (DELETE ... RETURNING), ou None
+    se o registro não existir. Com `conn` informado, quem chama faz o commit.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect()
 
-        execute(
+    try:
+        rows = query(
             conn,
-            "DELETE FROM registros WHERE id = :id",
+            "DELETE FROM registros WHERE id = :id RETURNING id, data, categoria, valor",
             {"id": id_},
         )
-        conn.commit()
-        return antes
+        if owns_conn:
+            conn.commit()
+        return _row_to_registro(rows[0]) if rows else None
     except Exception as exc:
-        conn.rollback()
+        if owns_conn:
+            conn.rollback()
         raise normalize_error(exc)
     finally:
-        conn.close()
+        if owns_conn:
+            conn.close()
 
 
 def deletar_registro(id_) -> None:
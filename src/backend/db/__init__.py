@@ -1,19 +1,238 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
 from backend.core.config import settings
 
+from .pool import ConnectionPool, PooledConnection
+from .routing import INTENT_READ, INTENT_WRITE, ReplicaRouter
+
 _BACKEND = settings.DB_BACKEND
 _DSN = settings.DB_DSN
+# Réplicas de leitura (separadas por vírgula); vazio = tudo no primário
+_REPLICA_DSNS = [d.strip() for d in (settings.DB_REPLICA_DSNS or "").split(",") if d.strip()]
 
 if _BACKEND == "sqlite":
     from . import sqlite_adapter as _adapter
+
+    _PRAGMAS = _adapter.resolve_pragmas(
+        settings.DB_SQLITE_PRAGMA_PROFILE,
+        {
+            "journal_mode": settings.DB_SQLITE_JOURNAL_MODE,
+            "synchronous": settings.DB_SQLITE_SYNCHRONOUS,
+            "busy_timeout": settings.DB_SQLITE_BUSY_TIMEOUT_MS,
+            "cache_size": settings.DB_SQLITE_CACHE_SIZE,
+            "mmap_size": settings.DB_SQLITE_MMAP_SIZE,
+            "temp_store": settings.DB_SQLITE_TEMP_STORE,
+        },
+    )
+    _POOL_OPTIONS = {"pragmas": _PRAGMAS}
 else:
     from . import postgres_adapter as _adapter
 
-connect = _adapter.connect
+    _PRAGMAS = {}
+    _POOL_OPTIONS = {}
+
+begin_write = _adapter.begin_write
+copy_rows = _adapter.copy_rows
 execute = _adapter.execute
 executemany = _adapter.executemany
+iter_query = _adapter.iter_query
 query = _adapter.query
 normalize_error = _adapter.normalize_error
 
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+_router: ReplicaRouter | None = None
+
+
+def _create_pool(dsn: str | None) -> ConnectionPool:
+    return _adapter.create_pool(
+        dsn,
+        max_size=settings.DB_POOL_SIZE,
+        timeout=settings.DB_POOL_TIMEOUT,
+        health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL,
+        **_POOL_OPTIONS,
+    )
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = _create_pool(_DSN)
+                if _REPLICA_DSNS:
+                    # Commit no primário marca a sessão da requisição (read-your-writes)
+                    pool.on_commit = lambda: get_router().mark_write()
+                _pool = pool
+    return _pool
+
+
+def get_router() -> ReplicaRouter | None:
+    """Roteador de leituras; None sem DB_REPLICA_DSNS."""
+    global _router
+    if _router is None and _REPLICA_DSNS:
+        with _pool_lock:
+            if _router is None:
+                _router = ReplicaRouter(
+                    [(d, _create_pool(d)) for d in _REPLICA_DSNS],
+                    ping=lambda conn: _adapter.query(conn, "SELECT 1"),
+                    strategy=settings.DB_REPLICA_STRATEGY,
+                    probe_interval=settings.DB_REPLICA_PROBE_INTERVAL,
+                    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+                )
+    return _router
+
+
+def connect(*, dedicated: bool = False, intent: str = INTENT_WRITE) -> PooledConnection:
+    """
+    Retorna uma conexão do pool. `conn.close()` devolve a conexão ao pool.
+    Chamadas aninhadas na mesma thread reutilizam a mesma conexão (num SAVEPOINT:
+    o commit delas só vale se a transação de fora também fizer commit),
+    exceto com `dedicated=True` (geradores/streaming, commit próprio e durável).
+    `intent="read"`: réplica de leitura, se configurada (ver backend.db.routing).
+    """
+    if intent == INTENT_READ and _REPLICA_DSNS:
+        router = get_router()
+        replica = router.choose()
+        if replica is not None:
+            try:
+                return replica.pool.acquire(dedicated=dedicated)
+            except Exception as exc:
+                # Réplica fora: a leitura segue no primário
+                router.report_failure(replica, exc)
+    elif intent not in (INTENT_READ, INTENT_WRITE):
+        raise ValueError(f"intent desconhecido: {intent!r}")
+    return get_pool().acquire(dedicated=dedicated)
+
+
+@contextmanager
+def connection(*, dedicated: bool = False, intent: str = INTENT_WRITE):
+    """
+    Context manager: `with connection() as conn: ...`
+    """
+    conn = connect(dedicated=dedicated, intent=intent)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def replica_stats() -> dict:
+    """Estado das réplicas (saúde, latência, leituras); vazio sem réplicas."""
+    router = get_router()
+    return router.stats() if router is not None else {}
+
+
+def close_pool() -> None:
+    global _pool, _router
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _router is not None:
+            _router.close()
+            _router = None
+
+
+# -------------------------
+# Async (rotas async def)
+# -------------------------
+
+# Um pool por banco (primário = None, réplicas pelo DSN), todos do mesmo event loop
+_apools: dict = {}
+_apool_loop = None
+
+
+def get_async_pool(replica_dsn: str | None = None):
+    """
+    Pool assíncrono do event loop corrente (do primário ou da réplica `replica_dsn`).
+    Criado sob demanda; se o loop mudou (os pools anteriores não podem ser
+    aguardados daqui), os anteriores são fechados e recriados.
+    """
+    global _apool_loop
+    loop = asyncio.get_running_loop()
+    if _apool_loop is not loop:
+        for pool in _apools.values():
+            pool.close_nowait()
+        _apools.clear()
+        _apool_loop = loop
+
+    pool = _apools.get(replica_dsn)
+    if pool is None:
+        pool = _apools[replica_dsn] = _adapter.create_async_pool(
+            replica_dsn or _DSN,
+            max_size=settings.DB_ASYNC_POOL_SIZE,
+            timeout=settings.DB_POOL_TIMEOUT,
+            **_POOL_OPTIONS,
+        )
+        if replica_dsn is None and _REPLICA_DSNS:
+            # Mesmo read-your-writes do pool síncrono (get_pool)
+            pool.on_commit = lambda: get_router().mark_write()
+    return pool
+
+
+async def _aacquire(intent: str):
+    if intent == INTENT_READ and _REPLICA_DSNS:
+        router = get_router()
+        replica = router.choose()
+        if replica is not None:
+            pool = get_async_pool(replica.dsn)
+            try:
+                return pool, await pool.acquire()
+            except Exception as exc:
+                router.report_failure(replica, exc)
+    elif intent not in (INTENT_READ, INTENT_WRITE):
+        raise ValueError(f"intent desconhecido: {intent!r}")
+    pool = get_async_pool()
+    return pool, await pool.acquire()
+
+
+@asynccontextmanager
+async def aconnection(*, intent: str = INTENT_WRITE):
+    """
+    `async with aconnection() as conn:` — conexão do pool assíncrono.
+    Use com `aquery`/`aexecute` e `await conn.commit()`.
+    `intent="read"`: réplica de leitura, se configurada.
+    """
+    pool, conn = await _aacquire(intent)
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+async def aquery(conn, sql: str, params: dict | None = None):
+    return await conn.query(sql, params)
+
+
+async def aexecute(conn, sql: str, params: dict | None = None):
+    return await conn.execute(sql, params)
+
+
+async def close_async_pool() -> None:
+    global _apool_loop
+    pools = list(_apools.values())
+    _apools.clear()
+    for pool in pools:
+        if _apool_loop is asyncio.get_running_loop():
+            await pool.close()
+        else:
+            pool.close_nowait()
+    _apool_loop = None
+
+
+def pragma_report() -> dict:
+    """
+    PRAGMAs efetivamente em vigor (solicitado x real) numa conexão do pool.
+    Vazio para backends que não são SQLite.
+    """
+    if _BACKEND != "sqlite":
+        return {}
+    with connection() as conn:
+        return _adapter.pragma_report(conn, _PRAGMAS)
+
 
 def backend_name() -> str:
     return _BACKEND
@@ -0,0 +1,179 @@
+"""
+Camada assíncrona do backend.db, para rotas `async def`.
+
+Rotas síncronas ocupam uma thread do threadpool do AnyIO (40) durante toda a
+requisição, inclusive esperando o banco. Aqui a espera é no event loop: a
+concorrência fica limitada pelo tamanho do pool assíncrono (DB_ASYNC_POOL_SIZE),
+não pelo número de threads.
+
+- `ThreadConfinedPool`: para drivers síncronos (sqlite3). Cada conexão vive presa a
+  uma thread própria (executor de 1 thread), como faz o aiosqlite; as chamadas são
+  enviadas para essa thread e aguardadas no loop, sem dependência nova.
+- O pool é do event loop em que foi criado (asyncio.Condition); `backend.db` recria o
+  pool se o loop mudar (ex.: TestClient sem `with`, scripts com vários asyncio.run).
+- Como no ConnectionPool síncrono, toda vaga liberada (devolução ou descarte)
+  acorda um `acquire()` em espera.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from .errors import PoolTimeoutError
+
+
+class ThreadConfinedConnection:
+    """Conexão síncrona + a única thread que a usa."""
+
+    __slots__ = ("_conn", "_executor", "_pool")
+
+    def __init__(self, conn, executor: ThreadPoolExecutor, pool: "ThreadConfinedPool"):
+        self._conn = conn
+        self._executor = executor
+        self._pool = pool
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs):
+        """Executa `fn(conn, *args, **kwargs)` na thread da conexão."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(fn, self._conn, *args, **kwargs)
+        )
+
+    async def query(self, sql: str, params: Dict[str, Any] | None = None):
+        return await self.run(self._pool._query, sql, params)
+
+    async def execute(self, sql: str, params: Dict[str, Any] | None = None):
+        return await self.run(self._pool._execute, sql, params)
+
+    async def commit(self) -> None:
+        await self.run(lambda c: c.commit())
+        hook = self._pool.on_commit
+        if hook is not None:
+            hook()
+
+    async def rollback(self) -> None:
+        await self.run(lambda c: c.rollback())
+
+
+class ThreadConfinedPool:
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        *,
+        query: Callable,
+        execute: Callable,
+        max_size: int = 8,
+        timeout: float = 10.0,
+        reset: Callable[[Any], None] | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size deve ser >= 1")
+        self._factory = factory
+        self._query = query
+        self._execute = execute
+        self._max_size = max_size
+        self._timeout = timeout
+        self._reset = reset
+        self._idle: list[ThreadConfinedConnection] = []
+        self._all: list[ThreadConfinedConnection] = []
+        self._size = 0  # inclui conexões sendo abertas
+        self._cond = asyncio.Condition()
+        self._closed = False
+        self._waits = 0
+        # Chamado após cada commit (ex.: read-your-writes em backend.db.routing)
+        self.on_commit: Callable[[], None] | None = None
+
+    async def acquire(self) -> ThreadConfinedConnection:
+        deadline = time.monotonic() + self._timeout
+
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Pool de conexões assíncrono encerrado")
+                if self._idle:
+                    return self._idle.pop(0)
+                if self._size < self._max_size:
+                    # Reserva a vaga antes do await (outra corrotina pode entrar aqui)
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão assíncrona livre em {self._timeout}s "
+                        f"(max_size={self._max_size})"
+                    )
+                self._waits += 1
+                try:
+                    await asyncio.wait_for(self._cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass  # reavalia: o prazo esgotado cai no raise acima
+
+        # Fora do lock: abrir a conexão não segura as outras corrotinas
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-aio")
+        try:
+            conn = await asyncio.get_running_loop().run_in_executor(executor, self._factory)
+        except Exception:
+            executor.shutdown(wait=False)
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        aconn = ThreadConfinedConnection(conn, executor, self)
+        self._all.append(aconn)
+        return aconn
+
+    async def release(self, aconn: ThreadConfinedConnection) -> None:
+        if self._reset is not None:
+            try:
+                await aconn.run(self._reset)
+            except Exception:
+                await self._discard(aconn)
+                return
+        if self._closed:
+            await self._discard(aconn)
+            return
+        async with self._cond:
+            self._idle.append(aconn)
+            self._cond.notify()
+
+    async def close(self) -> None:
+        self._closed = True
+        async with self._cond:
+            self._cond.notify_all()
+        for aconn in list(self._all):
+            await self._discard(aconn)
+
+    def close_nowait(self) -> None:
+        """Fecha sem aguardar (pool de um event loop que já não está em uso)."""
+        self._closed = True
+        for aconn in self._all:
+            aconn._executor.submit(aconn._conn.close)
+            aconn._executor.shutdown(wait=False)
+        self._all.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_size": self._max_size,
+            "size": self._size,
+            "idle": len(self._idle),
+            "waits": self._waits,
+        }
+
+    async def _discard(self, aconn: ThreadConfinedConnection) -> None:
+        if aconn in self._all:
+            self._all.remove(aconn)
+            async with self._cond:
+                self._size -= 1
+                # Vaga livre: quem espera em acquire() pode abrir uma conexão nova
+                self._cond.notify()
+        try:
+            await aconn.run(lambda c: c.close())
+        except Exception:
+            pass
+        aconn._executor.shutdown(wait=False)
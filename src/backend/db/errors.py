@@ -12,3 +12,7 @@ class ForeignKeyError(DBError):
 
 class NotFoundError(DBError):
     """Registro não encontrado (uso opcional no CRUD)."""
+
+
+class PoolTimeoutError(DBError):
+    """Nenhuma conexão disponível no pool dentro do tempo limite."""
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from .errors import PoolTimeoutError
+
+
+class PooledConnection:
+    """
+    Proxy fino sobre a conexão real do driver.
+
+    - Delega tudo para a conexão subjacente (cursor, commit, rollback...).
+    - `close()` NÃO fecha a conexão: devolve ao pool.
+    Assim todo o código existente (`conn = connect() ... finally: conn.close()`)
+    passa a reutilizar conexões sem nenhuma alteração.
+    - Aninhamento: um nível aberto com transação em curso roda num SAVEPOINT. Seu
+      `commit()` só libera o savepoint e seu `rollback()` só desfaz o próprio trabalho;
+      quem encerra a transação é o nível de fora.
+    - ⚠️ Contrato: o `commit()` de um nível aninhado NÃO é durável por si só. Se o
+      nível de fora fizer rollback (ou não fizer commit), o trabalho "confirmado" por
+      dentro é desfeito junto. Antes do pool cada `connect()` tinha a própria conexão
+      e o commit interno valia sozinho; quem precisa disso (ex.: eventos de auditoria
+      gravados sem `conn`) usa `acquire(dedicated=True)`, que não entra no aninhamento.
+    """
+
+    __slots__ = ("_conn", "_pool", "_depth", "_owner", "_last_used", "_savepoints")
+
+    def __init__(self, conn, pool: "ConnectionPool"):
+        self._conn = conn
+        self._pool = pool
+        self._depth = 0
+        self._owner: int | None = None
+        self._last_used = time.monotonic()
+        # Um item por nível aninhado: nome do savepoint, ou None (sem transação de fora)
+        self._savepoints: List[str | None] = []
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def _savepoint(self) -> str | None:
+        return self._savepoints[-1] if self._savepoints else None
+
+    def commit(self) -> None:
+        savepoint = self._savepoint()
+        if savepoint is not None:
+            # Confirma no savepoint e segue isolado dentro da transação de fora
+            self._conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            self._conn.execute(f"SAVEPOINT {savepoint}")
+            return
+        self._conn.commit()
+        hook = self._pool.on_commit
+        if hook is not None:
+            hook()
+
+    def rollback(self) -> None:
+        savepoint = self._savepoint()
+        if savepoint is not None:
+            self._conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            return
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._pool.release(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """
+    Pool de conexões limitado e com afinidade por thread.
+
+    - Tamanho máximo (`max_size`): acima disso, `acquire()` espera até `timeout`
+      segundos e então levanta `PoolTimeoutError`.
+    - Afinidade por thread: chamadas aninhadas na mesma thread (ex.: CRUD que chama
+      outro CRUD dentro de uma rota) recebem a MESMA conexão.
+      Isso evita deadlock do pool e mantém uma conexão por requisição.
+    - Health check: conexões ociosas há mais de `health_check_interval` segundos são
+      validadas (`validate`) antes de serem entregues; se falharem, são descartadas.
+    - Inicialização (PRAGMAs etc.) fica a cargo de `factory` e roda UMA vez por conexão.
+    - Na devolução, `reset` é chamado (ex.: rollback de transação esquecida aberta).
+    - `in_transaction` diz se a conexão tem transação aberta: um nível aninhado aberto
+      nesse estado ganha um SAVEPOINT (ver PooledConnection).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        *,
+        max_size: int = 8,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        validate: Callable[[Any], None] | None = None,
+        reset: Callable[[Any], None] | None = None,
+        in_transaction: Callable[[Any], bool] | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size deve ser >= 1")
+
+        self._factory = factory
+        self._max_size = max_size
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._validate = validate
+        self._reset = reset
+        self._in_transaction = in_transaction
+
+        self._idle: List[PooledConnection] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+        # Chamado após cada commit (ex.: read-your-writes em backend.db.routing)
+        self.on_commit: Callable[[], None] | None = None
+
+        # Métricas simples
+        self._created = 0
+        self._discarded = 0
+        self._waits = 0
+
+    # -------------------------
+    # Hooks (sobrescritos por pools específicos de driver)
+    # -------------------------
+
+    def _open(self):
+        return self._factory()
+
+    def _destroy(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _checkin(self, pooled: PooledConnection) -> None:
+        """Conexão saudável e já resetada de volta ao pool."""
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._destroy(pooled._conn)
+                return
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    # -------------------------
+    # API pública
+    # -------------------------
+
+    def acquire(self, *, dedicated: bool = False) -> PooledConnection:
+        """
+        `dedicated=True` ignora a afinidade por thread: sempre entrega uma conexão
+        exclusiva, não compartilhada com chamadas aninhadas. Use em geradores
+        (streaming), que suspendem e podem retomar em outra thread, e quando o
+        commit precisa ser durável independentemente da transação de quem chama.
+        """
+        if dedicated:
+            pooled = self._checkout()
+            pooled._depth = 1
+            return pooled
+
+        me = threading.get_ident()
+        held: PooledConnection | None = getattr(self._local, "conn", None)
+        # A referência local pode estar obsoleta se a conexão foi devolvida por outra
+        # thread (ex.: gerador de StreamingResponse consumido no threadpool).
+        if held is not None and held._owner == me and held._depth > 0:
+            savepoint = None
+            if self._in_transaction is not None and self._in_transaction(held._conn):
+                savepoint = f"pool_nivel_{held._depth}"
+                held._conn.execute(f"SAVEPOINT {savepoint}")
+            held._depth += 1
+            held._savepoints.append(savepoint)
+            return held
+
+        pooled = self._checkout()
+        pooled._depth = 1
+        pooled._owner = me
+        self._local.conn = pooled
+        return pooled
+
+    def release(self, pooled: PooledConnection) -> None:
+        if pooled._depth <= 0:
+            return  # close() duplicado: ignora, como sqlite3.Connection.close()
+
+        pooled._depth -= 1
+        if pooled._depth > 0:
+            savepoint = pooled._savepoints.pop()
+            if savepoint is not None:
+                # Trabalho não confirmado do nível interno é descartado, como no reset
+                try:
+                    pooled._conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    pooled._conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                except Exception:
+                    pass  # transação de fora já encerrada: nada a desfazer
+            return
+
+        pooled._savepoints.clear()
+
+        pooled._owner = None
+        if getattr(self._local, "conn", None) is pooled:
+            self._local.conn = None
+
+        try:
+            if self._reset is not None:
+                self._reset(pooled._conn)
+        except Exception:
+            self._discard(pooled)
+            return
+
+        pooled._last_used = time.monotonic()
+        self._checkin(pooled)
+
+    @contextmanager
+    def connection(self, *, dedicated: bool = False) -> Iterator[PooledConnection]:
+        conn = self.acquire(dedicated=dedicated)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._destroy(pooled._conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "max_size": self._max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "created": self._created,
+                "discarded": self._discarded,
+                "waits": self._waits,
+            }
+
+    # -------------------------
+    # Internos
+    # -------------------------
+
+    def _checkout(self) -> PooledConnection:
+        deadline = time.monotonic() + self._timeout
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError("Pool de conexões encerrado")
+
+                pooled = None
+                if self._idle:
+                    # LIFO: a conexão mais "quente" (cache de páginas, statements)
+                    pooled = self._idle.pop()
+                elif self._size < self._max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timeout aguardando conexão do pool (max_size={self._max_size})"
+                        )
+                    self._waits += 1
+                    self._cond.wait(remaining)
+                    continue
+
+            # Fora do lock: I/O (abrir conexão / health check) não bloqueia outras threads
+            if pooled is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+                return PooledConnection(conn, self)
+
+            if self._is_healthy(pooled):
+                return pooled
+
+            self._discard(pooled)
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        if self._validate is None:
+            return True
+        if time.monotonic() - pooled._last_used < self._health_check_interval:
+            return True
+        try:
+            self._validate(pooled._conn)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        self._destroy(pooled._conn)
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
@@ -1,52 +1,367 @@
 # backend/db/postgres_adapter.py
 from __future__ import annotations
 
-from typing import Any, Dict
+import itertools
+import re
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Sequence, Tuple
 
-from .errors import DBError, DuplicateKeyError, ForeignKeyError
+from .aio import ThreadConfinedPool
+from .errors import DBError, DuplicateKeyError, ForeignKeyError, PoolTimeoutError
+from .pool import ConnectionPool, PooledConnection
 
 try:
     import psycopg  # psycopg3
 except Exception:  # pragma: no cover
     psycopg = None
 
+try:
+    import psycopg_pool
+except Exception:  # pragma: no cover
+    psycopg_pool = None
+
+
+# Nomes únicos para cursores server-side
+_cursor_seq = itertools.count()
+
+
+class Row(tuple):
+    """
+    Linha com acesso por posição e por nome, como sqlite3.Row (`r[0]`, `r["id"]`,
+    `dict(r)`). O CRUD usa as duas formas; assim o mesmo código roda nos dois bancos.
+    """
+
+    __slots__ = ()
+    _names: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._names)
+
+
+def _row_factory(cursor):
+    """Row factory do psycopg: uma subclasse de Row por resultado (nomes das colunas)."""
+    desc = cursor.description
+    if desc is None:
+        return tuple
+    names = tuple(d.name for d in desc)
+    return type("Row", (Row,), {"__slots__": (), "_names": names, "_index": {n: i for i, n in enumerate(names)}})
+
 
 def connect(dsn: str | None = None):
     if psycopg is None:
         raise RuntimeError("psycopg não instalado. pip install psycopg[binary]")
-    return psycopg.connect(dsn)
+    return psycopg.connect(dsn, row_factory=_row_factory)
+
+
+def _validate(conn) -> None:
+    conn.execute("SELECT 1")
+
+
+def _in_transaction(conn) -> bool:
+    return conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE
+
+
+def _reset(conn) -> None:
+    if _in_transaction(conn):
+        conn.rollback()
+
+
+class _PsycopgPool(ConnectionPool):
+    """
+    Usa o psycopg_pool como único dono das conexões físicas e mantém por cima só a
+    API/afinidade por thread (aninhamento, savepoints, on_commit) do pool genérico.
+
+    Limite, timeout, conexões ociosas, max_lifetime e reconexão ficam todos no
+    psycopg_pool: a conexão volta para ele a cada `release` do nível de fora (já com
+    rollback), em vez de ficar ociosa na lista do pool genérico. O health check também
+    é dele (`check`), com o mesmo intervalo: só conexões paradas há mais de
+    `health_check_interval` segundos (ou nunca usadas) são validadas na entrega.
+    Conexão quebrada é fechada antes do `putconn`, e o psycopg_pool a descarta.
+    """
+
+    def __init__(self, dsn: str | None, *, max_size: int, timeout: float, **kwargs):
+        super().__init__(lambda: None, max_size=max_size, timeout=timeout, **kwargs)
+        # Instante da última devolução de cada conexão (some junto com a conexão)
+        self._devolvidas: "weakref.WeakKeyDictionary[Any, float]" = weakref.WeakKeyDictionary()
+        self._pg = psycopg_pool.ConnectionPool(
+            dsn or "",
+            min_size=1,
+            max_size=max_size,
+            timeout=timeout,
+            kwargs={"row_factory": _row_factory},
+            check=self._check,
+            open=True,
+        )
+
+    def _check(self, conn) -> None:
+        devolvida = self._devolvidas.get(conn)
+        if devolvida is not None and time.monotonic() - devolvida < self._health_check_interval:
+            return
+        _validate(conn)  # falhou: o psycopg_pool descarta e entrega outra
+
+    def _checkout(self) -> PooledConnection:
+        try:
+            conn = self._pg.getconn()
+        except psycopg_pool.PoolTimeout as exc:
+            raise PoolTimeoutError(str(exc))
+        return PooledConnection(conn, self)
+
+    def _checkin(self, pooled: PooledConnection) -> None:
+        # Já passou pelo `reset` (rollback); se ele falhou, a conexão foi por `_discard`
+        self._devolvidas[pooled._conn] = time.monotonic()
+        self._pg.putconn(pooled._conn)
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        self._destroy(pooled._conn)
+
+    def _destroy(self, conn) -> None:
+        # Fechada antes de devolver: o psycopg_pool descarta em vez de reaproveitar
+        try:
+            conn.close()
+        finally:
+            self._pg.putconn(conn)
+
+    def close(self) -> None:
+        super().close()
+        self._pg.close()
+
+    def stats(self) -> Dict[str, int]:
+        return self._pg.get_stats()
+
+
+def create_pool(
+    dsn: str | None = None,
+    *,
+    max_size: int = 8,
+    timeout: float = 10.0,
+    health_check_interval: float = 30.0,
+) -> ConnectionPool:
+    if psycopg is None:
+        raise RuntimeError("psycopg não instalado. pip install psycopg[binary]")
+
+    if psycopg_pool is not None:
+        return _PsycopgPool(
+            dsn,
+            max_size=max_size,
+            timeout=timeout,
+            health_check_interval=health_check_interval,
+            reset=_reset,
+            in_transaction=_in_transaction,
+        )
+
+    return ConnectionPool(
+        lambda: connect(dsn),
+        max_size=max_size,
+        timeout=timeout,
+        health_check_interval=health_check_interval,
+        validate=_validate,
+        reset=_reset,
+        in_transaction=_in_transaction,
+    )
+
+
+# -------------------------
+# Async (rotas async def)
+# -------------------------
+
+
+class _PsycopgAsyncConnection:
+    """Mesma interface de ThreadConfinedConnection, sobre psycopg.AsyncConnection."""
+
+    __slots__ = ("_conn", "_pool")
+
+    def __init__(self, conn, pool: "_PsycopgAsyncPool"):
+        self._conn = conn
+        self._pool = pool
+
+    async def query(self, sql: str, params: Dict[str, Any] | None = None):
+        async with self._conn.cursor() as cur:
+            await cur.execute(_compile_named(sql), params or {})
+            return await cur.fetchall()
+
+    async def execute(self, sql: str, params: Dict[str, Any] | None = None):
+        cur = self._conn.cursor()
+        await cur.execute(_compile_named(sql), params or {})
+        return cur
+
+    async def commit(self) -> None:
+        await self._conn.commit()
+        hook = self._pool.on_commit
+        if hook is not None:
+            hook()
+
+    async def rollback(self) -> None:
+        await self._conn.rollback()
+
+
+class _PsycopgAsyncPool:
+    """psycopg_pool.AsyncConnectionPool: conexões e espera nativas do driver, sem threads."""
+
+    def __init__(self, dsn: str | None, *, max_size: int, timeout: float):
+        self._timeout = timeout
+        self._pg = psycopg_pool.AsyncConnectionPool(
+            dsn or "",
+            min_size=1,
+            max_size=max_size,
+            timeout=timeout,
+            kwargs={"row_factory": _row_factory},
+            open=False,
+        )
+        self._opened = False
+        # Chamado após cada commit (ex.: read-your-writes em backend.db.routing)
+        self.on_commit = None
+
+    async def acquire(self) -> _PsycopgAsyncConnection:
+        if not self._opened:
+            await self._pg.open()
+            self._opened = True
+        try:
+            conn = await self._pg.getconn()
+        except psycopg_pool.PoolTimeout as exc:
+            raise PoolTimeoutError(str(exc))
+        return _PsycopgAsyncConnection(conn, self)
+
+    async def release(self, aconn: _PsycopgAsyncConnection) -> None:
+        # Rollback aqui (leituras deixam transação implícita aberta): o putconn também
+        # faria, mas com um warning por conexão. Quebrada: fecha e o pool a descarta.
+        conn = aconn._conn
+        try:
+            if _in_transaction(conn):
+                await conn.rollback()
+        except Exception:
+            await conn.close()
+        await self._pg.putconn(conn)
+
+    async def close(self) -> None:
+        await self._pg.close()
+
+    def close_nowait(self) -> None:
+        # Pool de outro event loop: as conexões caem quando o loop antigo for coletado
+        self._opened = False
+
+    def stats(self) -> Dict[str, int]:
+        return self._pg.get_stats()
+
+
+def create_async_pool(
+    dsn: str | None = None,
+    *,
+    max_size: int = 8,
+    timeout: float = 10.0,
+):
+    if psycopg is None:
+        raise RuntimeError("psycopg não instalado. pip install psycopg[binary]")
+
+    if psycopg_pool is not None:
+        return _PsycopgAsyncPool(dsn, max_size=max_size, timeout=timeout)
+
+    # Sem psycopg_pool: conexões síncronas confinadas em threads (mesmo esquema do SQLite)
+    return ThreadConfinedPool(
+        lambda: connect(dsn),
+        query=query,
+        execute=execute,
+        max_size=max_size,
+        timeout=timeout,
+        reset=_reset,
+    )
+
+
+# --- Placeholder conversion: from ":name" to "%(name)s" (pyformat) ---
+# Ignora casts do Postgres (`data::date`): o ":" não pode vir depois de outro ":" nem
+# de letra/dígito. "%" literal precisa virar "%%", pois os parâmetros vão sempre em dict.
+_named_re = re.compile(r"(?<![:\w]):([a-zA-Z_][a-zA-Z0-9_]*)")
+
+# Quantidade máxima de SQLs compilados mantidos em cache (LRU)
+_SQL_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=_SQL_CACHE_SIZE)
+def _compile_named(sql: str) -> str:
+    """
+    Compila o SQL uma única vez por texto: `:nome` -> `%(nome)s`.
+    """
+    return _named_re.sub(r"%(\1)s", sql.replace("%", "%%"))
 
 
 def execute(conn, sql: str, params: Dict[str, Any] | None = None):
-    # Em psycopg, placeholder é %s; se você mantiver :nome,
-    # pode usar psycopg.sql ou mapear para %s + tupla.
-    # Para simplificar, psycopg aceita dict com %(nome)s se você formatar.
-    # Implementar conversão aqui quando for migrar de fato.
     cur = conn.cursor()
-    cur.execute(sql, params or None)
+    cur.execute(_compile_named(sql), params or {})
     return cur
 
 
-def executemany(conn, sql: str, seq_of_params):
+def executemany(conn, sql: str, seq_of_params: Iterable[Dict[str, Any]]):
+    """
+    Compila o SQL uma vez; o psycopg 3 envia o lote em pipeline (sem ida e volta por linha).
+    """
     cur = conn.cursor()
-    cur.executemany(sql, seq_of_params)
+    cur.executemany(_compile_named(sql), seq_of_params)
     return cur
 
 
+def copy_rows(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Carga em massa com COPY ... FROM STDIN (muito mais rápido que INSERTs).
+    `table`/`columns` vêm do código (não do usuário) e ainda assim são citados
+    como identificadores. Retorna o número de linhas enviadas.
+    """
+    from psycopg import sql as pgsql
+
+    stmt = pgsql.SQL("COPY {} ({}) FROM STDIN").format(
+        pgsql.Identifier(table), pgsql.SQL(", ").join(map(pgsql.Identifier, columns))
+    )
+    n = 0
+    with conn.cursor() as cur:
+        with cur.copy(stmt) as copy:
+            for row in rows:
+                copy.write_row(row)
+                n += 1
+    return n
+
+
+def begin_write(conn) -> None:
+    # psycopg abre transação implicitamente; o lock de linha vem do SELECT ... FOR UPDATE
+    return None
+
+
 def query(conn, sql: str, params: Dict[str, Any] | None = None):
     cur = execute(conn, sql, params)
     return cur.fetchall()
 
 
-def normalize_error(exc: Exception) -> DBError:
-    # from psycopg import errors
+def iter_query(conn, sql: str, params: Dict[str, Any] | None = None, chunk_size: int = 1000):
+    """
+    Itera com cursor nomeado (server-side): o servidor entrega `chunk_size`
+    linhas por ida e volta, sem materializar o resultado no cliente.
+    Precisa de transação aberta (psycopg abre implicitamente).
+    """
+    cur = conn.cursor(name=f"iter_{id(conn):x}_{next(_cursor_seq)}")
+    cur.itersize = chunk_size
     try:
-        from psycopg import errors
+        cur.execute(_compile_named(sql), params or {})
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cur.close()
 
-        if isinstance(exc, errors.UniqueViolation):
+
+def normalize_error(exc: Exception) -> DBError:
+    # Mesma classificação do sqlite_adapter (IntegrityError -> UNIQUE / FK)
+    if isinstance(exc, DBError):
+        return exc
+    if psycopg is not None:
+        if isinstance(exc, psycopg.errors.UniqueViolation):
             return DuplicateKeyError(str(exc))
-        if isinstance(exc, errors.ForeignKeyViolation):
+        if isinstance(exc, psycopg.errors.ForeignKeyViolation):
             return ForeignKeyError(str(exc))
-    except Exception:
-        pass
     return DBError(str(exc))
@@ -2,34 +2,212 @@ from __future__ import annotations
 
 import re
 import sqlite3
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, Sequence, Tuple
 
+from .aio import ThreadConfinedPool
 from .errors import DBError, DuplicateKeyError, ForeignKeyError
+from .pool import ConnectionPool
 
 # Caminho padrão do seu projeto: <repo>/data/dados.db
 # Ajustado para estrutura src/: sobe 3 níveis (db -> backend -> src -> root)
 _DEFAULT_DB_PATH = Path(__file__).resolve().parents[3] / "data" / "dados.db"
 
+# --- Perfis de PRAGMA aplicados em TODA conexão nova ---
+# Ordem importa: busy_timeout primeiro, para que a troca de journal_mode
+# espere um eventual lock em vez de falhar com "database is locked".
+# cache_size negativo = KiB (ex.: -65536 = 64 MiB).
+# synchronous: "default" mantém FULL (padrão do SQLite): commit confirmado sobrevive a
+# queda de energia. NORMAL em WAL economiza fsync por commit, mas pode perder os últimos
+# commits numa queda; só nos perfis opt-in abaixo.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+    # Dashboard: muitas leituras, poucas escritas → cache e mmap grandes
+    "read-heavy": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # Cargas em lote / auditoria intensa → espera mais por lock e checkpoint menos frequente
+    "write-heavy": {
+        "busy_timeout": 15000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32768,
+        "mmap_size": 67108864,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+    },
+}
 
-def connect(dsn: str | None = None) -> sqlite3.Connection:
-    db_path = Path(dsn) if dsn else _DEFAULT_DB_PATH
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+# Valores aceitos por PRAGMA (evita interpolar texto arbitrário no SQL)
+_PRAGMA_ENUMS = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+_TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+
+def resolve_pragmas(profile: str, overrides: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    Retorna os PRAGMAs do perfil com os overrides (valores None são ignorados).
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(
+            f"Perfil de PRAGMA desconhecido: {profile!r}. Opções: {', '.join(PRAGMA_PROFILES)}"
+        )
+
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    for name, value in (overrides or {}).items():
+        if value is not None:
+            pragmas[name] = value
+
+    for name, value in pragmas.items():
+        allowed = _PRAGMA_ENUMS.get(name)
+        if allowed is not None:
+            value = str(value).upper()
+            if value not in allowed:
+                raise ValueError(f"Valor inválido para PRAGMA {name}: {value!r}")
+            pragmas[name] = value
+        else:
+            pragmas[name] = int(value)
+
+    return pragmas
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
+
+
+def pragma_report(conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Lê os PRAGMAs efetivamente em vigor na conexão e compara com os solicitados.
+    Ex.: mmap_size pode ser limitado pelo SQLITE_MAX_MMAP_SIZE da build.
+    """
+    report = {}
+    for name, requested in pragmas.items():
+        actual = conn.execute(f"PRAGMA {name}").fetchone()[0]
+        if name == "journal_mode":
+            actual = str(actual).upper()
+        elif name == "synchronous":
+            actual = _SYNCHRONOUS_NAMES.get(actual, actual)
+        elif name == "temp_store":
+            actual = _TEMP_STORE_NAMES.get(actual, actual)
+        report[name] = {"requested": requested, "actual": actual}
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    report["page_size"] = {"requested": None, "actual": page_size}
+    report["database_size_bytes"] = {"requested": None, "actual": page_size * page_count}
+    report["freelist_count"] = {"requested": None, "actual": freelist_count}
+    return report
+
+
+def connect(dsn: str | None = None, pragmas: Dict[str, Any] | None = None) -> sqlite3.Connection:
+    if dsn and dsn.startswith("file:"):
+        # URI, ex.: réplica de leitura "file:/caminho/dados.db?mode=ro"
+        conn = sqlite3.connect(dsn, uri=True, check_same_thread=False)
+    else:
+        db_path = Path(dsn) if dsn else _DEFAULT_DB_PATH
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
     # Opcional: melhor compatibilidade com dicts/tuplas
     conn.row_factory = sqlite3.Row
+    if pragmas:
+        apply_pragmas(conn, pragmas)
     return conn
 
 
+def _validate(conn: sqlite3.Connection) -> None:
+    conn.execute("SELECT 1").fetchone()
+
+
+def _reset(conn: sqlite3.Connection) -> None:
+    # Transação esquecida aberta não pode vazar para o próximo usuário da conexão
+    if conn.in_transaction:
+        conn.rollback()
+
+
+def _in_transaction(conn: sqlite3.Connection) -> bool:
+    return conn.in_transaction
+
+
+def create_pool(
+    dsn: str | None = None,
+    *,
+    max_size: int = 8,
+    timeout: float = 10.0,
+    health_check_interval: float = 30.0,
+    pragmas: Dict[str, Any] | None = None,
+) -> ConnectionPool:
+    return ConnectionPool(
+        lambda: connect(dsn, pragmas),
+        max_size=max_size,
+        timeout=timeout,
+        health_check_interval=health_check_interval,
+        validate=_validate,
+        reset=_reset,
+        in_transaction=_in_transaction,
+    )
+
+
+def create_async_pool(
+    dsn: str | None = None,
+    *,
+    max_size: int = 8,
+    timeout: float = 10.0,
+    pragmas: Dict[str, Any] | None = None,
+) -> ThreadConfinedPool:
+    """
+    Pool para rotas async: sqlite3 não tem API assíncrona, então cada conexão fica
+    confinada a uma thread própria e as chamadas são aguardadas no event loop.
+    """
+    return ThreadConfinedPool(
+        lambda: connect(dsn, pragmas),
+        query=query,
+        execute=execute,
+        max_size=max_size,
+        timeout=timeout,
+        reset=_reset,
+    )
+
+
 # --- Placeholder conversion: from ":name" to "?" (qmark) ---
 _named_re = re.compile(r":([a-zA-Z_][a-zA-Z0-9_]*)")
 
+# Quantidade máxima de SQLs compilados mantidos em cache (LRU)
+_SQL_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=_SQL_CACHE_SIZE)
+def _compile_named(sql: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Compila o SQL uma única vez por texto: (sql em qmark, ordem dos parâmetros).
+    """
+    order = tuple(_named_re.findall(sql))  # ordem de ocorrência
+    return _named_re.sub("?", sql), order
+
 
 def _compile_sql(sql: str, params: Dict[str, Any] | None) -> Tuple[str, Sequence[Any] | None]:
     if not params:
         return sql, None
-    order: list[str] = _named_re.findall(sql)  # ordem de ocorrência
-    compiled_sql = _named_re.sub("?", sql)
+    compiled_sql, order = _compile_named(sql)
     compiled_params = [params[name] for name in order]
     return compiled_sql, compiled_params
 
@@ -42,18 +220,57 @@ def execute(conn, sql: str, params: Dict[str, Any] | None = None):
 
 
 def executemany(conn, sql: str, seq_of_params: Iterable[Dict[str, Any]]):
+    """
+    Compila o SQL uma vez e entrega o lote inteiro ao sqlite3 (loop em C).
+    """
+    compiled_sql, order = _compile_named(sql)
     cur = conn.cursor()
-    for p in seq_of_params:
-        sql2, p2 = _compile_sql(sql, p)
-        cur.execute(sql2, p2 or [])
+    cur.executemany(compiled_sql, ([p[name] for name in order] for p in seq_of_params))
     return cur
 
 
+def copy_rows(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Equivalente do COPY do Postgres: INSERT em lote (executemany).
+    `table`/`columns` vêm do código, nunca do usuário. Retorna o número de linhas.
+    """
+    cols = ", ".join(f'"{c}"' for c in columns)
+    marks = ", ".join("?" for _ in columns)
+    cur = conn.cursor()
+    cur.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', rows)
+    return cur.rowcount
+
+
+def begin_write(conn) -> None:
+    """
+    Inicia a transação já com o lock de escrita (BEGIN IMMEDIATE), para que
+    leituras "antes" e a escrita seguinte não tenham janela TOCTOU.
+    Se a conexão já está em transação (já escreveu), o lock já está retido.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
 def query(conn, sql: str, params: Dict[str, Any] | None = None):
     cur = execute(conn, sql, params)
     return cur.fetchall()
 
 
+def iter_query(conn, sql: str, params: Dict[str, Any] | None = None, chunk_size: int = 1000):
+    """
+    Itera o resultado em lotes (fetchmany), sem materializar tudo em memória.
+    """
+    cur = execute(conn, sql, params)
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cur.close()
+
+
 def normalize_error(exc: Exception) -> DBError:
     # sqlite3.IntegrityError cobre UNIQUE, FK etc.
     if isinstance(exc, sqlite3.IntegrityError):
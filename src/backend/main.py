@@ -1,21 +1,33 @@
+import csv
+import io
+import json
 import logging
 import os
-from datetime import date
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import ValidationError
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from backend.audit.integrity_middleware import IntegrityGuardMiddleware
 from backend.audit.middleware import HeaderInjectionMiddleware
-from backend.audit.service import registrar_evento
-from backend.audit.verify import verificar_integridade_auditoria
+from backend.audit.service import executar_auditado, registrar_evento, stop_group_writer
+from backend.audit.verify import iterar_verificacao, verificar_integridade_auditoria
 from backend.auth.dependencies import get_current_user
 from backend.auth.jwt import decode_token
 from backend.auth.mfa import verify_totp
+from backend.auth.passwords import (
+    password_pool_stats,
+    start_password_pool,
+    stop_password_pool,
+)
 from backend.auth.permissions import require_role
 from backend.auth.service import (
     cleanup_expired_sessions,
@@ -26,25 +38,52 @@ from backend.auth.service import (
     revoke_all_sessions,
     revoke_session_by_id,
 )
+from backend.auth.session_cache import session_cache
 from backend.core.config import settings
-from backend.core.exceptions import register_exception_handlers, register_rate_limit_exception
+from backend.core.exceptions import (
+    register_exception_handlers,
+    register_password_pool_exception,
+    register_rate_limit_exception,
+)
 from backend.crud import (
+    agregar_registros,
     # atualizar_registro,
     atualizar_registro_com_auditoria,
+    decode_cursor,
     deletar_registro_com_auditoria,
+    iterar_registros,
+    listar_categorias,
     # deletar_registro,
-    listar_registros,
+    listar_mudancas_async,
+    listar_registros_pagina_async,
     obter_registro_por_id,
-    query,
-    upsert_registro,
+    obter_versao_registros,
+    obter_versao_registros_async,
+    upsert_registro_com_auditoria,
+    upsert_registros_bulk,
+)
+from backend.crud_auditoria import listar_auditoria_async
+from backend.db import (
+    aconnection,
+    close_async_pool,
+    close_pool,
+    connect,
+    pragma_report,
+    replica_stats,
 )
-from backend.crud_auditoria import listar_auditoria
-from backend.db import connect
 from backend.db.errors import DuplicateKeyError
 from backend.users.admin import router as admin_router
 from backend.users.service import authenticate_user
 from backend.users.users import router as users_router
-from shared.models import AuditoriaOut, RegistroIn, RegistroOut, UserContext, UserLoginOut
+from shared.models import (
+    AuditoriaOut,
+    RegistroAggOut,
+    RegistroIn,
+    RegistroMudancasOut,
+    RegistroOut,
+    UserContext,
+    UserLoginOut,
+)
 
 app = FastAPI(title="Governance Dashboard API")
 
@@ -70,6 +109,7 @@ if settings.ENV == "dev":
     register_exception_handlers(app, logger)
 
 register_rate_limit_exception(app)
+register_password_pool_exception(app)
 
 # 🛡️ Middleware de Proteção (Executa antes do HeaderInjection)
 app.add_middleware(IntegrityGuardMiddleware)
@@ -80,9 +120,194 @@ app.include_router(admin_router)
 app.include_router(users_router)
 
 
+@app.on_event("startup")
+def report_db_pragmas():
+    # 📋 Relatório dos PRAGMAs em vigor (ajuda a calibrar o SQLite conforme cresce)
+    report = pragma_report()
+    if not report:
+        return
+    logger.info(f"SQLite PRAGMA profile: {settings.DB_SQLITE_PRAGMA_PROFILE}")
+    for name, values in report.items():
+        drift = ""
+        if values["requested"] is not None and values["requested"] != values["actual"]:
+            drift = f" (solicitado: {values['requested']})"
+        logger.info(f"  PRAGMA {name} = {values['actual']}{drift}")
+
+
+@app.on_event("startup")
+def warm_password_pool():
+    # Sobe os processos do bcrypt antes do primeiro login
+    start_password_pool()
+
+
+@app.on_event("shutdown")
+def shutdown_db_pool():
+    # Grava eventos de auditoria pendentes antes de fechar o pool
+    stop_group_writer()
+    stop_password_pool()
+    close_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_async_db_pool():
+    await close_async_pool()
+
+
+# -------------------------
+# HTTP condicional (ETag / Last-Modified) das leituras de registros
+# -------------------------
+
+
+def _cabecalhos_versao(versao) -> dict:
+    """ETag/Last-Modified a partir da versão de registros (V022)."""
+    modificado = datetime.fromisoformat(versao["modificado_em"]).replace(tzinfo=timezone.utc)
+    return {
+        "ETag": f'"{versao["instancia"]}-{versao["versao"]}"',
+        "Last-Modified": format_datetime(modificado, usegmt=True),
+        # O cliente pode guardar, mas revalida sempre (304 se nada mudou)
+        "Cache-Control": "no-cache",
+    }
+
+
+def _nao_modificado(request: Request, cabecalhos: dict) -> bool:
+    # If-None-Match tem precedência; If-Modified-Since só vale sem ele (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in etags or cabecalhos["ETag"] in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(cabecalhos["Last-Modified"]) <= desde
+    return False
+
+
 @app.get("/registros", response_model=List[RegistroOut])
-def get_registros():  # user: User = Depends(get_current_user)):
-    return listar_registros()
+async def get_registros(
+    request: Request,
+    categoria: str | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=5000),
+    format: Literal["json", "ndjson"] = "json",
+):  # user: User = Depends(get_current_user)):
+    """
+    Lista registros (data DESC, id DESC) com paginação por cursor (keyset).
+
+    - json sem `limit` nem `cursor`: todos os registros filtrados (contrato original
+      da rota, para clientes que não paginam).
+    - json com `limit` e/ou `cursor`: uma página de `limit` itens (padrão 500); a
+      próxima página vem no header `X-Next-Cursor` (ausente na última página).
+    - ndjson: streaming de todos os itens filtrados (ou até `limit`), uma linha por registro.
+
+    json: ETag/Last-Modified da versão de registros; com If-None-Match (ou
+    If-Modified-Since) ainda válido, responde 304 sem consultar nem serializar a página.
+    """
+    filtros = {
+        "categoria": categoria,
+        "data_inicio": data_inicio.isoformat() if data_inicio else None,
+        "data_fim": data_fim.isoformat() if data_fim else None,
+        "cursor": cursor,
+    }
+
+    try:
+        if format == "ndjson":
+            # Valida o cursor antes de iniciar o stream (depois não dá para mudar o status)
+            if cursor:
+                decode_cursor(cursor)
+            linhas = (
+                json.dumps(r, ensure_ascii=False) + "\n"
+                for r in iterar_registros(**filtros, limit=limit)
+            )
+            return StreamingResponse(linhas, media_type="application/x-ndjson")
+
+        async with aconnection(intent="read") as conn:
+            # ⚡ Versão primeiro (mesma conexão): 304 sem tocar nos dados
+            headers = _cabecalhos_versao(await obter_versao_registros_async(conn))
+            if _nao_modificado(request, headers):
+                return Response(status_code=304, headers=headers)
+
+            # Paginação só quando pedida: sem limit/cursor, a lista completa de antes
+            pagina = limit if limit is not None else (500 if cursor else None)
+            registros, next_cursor = await listar_registros_pagina_async(
+                **filtros, limit=pagina, conn=conn
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    # ⚡ Linhas já estão no formato de RegistroOut: evita revalidar a lista inteira
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(content=registros, headers=headers)
+
+
+@app.get("/registros/categorias", response_model=List[str])
+def get_registros_categorias(request: Request, response: Response):
+    conn = connect(intent="read")
+    try:
+        headers = _cabecalhos_versao(obter_versao_registros(conn))
+        if _nao_modificado(request, headers):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return listar_categorias(conn=conn)
+    finally:
+        conn.close()
+
+
+@app.get("/registros/agg", response_model=RegistroAggOut)
+def get_registros_agg(
+    request: Request,
+    response: Response,
+    categoria: str | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    bucket: Literal["day", "week", "month"] = "day",
+):
+    """
+    Séries por categoria (dia/semana/mês) e totais (count, sum, min, max),
+    calculados no banco para o painel da Home. Mesmo ETag/304 de GET /registros.
+    """
+    conn = connect(intent="read")
+    try:
+        headers = _cabecalhos_versao(obter_versao_registros(conn))
+        if _nao_modificado(request, headers):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return agregar_registros(
+            categoria=categoria,
+            data_inicio=data_inicio.isoformat() if data_inicio else None,
+            data_fim=data_fim.isoformat() if data_fim else None,
+            bucket=bucket,
+            conn=conn,
+        )
+    finally:
+        conn.close()
+
+
+@app.get("/registros/changes", response_model=RegistroMudancasOut)
+async def get_registros_changes(
+    since: str | None = None,
+    limit: int = Query(5000, ge=1, le=5000),
+):
+    """
+    Feed de mudanças para sincronização incremental (V023): registros inseridos ou
+    alterados (`upserts`, estado atual) e excluídos (`deletes`, ids) desde `since`.
+
+    Sem `since` (ou com token de outra instância do banco): `reset=true` e a resposta
+    é a carga completa. Com `has_more=true`, repetir com `since=<token>` retornado.
+    """
+    try:
+        mudancas = await listar_mudancas_async(since=since, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    # ⚡ Mesmo atalho de GET /registros: linhas já no formato de RegistroOut
+    return JSONResponse(content=mudancas)
 
 
 @app.post("/registros", status_code=201)
@@ -92,40 +317,166 @@ def post_registro(
     user: UserContext = Depends(get_current_user),
 ):
     require_role("editor", "admin")(user)
-    try:
-        # inserir_registro(registro)
-        upsert_registro(registro)
 
-        # 🔍 Recuperar o ID do registro inserido/atualizado para auditoria
-        # Como é um UPSERT via view, não temos o ID direto, precisamos consultar.
-        conn = connect()
-        try:
-            rows = query(
-                conn,
-                "SELECT id FROM registros WHERE data = :data AND categoria = :cat",
-                {"data": registro.data, "cat": registro.categoria},
-            )
-            resource_id = rows[0]["id"] if rows else None
-        finally:
-            conn.close()
+    # 🔒 Escrita + auditoria numa única transação (sem janela entre elas)
+    def trabalho(conn):
+        antes, depois = upsert_registro_com_auditoria(registro, conn=conn)
 
         registrar_evento(
             username=user.username,
             role=user.role,
             action="UPSERT",
             resource="registros",
-            resource_id=resource_id,
-            payload_before=None,  # Upsert é complexo de pegar o "antes" sem custo alto
-            payload_after=registro.model_dump(),
+            resource_id=depois["id"],
+            payload_before=antes,
+            payload_after=depois,
             endpoint=request.url.path,
             method=request.method,
+            conn=conn,
         )
 
-        return {"message": "Registro inserido/atualizado (UPSERT) com sucesso"}
+    try:
+        executar_auditado(trabalho)
     except DuplicateKeyError:
         # Só ocorreria se você usar INSERT direto na tabela sem view, por exemplo.
         raise HTTPException(status_code=409, detail="Duplicidade em (data, categoria)")
 
+    return {"message": "Registro inserido/atualizado (UPSERT) com sucesso"}
+
+
+# Limite de linhas por requisição de carga em lote
+BULK_MAX_ROWS = 50_000
+
+
+class _LinhaInvalida:
+    """Linha NDJSON que não é JSON válido: vira erro só dessa linha no resultado."""
+
+    __slots__ = ("linha", "erro")
+
+    def __init__(self, linha: str, erro: json.JSONDecodeError):
+        self.linha = linha
+        self.erro = erro
+
+
+def _carregar_linha(linha: str):
+    try:
+        return json.loads(linha)
+    except json.JSONDecodeError as exc:
+        return _LinhaInvalida(linha, exc)
+
+
+def _erro_item(item) -> list | None:
+    """Erro (formato de `ValidationError.errors()`) de item que nem é um objeto JSON."""
+    if isinstance(item, _LinhaInvalida):
+        return [
+            {
+                "type": "json_invalid",
+                "loc": [],
+                "msg": f"JSON inválido: {item.erro.msg} (coluna {item.erro.colno})",
+                "input": item.linha,
+            }
+        ]
+    if not isinstance(item, dict):
+        return [
+            {
+                "type": "model_type",
+                "loc": [],
+                "msg": "Esperado um objeto JSON com data, categoria e valor",
+                "input": item,
+            }
+        ]
+    return None
+
+
+def _parse_bulk_payload(content_type: str, body: bytes) -> list:
+    """
+    Converte o corpo em lista de itens conforme o Content-Type:
+    JSON (array), NDJSON (um objeto por linha) ou CSV (cabeçalho data,categoria,valor).
+    Linhas NDJSON malformadas não derrubam a carga: viram `_LinhaInvalida`.
+    """
+    text = body.decode("utf-8-sig")
+
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [_carregar_linha(linha) for linha in text.splitlines() if linha.strip()]
+
+    if "csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("Esperado um array JSON de registros")
+    return data
+
+
+@app.post("/registros/bulk")
+async def post_registros_bulk(
+    request: Request,
+    origem: str = "bulk",
+    user: UserContext = Depends(get_current_user),
+):
+    """
+    Carga em lote (upsert por (data, categoria)) a partir de JSON, NDJSON ou CSV.
+    Retorna um resultado por linha, na ordem de entrada.
+    """
+    require_role("editor", "admin")(user)
+
+    try:
+        itens = _parse_bulk_payload(request.headers.get("content-type", ""), await request.body())
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Payload inválido: {exc}")
+
+    if len(itens) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {BULK_MAX_ROWS} linhas por carga")
+
+    # 1️⃣ Validação linha a linha (linhas inválidas não impedem as demais)
+    resultados: list = [None] * len(itens)
+    validos: list = []
+    posicoes: list = []
+    for i, item in enumerate(itens):
+        erro = _erro_item(item)
+        if erro is not None:
+            resultados[i] = {"index": i, "status": "error", "detail": erro}
+            continue
+        try:
+            validos.append(RegistroIn.model_validate(item))
+            posicoes.append(i)
+        except ValidationError as exc:
+            resultados[i] = {
+                "index": i,
+                "status": "error",
+                "detail": exc.errors(include_url=False, include_context=False),
+            }
+
+    # 2️⃣ Auditoria: um evento por lote, na mesma transação do lote
+    def auditar(conn, linhas):
+        registrar_evento(
+            conn=conn,
+            username=user.username,
+            role=user.role,
+            action="BULK_UPSERT",
+            resource="registros",
+            resource_id=None,
+            payload_before=None,
+            payload_after={"origem": origem, "count": len(linhas), "registros": linhas},
+            endpoint=request.url.path,
+            method=request.method,
+        )
+
+    # 3️⃣ Escrita em lotes (bloqueante → threadpool)
+    gravados = await run_in_threadpool(
+        upsert_registros_bulk, validos, origem=origem, auditar=auditar
+    )
+    for i, resultado in zip(posicoes, gravados):
+        resultados[i] = {"index": i, **resultado}
+
+    ok = sum(1 for r in resultados if r["status"] == "ok")
+    return {
+        "total": len(resultados),
+        "ok": ok,
+        "errors": len(resultados) - ok,
+        "results": resultados,
+    }
+
 
 @app.get("/registros/{id_}", response_model=RegistroOut)
 def get_registro(
@@ -147,23 +498,30 @@ def put_registro(
 ):
     require_role("editor", "admin")(user)
 
-    resultado = atualizar_registro_com_auditoria(id_, registro)
-    if not resultado:
-        raise HTTPException(status_code=404, detail="Registro não encontrado")
+    def trabalho(conn):
+        resultado = atualizar_registro_com_auditoria(id_, registro, conn=conn)
+        if not resultado:
+            raise HTTPException(status_code=404, detail="Registro não encontrado")
 
-    antes, depois = resultado
-
-    registrar_evento(
-        username=user.username,
-        role=user.role,
-        action="UPDATE",
-        resource="registros",
-        resource_id=id_,
-        payload_before=antes,
-        payload_after=depois,
-        endpoint=request.url.path,
-        method=request.method,
-    )
+        antes, depois = resultado
+
+        registrar_evento(
+            username=user.username,
+            role=user.role,
+            action="UPDATE",
+            resource="registros",
+            resource_id=id_,
+            payload_before=antes,
+            payload_after=depois,
+            endpoint=request.url.path,
+            method=request.method,
+            conn=conn,
+        )
+
+    try:
+        executar_auditado(trabalho)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Duplicidade em (data, categoria)")
     return {"message": "Registro atualizado com sucesso"}
 
 
@@ -175,26 +533,30 @@ def delete_registro(
 ):
     require_role("admin")(user)
 
-    antes = deletar_registro_com_auditoria(id_)
-    if not antes:
-        raise HTTPException(status_code=404, detail="Registro não encontrado")
+    def trabalho(conn):
+        antes = deletar_registro_com_auditoria(id_, conn=conn)
+        if not antes:
+            raise HTTPException(status_code=404, detail="Registro não encontrado")
 
-    registrar_evento(
-        username=user.username,
-        role=user.role,
-        action="DELETE",
-        resource="registros",
-        resource_id=id_,
-        payload_before=antes,
-        payload_after=None,
-        endpoint=request.url.path,
-        method=request.method,
-    )
+        registrar_evento(
+            username=user.username,
+            role=user.role,
+            action="DELETE",
+            resource="registros",
+            resource_id=id_,
+            payload_before=antes,
+            payload_after=None,
+            endpoint=request.url.path,
+            method=request.method,
+            conn=conn,
+        )
+
+    executar_auditado(trabalho)
     return {"message": "Registro excluído com sucesso"}
 
 
 @app.get("/auditoria", response_model=List[AuditoriaOut])
-def get_auditoria(
+async def get_auditoria(
     username: str | None = None,
     action: str | None = None,
     resource: str | None = None,
@@ -205,7 +567,7 @@ def get_auditoria(
     # 🔐 só admin pode consultar auditoria
     require_role("admin")(user)
 
-    return listar_auditoria(
+    return await listar_auditoria_async(
         username=username,
         action=action,
         resource=resource,
@@ -321,11 +683,67 @@ def cleanup_sessions_revoked(user: UserContext = Depends(get_current_user)):
     }
 
 
+@app.get("/admin/sessions/cache/stats")
+def session_cache_stats(user: UserContext = Depends(get_current_user)):
+    """Métricas do cache de sessões deste worker (tamanho, hits/misses, despejos)."""
+    require_role("admin")(user)
+    return session_cache.stats()
+
+
+@app.get("/admin/auth/password-pool/stats")
+def password_pool_metrics(user: UserContext = Depends(get_current_user)):
+    """Pool de bcrypt deste worker: fila, recusas (503) e latência (p50/p95/p99)."""
+    require_role("admin")(user)
+    return password_pool_stats()
+
+
+@app.get("/admin/db/replicas")
+def db_replicas(user: UserContext = Depends(get_current_user)):
+    """Réplicas de leitura deste worker: saúde, latência, leituras e aderência ao primário."""
+    require_role("admin")(user)
+    return replica_stats()
+
+
 @app.get("/admin/audit/verify")
-def verify_audit_chain(user: UserContext = Depends(get_current_user)):
+def verify_audit_chain(
+    full: bool = False,
+    workers: int | None = Query(None, ge=1, le=32),
+    user: UserContext = Depends(get_current_user),
+):
     require_role("admin")(user)
     conn = connect()
     try:
-        return verificar_integridade_auditoria(conn)
+        # Incremental a partir do checkpoint; ?full=true reverifica desde a gênese
+        return verificar_integridade_auditoria(conn, full=full, workers=workers)
     finally:
         conn.close()
+
+
+@app.get("/admin/audit/verify/stream")
+def verify_audit_chain_stream(
+    full: bool = False,
+    workers: int | None = Query(None, ge=1, le=32),
+    user: UserContext = Depends(get_current_user),
+):
+    """
+    Mesma verificação, em NDJSON: uma linha de progresso por lote
+    (checked, total, events_per_sec, eta_seconds) e, por último, {"result": ...}.
+    """
+    require_role("admin")(user)
+
+    def gerar():
+        # Conexão dedicada: o gerador é consumido fora da thread da rota
+        conn = connect(dedicated=True)
+        try:
+            gen = iterar_verificacao(conn, full=full, workers=workers)
+            while True:
+                try:
+                    progresso = next(gen)
+                except StopIteration as stop:
+                    yield json.dumps({"result": stop.value}, default=str) + "\n"
+                    return
+                yield json.dumps({"progress": progresso}) + "\n"
+        finally:
+            conn.close()
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
@@ -0,0 +1,119 @@
+"""
+Rollup materializado de registros por (categoria, mês) — tabela registros_rollup (V017).
+
+Os gatilhos mantêm o rollup a cada INSERT/UPDATE/DELETE; este módulo permite
+conferir o rollup contra a tabela base e reconstruí-lo se divergir.
+
+Uso (CLI):
+    python -m backend.rollup --verify
+    python -m backend.rollup --rebuild
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from backend.db import connect, execute, query
+
+_COLUNAS = ("count", "sum", "min", "max", "data_min", "data_max")
+
+# Bucket portável (SQLite e Postgres): data é TEXT 'YYYY-MM-DD'
+_SQL_BASE = """
+    SELECT categoria,
+           substr(data, 1, 7) || '-01' AS bucket,
+           COUNT(*) AS count, SUM(valor) AS sum, MIN(valor) AS min, MAX(valor) AS max,
+           MIN(data) AS data_min, MAX(data) AS data_max
+      FROM registros
+     GROUP BY categoria, substr(data, 1, 7) || '-01'
+"""
+
+
+def verificar_rollup(conn) -> Dict[str, Any]:
+    """
+    Compara registros_rollup com a agregação da tabela base.
+    Retorna dict com `valid` e a lista de divergências (se houver).
+    """
+    esperado = {(r["categoria"], r["bucket"]): r for r in query(conn, _SQL_BASE)}
+    atual = {
+        (r["categoria"], r["bucket"]): r
+        for r in query(
+            conn,
+            """
+            SELECT categoria, bucket, count, sum, min, max, data_min, data_max
+              FROM registros_rollup
+            """,
+        )
+    }
+
+    divergencias: List[Dict[str, Any]] = []
+    for chave in sorted(esperado.keys() | atual.keys()):
+        exp = esperado.get(chave)
+        cur = atual.get(chave)
+        if exp is None or cur is None:
+            divergencias.append(
+                {
+                    "categoria": chave[0],
+                    "bucket": chave[1],
+                    "reason": "missing in rollup" if cur is None else "orphan in rollup",
+                }
+            )
+            continue
+        campos = {c: {"expected": exp[c], "found": cur[c]} for c in _COLUNAS if exp[c] != cur[c]}
+        if campos:
+            divergencias.append(
+                {"categoria": chave[0], "bucket": chave[1], "reason": "mismatch", "fields": campos}
+            )
+
+    return {
+        "valid": not divergencias,
+        "checked_buckets": len(esperado),
+        "divergences": divergencias,
+    }
+
+
+def reconstruir_rollup(conn) -> int:
+    """
+    Recria o rollup a partir da tabela base (na transação do chamador).
+    Retorna a quantidade de buckets gravados.
+    """
+    execute(conn, "DELETE FROM registros_rollup")
+    cur = execute(
+        conn,
+        f"""
+        INSERT INTO registros_rollup
+            (categoria, bucket, count, sum, min, max, data_min, data_max, last_updated)
+        SELECT categoria, bucket, count, sum, min, max, data_min, data_max, :now
+          FROM ({_SQL_BASE})
+        """,
+        {"now": datetime.now(timezone.utc).isoformat()},
+    )
+    return cur.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verifica/reconstrói o rollup de registros.")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--verify", action="store_true", help="Compara rollup x tabela base")
+    grupo.add_argument("--rebuild", action="store_true", help="Reconstrói o rollup")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.rebuild:
+            total = reconstruir_rollup(conn)
+            conn.commit()
+            print(f"✅ Rollup reconstruído: {total} buckets.")
+            return
+
+        resultado = verificar_rollup(conn)
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        if not resultado["valid"]:
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
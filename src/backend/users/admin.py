@@ -1,13 +1,16 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from backend.audit.anchor import perform_anchoring
-from backend.audit.service import registrar_evento
+from backend.audit.merkle import prova_inclusao
+from backend.audit.service import executar_auditado, registrar_evento
 from backend.auth.dependencies import get_current_user, get_current_user_allow_password_change
 from backend.auth.permissions import require_role
 from backend.auth.service import revoke_all_sessions
+from backend.auth.session_cache import session_cache
 from backend.db import connect, execute, query
+from backend.rollup import reconstruir_rollup, verificar_rollup
 from backend.users.password_reset_service import limpar_tokens_reset_expirados_ou_usados
 from backend.users.schemas import ChangePasswordIn
 from backend.users.service import alterar_senha, resetar_senha_admin
@@ -18,7 +21,7 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 @router.get("/users")
 def listar_usuarios(user=Depends(get_current_user)):
     require_role("admin")(user)
-    conn = connect()
+    conn = connect(intent="read")
     try:
         rows = query(
             conn,
@@ -202,6 +205,65 @@ def create_anchor(user=Depends(get_current_user)):
     return {"message": "Âncora criada com sucesso", "details": results}
 
 
+@router.get("/audit/proof/{event_id}")
+def audit_inclusion_proof(event_id: int, user=Depends(get_current_user)):
+    """
+    Prova de inclusão (Merkle) de um evento: caminho até a raiz do bloco e da
+    raiz do bloco até a raiz publicada na última ancoragem. Só leitura.
+    409 se o evento ainda não é provável (bloco em aberto ou ainda não ancorado).
+    """
+    require_role("admin")(user)
+    conn = connect()
+    try:
+        prova = prova_inclusao(conn, event_id)
+    finally:
+        conn.close()
+
+    if prova is None:
+        raise HTTPException(status_code=404, detail="Evento não encontrado na cadeia")
+    if not prova["provable"]:
+        raise HTTPException(status_code=409, detail=prova)
+    return prova
+
+
+@router.get("/registros/rollup/verify")
+def verify_registros_rollup(user=Depends(get_current_user)):
+    """
+    Compara o rollup materializado (registros_rollup) com a tabela base.
+    """
+    require_role("admin")(user)
+    conn = connect()
+    try:
+        return verificar_rollup(conn)
+    finally:
+        conn.close()
+
+
+@router.post("/registros/rollup/rebuild")
+def rebuild_registros_rollup(request: Request, user=Depends(get_current_user)):
+    require_role("admin")(user)
+
+    def trabalho(conn):
+        total = reconstruir_rollup(conn)
+
+        registrar_evento(
+            conn=conn,
+            username=user.username,
+            role=user.role,
+            action="ROLLUP_REBUILD",
+            resource="registros_rollup",
+            resource_id=None,
+            payload_before=None,
+            payload_after={"buckets": total},
+            endpoint=request.url.path,
+            method=request.method,
+        )
+        return total
+
+    total = executar_auditado(trabalho)
+    return {"message": "Rollup reconstruído", "buckets": total}
+
+
 @router.get("/role-requests")
 def list_role_requests(user=Depends(get_current_user)):
     require_role("admin")(user)
@@ -220,8 +282,7 @@ def process_role_request(req_id: int, action: str, user=Depends(get_current_user
     if action not in ("approve", "reject"):
         raise HTTPException(status_code=400, detail="Ação inválida")
 
-    conn = connect()
-    try:
+    def trabalho(conn):
         req = query(conn, "SELECT * FROM role_requests WHERE id = :id", {"id": req_id})
         if not req:
             raise HTTPException(404, "Solicitação não encontrada")
@@ -278,22 +339,19 @@ def process_role_request(req_id: int, action: str, user=Depends(get_current_user
             endpoint=f"/admin/role-requests/{req_id}/{action}",
             method="POST",
         )
+        return req["username"], new_status
 
-        conn.commit()
-        return {"message": f"Solicitação {new_status}"}
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    alvo, new_status = executar_auditado(trabalho)
+    if action == "approve":
+        session_cache.invalidate_user(alvo)
+    return {"message": f"Solicitação {new_status}"}
 
 
 @router.post("/users/{username}/mfa/reset")
 def reset_user_mfa(username: str, user=Depends(get_current_user)):
     require_role("admin")(user)
 
-    conn = connect()
-    try:
+    def trabalho(conn):
         # Verifica se usuário existe
         rows = query(conn, "SELECT 1 FROM users WHERE username = :u", {"u": username})
         if not rows:
@@ -322,10 +380,6 @@ def reset_user_mfa(username: str, user=Depends(get_current_user)):
             method="POST",
         )
 
-        conn.commit()
-        return {"message": f"MFA do usuário {username} foi removido com sucesso."}
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    executar_auditado(trabalho)
+    session_cache.invalidate_user(username)
+    return {"message": f"MFA do usuário {username} foi removido com sucesso."}
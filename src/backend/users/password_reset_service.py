@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 
 from backend.auth.service import revoke_all_sessions
+from backend.auth.session_cache import session_cache
 from backend.core.config import settings
 from backend.db import connect, execute, query
 
@@ -53,6 +54,7 @@ def gerar_token_reset_senha(*, username: str, validade_minutos: int = 30) -> str
         revoke_all_sessions(username, conn=conn)
 
         conn.commit()
+        session_cache.invalidate_user(username)
     finally:
         conn.close()
 
@@ -171,9 +173,9 @@ def limpar_tokens_reset_expirados_ou_usados() -> int:
             """
             DELETE FROM password_reset_tokens
              WHERE used_at IS NOT NULL
-                OR expires_at <= CURRENT_TIMESTAMP
+                OR expires_at <= :now
             """,
-            {},
+            {"now": datetime.now(timezone.utc).isoformat()},
         )
         conn.commit()
         return cur.rowcount
@@ -5,9 +5,10 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException
 
-from backend.audit.service import registrar_evento
+from backend.audit.service import executar_auditado, registrar_evento
 from backend.auth.passwords import hash_password, verify_password
 from backend.auth.service import revoke_all_sessions
+from backend.auth.session_cache import session_cache
 from backend.core.config import settings
 from backend.db import connect, execute, query
 from shared.models import UserContext
@@ -114,8 +115,10 @@ def resetar_senha_admin(username: str, admin_user: UserContext):
     # valida senha temporária
     validar_senha(nova_senha)
 
-    conn = connect()
-    try:
+    # bcrypt fora da transação de escrita (no modo "group" ela é a do lote inteiro)
+    password_hash = hash_password(nova_senha)
+
+    def trabalho(conn):
         # 🔐 Atualiza senha
         execute(
             conn,
@@ -126,14 +129,14 @@ def resetar_senha_admin(username: str, admin_user: UserContext):
              WHERE username = :username
             """,
             {
-                "hash": hash_password(nova_senha),
+                "hash": password_hash,
                 "username": username,
             },
         )
 
         revoke_all_sessions(username, conn=conn)
 
-        # 🧾 Auditoria (MESMA conexão)
+        # 🧾 Auditoria (MESMA transação)
         registrar_evento(
             conn=conn,
             username=admin_user.username,
@@ -147,13 +150,9 @@ def resetar_senha_admin(username: str, admin_user: UserContext):
             method="POST",
         )
 
-        conn.commit()
-        return nova_senha
-    except Exception as exc:
-        conn.rollback()
-        raise exc
-    finally:
-        conn.close()
+    executar_auditado(trabalho)
+    session_cache.invalidate_user(username)
+    return nova_senha
 
 
 def alterar_senha(*, username: str, senha_atual: str, nova_senha: str):
@@ -206,6 +205,7 @@ def alterar_senha(*, username: str, senha_atual: str, nova_senha: str):
         revoke_all_sessions(username, conn=conn)
 
         conn.commit()
+        session_cache.invalidate_user(username)
     finally:
         conn.close()
 
@@ -256,5 +256,7 @@ def resetar_senha_por_token(*, username: str, nova_senha: str):
         )
 
         conn.commit()
+        # must_change_password / password_expires_at ficam no cache de sessão
+        session_cache.invalidate_user(username)
     finally:
         conn.close()
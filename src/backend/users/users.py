@@ -4,7 +4,7 @@ from pathlib import Path
 
 from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
 
-from backend.audit.service import registrar_evento
+from backend.audit.service import executar_auditado, registrar_evento
 from backend.auth.dependencies import get_current_user, get_current_user_profile
 from backend.auth.mfa import generate_mfa_secret, generate_qr_code_base64, get_totp_uri, verify_totp
 from backend.auth.passwords import verify_password
@@ -185,7 +185,7 @@ def reset_password(payload: ResetPasswordIn):
 
 
 @router.get("/me", response_model=User)
-def get_me(user: User = Depends(get_current_user_profile)):
+async def get_me(user: User = Depends(get_current_user_profile)):
     return user
 
 
@@ -194,8 +194,7 @@ def update_profile(
     payload: UserProfileUpdate,
     user: UserContext = Depends(get_current_user),
 ):
-    conn = connect()
-    try:
+    def trabalho(conn):
         # valida email único
         exists = query(
             conn,
@@ -234,11 +233,9 @@ def update_profile(
             endpoint="/me/profile",
             method="PUT",
         )
-        conn.commit()
 
-        return {"message": "Perfil atualizado"}
-    finally:
-        conn.close()
+    executar_auditado(trabalho)
+    return {"message": "Perfil atualizado"}
 
 
 @router.post("/me/avatar")
@@ -276,8 +273,7 @@ def upload_avatar(
     # Caminho relativo para salvar no banco (para o frontend acessar via StaticFiles)
     db_path = f"/static/avatars/{filename}"
 
-    conn = connect()
-    try:
+    def trabalho(conn):
         execute(
             conn,
             "UPDATE users SET avatar_path = :path WHERE username = :username",
@@ -296,9 +292,8 @@ def upload_avatar(
             endpoint="/me/avatar",
             method="POST",
         )
-        conn.commit()
-    finally:
-        conn.close()
+
+    executar_auditado(trabalho)
 
     return {"message": "Avatar atualizado", "path": db_path}
 
@@ -311,8 +306,7 @@ def request_role_change(
     if payload.requested_role == user.role:
         raise HTTPException(status_code=400, detail="Você já possui este perfil.")
 
-    conn = connect()
-    try:
+    def trabalho(conn):
         # Verifica se já existe pedido pendente
         pending = query(
             conn,
@@ -322,11 +316,13 @@ def request_role_change(
         if pending:
             raise HTTPException(status_code=400, detail="Já existe uma solicitação pendente.")
 
-        cur = execute(
+        # RETURNING em vez de cursor.lastrowid (que o psycopg não oferece)
+        rows = query(
             conn,
             """
             INSERT INTO role_requests (username, requested_role, justification, created_at)
             VALUES (:u, :r, :j, :t)
+            RETURNING id
             """,
             {
                 "u": user.username,
@@ -335,7 +331,7 @@ def request_role_change(
                 "t": datetime.now(timezone.utc).isoformat(),
             },
         )
-        req_id = cur.lastrowid
+        req_id = rows[0]["id"]
 
         # 🧾 Auditoria da Solicitação
         registrar_evento(
@@ -350,10 +346,9 @@ def request_role_change(
             endpoint="/me/role-request",
             method="POST",
         )
-        conn.commit()
-        return {"message": "Solicitação enviada para aprovação."}
-    finally:
-        conn.close()
+
+    executar_auditado(trabalho)
+    return {"message": "Solicitação enviada para aprovação."}
 
 
 @router.post("/me/mfa/setup")
@@ -390,8 +385,7 @@ def enable_mfa(
     if not code:
         raise HTTPException(400, "Código obrigatório")
 
-    conn = connect()
-    try:
+    def trabalho(conn):
         rows = query(conn, "SELECT mfa_secret FROM users WHERE username = :u", {"u": user.username})
         if not rows or not rows[0]["mfa_secret"]:
             raise HTTPException(400, "MFA não iniciado. Chame /setup primeiro.")
@@ -415,10 +409,9 @@ def enable_mfa(
             endpoint="/me/mfa/enable",
             method="POST",
         )
-        conn.commit()
-        return {"message": "MFA ativado com sucesso!"}
-    finally:
-        conn.close()
+
+    executar_auditado(trabalho)
+    return {"message": "MFA ativado com sucesso!"}
 
 
 @router.post("/me/mfa/disable")
@@ -435,12 +428,17 @@ def disable_mfa(
         rows = query(
             conn, "SELECT password_hash FROM users WHERE username = :u", {"u": user.username}
         )
-        if not rows:
-            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    finally:
+        conn.close()
 
-        if not verify_password(password, rows[0]["password_hash"]):
-            raise HTTPException(status_code=400, detail="Senha incorreta")
+    if not rows:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
+    # bcrypt fora da transação de escrita (no modo "group" ela é a do lote inteiro)
+    if not verify_password(password, rows[0]["password_hash"]):
+        raise HTTPException(status_code=400, detail="Senha incorreta")
+
+    def trabalho(conn):
         execute(
             conn,
             "UPDATE users SET mfa_enabled = 0, mfa_secret = NULL WHERE username = :u",
@@ -459,7 +457,6 @@ def disable_mfa(
             endpoint="/me/mfa/disable",
             method="POST",
         )
-        conn.commit()
-        return {"message": "MFA desativado"}
-    finally:
-        conn.close()
+
+    executar_auditado(trabalho)
+    return {"message": "MFA desativado"}
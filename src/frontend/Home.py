@@ -3,7 +3,7 @@ from charts.charts import grafico_evolucao
 
 from frontend.core.pages import Page
 from frontend.layouts.base_layout import base_layout
-from frontend.loaders.registros import carregar_registros
+from frontend.loaders.registros import carregar_agregados, carregar_categorias
 from frontend.services.navigation import set_current_page
 
 # 🔐 Interceptar reset token antes de exigir autenticação
@@ -34,7 +34,13 @@ if user and user.get("password_expiring_soon"):
 
 st.title("📊 Painel Evolutivo de Dados")
 
-df = carregar_registros()
+BUCKETS = {"day": "Dia", "week": "Semana", "month": "Mês"}
+
+categorias = carregar_categorias()
+
+if not categorias:
+    st.info("Nenhum registro cadastrado.")
+    st.stop()
 
 # --- ler query params ---
 query_params = st.query_params
@@ -42,23 +48,27 @@ categoria_qp = query_params.get("categoria", [None])[0]
 
 # --- inicializar estado ---
 if "categoria" not in st.session_state:
-    st.session_state.categoria = categoria_qp or df["categoria"].iloc[0]
-
-categorias = df["categoria"].unique()
+    st.session_state.categoria = categoria_qp or categorias[0]
 
 # --- sidebar ---
 with st.sidebar:
     try:
-        cat_idx = categorias.tolist().index(st.session_state.categoria)
+        cat_idx = categorias.index(st.session_state.categoria)
     except ValueError:
         cat_idx = 0
 
     categoria = st.selectbox(
         "Categoria",
-        options=df["categoria"].unique(),
+        options=categorias,
         index=cat_idx,
     )
 
+    bucket = st.selectbox(
+        "Agrupar por",
+        options=list(BUCKETS.keys()),
+        format_func=lambda b: BUCKETS[b],
+    )
+
     st.divider()
 
     st.write("Access token")
@@ -83,7 +93,9 @@ st.session_state.categoria = categoria
 st.query_params.categoria = categoria
 
 
-df_filtrado = df[df["categoria"] == categoria]
+agregados = carregar_agregados(categoria=categoria, bucket=bucket)
+serie = agregados["series"].get(categoria, [])
+totais = next((t for t in agregados["totais"] if t["categoria"] == categoria), None)
 
 st.markdown(
     """
@@ -100,9 +112,9 @@ st.markdown(
 col1, col2 = st.columns([2, 1])
 
 with col1:
-    fig = grafico_evolucao(df_filtrado, categoria)
+    fig = grafico_evolucao(serie, categoria)
     st.plotly_chart(fig, width="stretch")
 
 with col2:
-    st.metric(label="Total de registros", value=len(df_filtrado))
-    st.metric(label="Soma do valor", value=df_filtrado["valor"].sum())
+    st.metric(label="Total de registros", value=totais["count"] if totais else 0)
+    st.metric(label="Soma do valor", value=totais["sum"] if totais else 0)
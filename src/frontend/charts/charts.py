@@ -1,6 +1,14 @@
 import plotly.express as px
 
 
-def grafico_evolucao(df, categoria):
-    fig = px.line(df, x="data", y="valor", title=f"Evolução da categoria {categoria}")
+def grafico_evolucao(serie, categoria):
+    """
+    serie: pontos de /registros/agg ({"bucket", "sum", ...}) em ordem de período.
+    """
+    fig = px.line(
+        x=[p["bucket"] for p in serie],
+        y=[p["sum"] for p in serie],
+        labels={"x": "data", "y": "valor"},
+        title=f"Evolução da categoria {categoria}",
+    )
     return fig
@@ -1,3 +1,5 @@
+import threading
+
 import pandas as pd
 import streamlit as st
 from fastapi import Response
@@ -6,22 +8,108 @@ from frontend.config import settings
 from frontend.services.api import APIClient
 
 
-@st.cache_data
-def carregar_registros():
+# Itens por página pedidos ao backend (máximo aceito: 5000)
+PAGE_SIZE = 5000
+
+# Revalidação periódica: o APIClient faz GET condicional (If-None-Match), então
+# revalidar dados inalterados custa um 304, sem baixar nem serializar de novo
+REVALIDAR_SEGUNDOS = 60
+
+_COLUNAS = ["id", "data", "categoria", "valor"]
+
+# Cópia local de todos os registros (indexada por id) + token do feed de mudanças.
+# É do processo, não da sessão: os dados são públicos e iguais para todos, e sobrevive
+# ao st.cache_data.clear() feito após as escritas (a recarga seguinte só busca o delta).
+_local_lock = threading.Lock()
+_local = {"token": None, "df": pd.DataFrame(columns=_COLUNAS[1:]).rename_axis("id")}
+
+
+def _aplicar_mudancas(df: pd.DataFrame, upserts: list[dict], deletes: list[int]) -> pd.DataFrame:
+    ids = [r["id"] for r in upserts] + deletes
+    if ids:
+        df = df.drop(index=ids, errors="ignore")
+    if upserts:
+        novos = pd.DataFrame(upserts, columns=_COLUNAS).set_index("id")
+        df = novos if df.empty else pd.concat([df, novos])
+    return df
+
+
+def _sincronizar_registros() -> pd.DataFrame:
     """
-    _api começa com underscore:
-    - NÃO entra no hash do cache
-    - mas continua sendo usado
+    Atualiza a cópia local pelo feed GET /registros/changes: só o que mudou desde o
+    último token (upserts + exclusões). Sem token, ou com `reset` (banco recriado),
+    a resposta é a carga completa.
     """
-    resp: Response = APIClient.listar_registros_publico(settings.API_BASE_URL)
+    with _local_lock:
+        token, df = _local["token"], _local["df"]
 
-    if resp.status_code != 200:
-        raise RuntimeError(f"Erro ao carregar registros: {resp.status_code} - {resp.text}")
+        while True:
+            params = {"limit": PAGE_SIZE}
+            if token:
+                params["since"] = token
+            resp: Response = APIClient.listar_mudancas_publico(
+                settings.API_BASE_URL, params=params
+            )
+
+            if resp.status_code != 200:
+                raise RuntimeError(f"Erro ao carregar registros: {resp.status_code} - {resp.text}")
+
+            mudancas = resp.json()
+            if mudancas["reset"]:
+                df = df.iloc[0:0]
+            df = _aplicar_mudancas(df, mudancas["upserts"], mudancas["deletes"])
+            token = mudancas["token"]
+            if not mudancas["has_more"]:
+                break
 
-    dados = resp.json()
-    df = pd.DataFrame(dados)
+        # Só publica o estado com o delta completo aplicado
+        _local["token"], _local["df"] = token, df
+        return df
+
+
+@st.cache_data(ttl=REVALIDAR_SEGUNDOS)
+def carregar_registros(categoria: str | None = None):
+    """
+    Registros (data DESC, id DESC) a partir da cópia local sincronizada por deltas
+    (`_sincronizar_registros`). Com `categoria`, o filtro é local.
+    """
+    df = _sincronizar_registros()
+
+    if categoria:
+        df = df[df["categoria"] == categoria]
+
+    df = df.reset_index().sort_values(["data", "id"], ascending=False, ignore_index=True)
+    df = df[_COLUNAS]
 
     if "data" in df.columns:
         df["data"] = pd.to_datetime(df["data"], errors="coerce")
         df["data"] = df["data"].dt.normalize()
     return df
+
+
+@st.cache_data(ttl=REVALIDAR_SEGUNDOS)
+def carregar_categorias() -> list[str]:
+    resp: Response = APIClient.listar_categorias_publico(settings.API_BASE_URL)
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"Erro ao carregar categorias: {resp.status_code} - {resp.text}")
+
+    return resp.json()
+
+
+@st.cache_data(ttl=REVALIDAR_SEGUNDOS)
+def carregar_agregados(categoria: str | None = None, bucket: str = "day") -> dict:
+    """
+    Séries e totais calculados no backend (/registros/agg).
+    Retorna dict com: bucket, totais, series.
+    """
+    params = {"bucket": bucket}
+    if categoria:
+        params["categoria"] = categoria
+
+    resp: Response = APIClient.agregar_registros_publico(settings.API_BASE_URL, params=params)
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"Erro ao carregar agregados: {resp.status_code} - {resp.text}")
+
+    return resp.json()
@@ -11,13 +11,12 @@ api, user = base_layout("Dados detalhados", ":paper:")
 
 st.title("📄 Dados detalhados")
 
-df = carregar_registros()
-
-# reaproveita filtro da sessão
+# reaproveita filtro da sessão (aplicado no servidor)
 categoria = st.session_state.get("categoria")
 
+df = carregar_registros(categoria)
+
 if categoria:
-    df = df[df["categoria"] == categoria]
     st.caption(f"Categoria selecionada: {categoria}")
 else:
     st.caption("Nenhum filtro aplicado")
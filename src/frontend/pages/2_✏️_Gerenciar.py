@@ -5,7 +5,7 @@ import streamlit as st
 
 from frontend.core.pages import Page
 from frontend.layouts.base_layout import base_layout
-from frontend.loaders.registros import carregar_registros
+from frontend.loaders.registros import carregar_categorias, carregar_registros
 from frontend.services.errors import handle_api_error
 from frontend.services.navigation import set_current_page
 
@@ -34,7 +34,7 @@ st.subheader("➕ Novo registro")
 
 with st.form("form_inserir", clear_on_submit=False):
     data = st.date_input("Data", format="DD/MM/YYYY")
-    categoria = st.selectbox("Categoria", options=df["categoria"].unique())
+    categoria = st.selectbox("Categoria", options=carregar_categorias())
     valor = st.number_input("Valor", step=1)
 
     submitted = st.form_submit_button("Inserir", type="primary")
@@ -29,6 +29,13 @@ with col2:
         width="stretch",
     ):
         st.rerun()
+    if st.button(
+        "🧮 Verificação completa",
+        help="Recalcula toda a cadeia desde o primeiro evento (ignora o checkpoint).",
+        width="stretch",
+    ):
+        st.session_state["audit_full_verify"] = True
+        st.rerun()
     st.space()
 
 # ============================
@@ -37,7 +44,10 @@ with col2:
 
 with st.spinner("Verificando integridade e buscando evidências..."):
     # 1. Re-executa a verificação para atualizar o status
-    verify_resp = api._request("GET", "/admin/audit/verify")
+    full = st.session_state.pop("audit_full_verify", False)
+    verify_resp = api._request(
+        "GET", "/admin/audit/verify", params={"full": "true"} if full else None
+    )
     # 2. Busca o relatório forense completo
     evidence_resp = api._request("GET", "/admin/audit/evidence")
 
@@ -57,7 +67,11 @@ is_valid = evidence_report.get("status") == "OK"
 if is_valid:
     st.success("✔ Auditoria íntegra e confiável")
     verify_result = verify_resp.json()
-    st.metric("Eventos verificados na última checagem", verify_result.get("checked_events", "N/A"))
+    modo = "completa" if verify_result.get("mode") == "full" else "incremental"
+    st.metric(
+        f"Eventos verificados na última checagem ({modo})",
+        verify_result.get("checked_events", "N/A"),
+    )
 else:
     st.error("❌ Violação de Integridade Detectada")
 
@@ -1,6 +1,8 @@
 import json
 import logging
 import sys
+import threading
+from collections import OrderedDict
 
 import requests
 import streamlit as st
@@ -24,6 +26,44 @@ if not logger.handlers:
     logger.addHandler(handler)
 
 
+# Última resposta 200 (com ETag) por URL + params das leituras públicas de registros.
+# O GET seguinte manda If-None-Match; com 304 o corpo já baixado é reaproveitado.
+_CONDITIONAL_CACHE_MAX = 64
+_conditional_cache: "OrderedDict[tuple, requests.Response]" = OrderedDict()
+_conditional_lock = threading.Lock()
+
+
+def _get_condicional(url: str, params: dict | None, timeout: int) -> requests.Response:
+    chave = (url, tuple(sorted((params or {}).items())))
+    with _conditional_lock:
+        anterior = _conditional_cache.get(chave)
+
+    headers = {}
+    if anterior is not None:
+        headers["If-None-Match"] = anterior.headers["ETag"]
+
+    resp = requests.get(
+        url,
+        params=params,
+        headers=headers,
+        verify=settings.SSL_VERIFY,
+        timeout=timeout,
+    )
+
+    if resp.status_code == 304 and anterior is not None:
+        with _conditional_lock:
+            _conditional_cache.move_to_end(chave)
+        return anterior
+
+    if resp.status_code == 200 and resp.headers.get("ETag"):
+        with _conditional_lock:
+            _conditional_cache[chave] = resp
+            _conditional_cache.move_to_end(chave)
+            while len(_conditional_cache) > _CONDITIONAL_CACHE_MAX:
+                _conditional_cache.popitem(last=False)
+    return resp
+
+
 class APIClient:
     def __init__(self, base_url: str, access_token: str, refresh_token: str):
         self.base_url = base_url.rstrip("/")
@@ -154,10 +194,26 @@ class APIClient:
     # Métodos públicos (sem auth)
     # -------------------------
 
+    # Leituras de registros: GET condicional (If-None-Match); dados inalterados = 304
+
+    @staticmethod
+    def listar_registros_publico(base_url: str, params: dict | None = None, timeout: int = 10):
+        return _get_condicional(f"{base_url.rstrip('/')}/registros", params, timeout)
+
+    @staticmethod
+    def listar_categorias_publico(base_url: str, timeout: int = 10):
+        return _get_condicional(f"{base_url.rstrip('/')}/registros/categorias", None, timeout)
+
+    @staticmethod
+    def agregar_registros_publico(base_url: str, params: dict | None = None, timeout: int = 10):
+        return _get_condicional(f"{base_url.rstrip('/')}/registros/agg", params, timeout)
+
     @staticmethod
-    def listar_registros_publico(base_url: str, timeout: int = 10):
+    def listar_mudancas_publico(base_url: str, params: dict | None = None, timeout: int = 10):
+        # Sem GET condicional: o token `since` já faz a resposta trazer só o que mudou
         return requests.get(
-            f"{base_url.rstrip('/')}/registros",
+            f"{base_url.rstrip('/')}/registros/changes",
+            params=params,
             verify=settings.SSL_VERIFY,
             timeout=timeout,
         )
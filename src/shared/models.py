@@ -26,6 +26,38 @@ class RegistroOut(RegistroIn):
     id: int
 
 
+class RegistroAggPonto(BaseModel):
+    bucket: date
+    count: int
+    sum: int
+    min: int
+    max: int
+
+
+class RegistroAggTotal(BaseModel):
+    categoria: str
+    count: int
+    sum: int
+    min: int
+    max: int
+    data_min: date
+    data_max: date
+
+
+class RegistroAggOut(BaseModel):
+    bucket: Literal["day", "week", "month"]
+    totais: list[RegistroAggTotal]
+    series: dict[str, list[RegistroAggPonto]]
+
+
+class RegistroMudancasOut(BaseModel):
+    token: str
+    reset: bool
+    has_more: bool
+    upserts: list[RegistroOut]
+    deletes: list[int]
+
+
 class AuditoriaOut(BaseModel):
     id: int
     timestamp: str